@@ -1,8 +1,10 @@
 # logger.py (fix: keine %f im datefmt, msecs über %(msecs)03d)
+import atexit
 import json
 import logging
 import logging.handlers
 import os
+import queue
 import sys
 from datetime import datetime
 
@@ -13,6 +15,8 @@ except Exception:
     pass
 
 _LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# LOG_QUEUE=1: alle Logger schreiben über einen Hintergrund-Thread
+_QUEUED = os.getenv("LOG_QUEUE", "0") == "1"
 
 LEVEL_COLORS = {
     "DEBUG": "\033[36m",
@@ -55,11 +59,141 @@ class JsonFormatter(logging.Formatter):
             "line": record.lineno,
             "msg": record.getMessage(),
         }
+        # strukturierte Zusatzfelder: log.info("...", extra={"fields": {...}})
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
         if record.exc_info:
             payload["exc"] = self.formatException(record.exc_info)
         return json.dumps(payload, ensure_ascii=False)
 
 
+class LazyPayload:
+    """Wird erst beim Formatieren ausgewertet, z.B. log.info("data: %s", lazy(json.dumps, data)).
+    Ist das Level abgeschaltet, wird func nie aufgerufen; im Queue-Modus läuft es im Listener-Thread.
+    Deshalb nur für Argumente, die danach niemand mehr verändert - veränderliche Daten vorher kopieren."""
+    __slots__ = ("func", "args", "kwargs", "_text")
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self._text = None
+
+    def __str__(self) -> str:
+        # ein Record wird mehrfach formatiert (RotatingFileHandler.shouldRollover, jeder weitere Handler)
+        if self._text is None:
+            self._text = str(self.func(*self.args, **self.kwargs))
+        return self._text
+
+
+def lazy(func, *args, **kwargs) -> LazyPayload:
+    return LazyPayload(func, *args, **kwargs)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, der nicht im aufrufenden Thread formatiert.
+
+    Der Standard-prepare() baut die komplette Message schon im Aufrufer zusammen. Hier geht der Record
+    unverändert in die (prozessinterne) Queue, msg % args und die Formatter laufen erst im Listener-Thread.
+    Payloads dürfen deshalb nach dem Log-Aufruf nicht mehr verändert werden.
+
+    Ohne laufenden Listener (nach stop_queue_listeners, in einem geforkten Kindprozess) schreibt der Handler
+    direkt in direct_handlers, damit keine Records in einer Queue liegen bleiben, die niemand mehr leert.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.direct_handlers: tuple[logging.Handler, ...] = ()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not self.direct_handlers:
+            super().emit(record)
+            return
+        for handler in self.direct_handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+class DelayedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Öffnet Ordner und Datei erst beim ersten Record (delay=True), ein Import schreibt nichts auf die Platte."""
+
+    def __init__(self, filename, *args, **kwargs):
+        super().__init__(filename, *args, **kwargs)
+        self.shared_filename = self.baseFilename
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename) or ".", exist_ok=True)
+        return super()._open()
+
+    def use_process_file(self) -> None:
+        """Schreibt ab jetzt in <datei>.<pid>.log. Zwei Prozesse, die dieselbe Datei anhängen und rotieren,
+        zerschießen sich gegenseitig die Zeilen und die Backups."""
+        with self.lock:
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            root, ext = os.path.splitext(self.shared_filename)
+            self.baseFilename = f"{root}.{os.getpid()}{ext}"
+
+
+# (QueueHandler, QueueListener) aller Logger im Queue-Modus
+_listeners: list[tuple[DeferredQueueHandler, logging.handlers.QueueListener]] = []
+# Datei-Handler aller Logger, ein geforkter Prozess bekommt eigene Dateien
+_file_handlers: list[DelayedRotatingFileHandler] = []
+_forked_child = False
+
+
+def stop_queue_listeners() -> None:
+    """Schreibt alle wartenden Records und beendet die Hintergrund-Threads (läuft auch bei atexit).
+    Danach schreiben die Logger direkt, auch Records aus späteren atexit-Funktionen kommen noch an."""
+    while _listeners:
+        handler, listener = _listeners.pop()
+        listener.stop()
+        handler.direct_handlers = listener.handlers
+
+
+def _start_listener(handler: DeferredQueueHandler, handlers) -> None:
+    listener = logging.handlers.QueueListener(handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append((handler, listener))
+
+
+def _drain_before_fork() -> None:
+    # Der Kindprozess erbt die Queues samt Inhalt, aber nicht die Listener-Threads. Vor dem Fork schreibt der
+    # Elternprozess deshalb alles Wartende, danach laufen seine Listener weiter.
+    for _, listener in _listeners:
+        listener.stop()
+
+
+def _restart_after_fork_in_parent() -> None:
+    for _, listener in _listeners:
+        listener.start()
+
+
+def _after_fork_in_child() -> None:
+    # Worker von multiprocessing/ProcessPoolExecutor enden mit os._exit, ohne atexit. Ein Listener-Thread würde
+    # dort wartende Records verlieren, der Kindprozess schreibt deshalb direkt - in eigene Dateien.
+    global _forked_child
+    _forked_child = True
+    inherited = list(_listeners)
+    _listeners.clear()
+    for handler, listener in inherited:
+        handler.queue = queue.SimpleQueue()
+        handler.direct_handlers = listener.handlers
+    for file_handler in _file_handlers:
+        file_handler.use_process_file()
+
+
+atexit.register(stop_queue_listeners)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_drain_before_fork, after_in_parent=_restart_after_fork_in_parent,
+                        after_in_child=_after_fork_in_child)
+
+
 def _level_from_str(level_str: str) -> int:
     return getattr(logging, level_str.upper(), logging.INFO)
 
@@ -74,9 +208,13 @@ def get_logger(
     backup_count: int = 5,
     json_console: bool = False,
     json_file: bool = False,
+    queued: bool = _QUEUED,
 ) -> logging.Logger:
     """
     Erzeugt einen Logger mit optionaler Console- und Rotating-File-Ausgabe.
+    queued=True: der Logger legt Records nur in eine Queue, Formatieren und Schreiben übernimmt ein
+    QueueListener im Hintergrund (für Hot Paths wie den Live-Modus). In einem geforkten Kindprozess schreibt
+    der Logger direkt und in <log_file>.<pid>.log.
     """
     logger = logging.getLogger(name if name else "")
     if logger.handlers:
@@ -85,23 +223,35 @@ def get_logger(
     logger.setLevel(_level_from_str(level) if isinstance(level, str) else level)
     logger.propagate = False
 
+    handlers: list[logging.Handler] = []
+
     if to_console:
         ch = logging.StreamHandler(stream=sys.stderr)
         ch.setLevel(logger.level)
         ch.setFormatter(JsonFormatter() if json_console else ColorFormatter())
-        logger.addHandler(ch)
+        handlers.append(ch)
 
     if log_file:
-        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
-        fh = logging.handlers.RotatingFileHandler(
-            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        fh = DelayedRotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
         )
         fh.setLevel(logger.level)
+        _file_handlers.append(fh)
+        if _forked_child:
+            fh.use_process_file()
         if json_file:
             fh.setFormatter(JsonFormatter())
         else:
             fh.setFormatter(logging.Formatter(fmt=BASE_FMT, datefmt=TIME_FMT))
-        logger.addHandler(fh)
+        handlers.append(fh)
+
+    if queued and handlers and not _forked_child:
+        qh = DeferredQueueHandler(queue.SimpleQueue())
+        _start_listener(qh, handlers)
+        logger.addHandler(qh)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
 
     return logger
 
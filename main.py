@@ -1,235 +1,279 @@
-import dotenv
-import google.generativeai as genai
+import argparse
 import os
+import sys
 import json
-from pydantic_core.core_schema import JsonType
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
+import profiling
+from profiling import span
 from setup_parser import ACCSetup
-
-
-API_KEY = dotenv.get_key(".env", "GEMINI_API_KEY")
-
-genai.configure(api_key=API_KEY)
+from response_cache import setup_hash
+from specialists import get_registry, using_setup
+
+
+# function_calls of one manager turn that run at the same time (specialists are independent LLM round trips)
+MAX_PARALLEL_TOOLS = int(os.getenv("MAX_PARALLEL_TOOLS", "4"))
+# Ordner mit dem 'assets'-Ordner der MoTeC-Exporte und Streckenkarten
+LAP_BASE_DIR = Path(__file__).resolve().parent / "src"
+# Die Telemetrie-Module in src importieren sich gegenseitig über ihre Namen (from track_model import ...),
+# so laufen set_laps/load_laps auch ohne PYTHONPATH=src. Geladen werden sie erst mit der ersten Runde.
+if str(LAP_BASE_DIR) not in sys.path:
+    sys.path.append(str(LAP_BASE_DIR))
+# STREAM_OUTPUT=0: die CLI druckt die Antwort erst, wenn sie komplett ist
+STREAM_OUTPUT = os.getenv("STREAM_OUTPUT", "1") == "1"
+
+# Fortschrittsanzeige der Werkzeuge im Streaming-Modus
+TOOL_LABELS = {
+    "ask_aero_specialist": "Aero-Spezialist wird konsultiert",
+    "ask_mech_grip_specialist": "Mechanischer-Grip-Spezialist wird konsultiert",
+    "ask_tyre_specialist": "Reifen-Spezialist wird konsultiert",
+    "ask_damper_specialist": "Dämpfer-Spezialist wird konsultiert",
+    "ask_electronics_specialist": "Elektronik-Spezialist wird konsultiert",
+    "get_lap_digest": "Telemetrie wird ausgewertet",
+}
 
 
 def ask_aero_specialist(problem: str, setup=None):
     """Konsultiert den Aerodynamik-Spezialisten bei Problemen mit der Aero-Balance eines Fahrzeugs."""
-    _aero_prompt_path = "src/assets/prompts/aero_prompt.txt"
-    with open(_aero_prompt_path, "r", encoding="utf-8") as _aero_prompt:
-        aero_prompt = _aero_prompt.read()
-        aero_prompt += "\n\n"
-        aero_prompt += (f"Setup:\n"
-                        f" {setup}")
-
-    aero_model = genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=aero_prompt)
-
-    aero_response = aero_model.generate_content(problem)
-    return aero_response.text
+    return get_registry().ask("aero", problem, setup)
 def ask_mech_grip_specialist(problem: str, setup=None):
     """Konsultiert den Mechanischen-Grip-Spezialisten bei Problemen mit dem mechanischen Grip eines Fahrzeugs."""
-    _mech_prompt_path = "src/assets/prompts/mechanical_grip.txt"
-    with open(_mech_prompt_path, "r", encoding="utf-8") as _mechanical_prompt:
-        mechanical_prompt = _mechanical_prompt.read()
-
-    mech_model = genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=mechanical_prompt)
-
-    mech_response = mech_model.generate_content(problem)
-    return mech_response.text
+    return get_registry().ask("mech_grip", problem, setup)
 def ask_tyre_specialist(problem: str, setup=None):
     """Konsultiert den Reifen-Spezialisten bei Problemen mit Reifen, Sturz, Spur, Nachlauf und so weiter eines Fahrzeugs."""
-    _tyre_prompt_path = "src/assets/prompts/tyres_prompt.txt"
-    with open(_tyre_prompt_path, "r", encoding="utf-8") as _tyre_prompt:
-        tyre_prompt = _tyre_prompt.read()
-
-    tyre_model = genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=tyre_prompt)
-
-    tyre_response = tyre_model.generate_content(problem)
-    return tyre_response.text
+    return get_registry().ask("tyre", problem, setup)
 def ask_damper_specialist(problem: str, setup=None):
     """Konsultiert den Daempfer-Spezialisten bei Problemen mit den Daempfern eines Fahrzeugs."""
-    _damper_prompt_path = "src/assets/prompts/dampers_prompt.txt"
-    with open(_damper_prompt_path, "r", encoding="utf-8") as _damper_prompt:
-        damper_prompt = _damper_prompt.read()
-
-    damper_model = genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=damper_prompt)
-
-    damper_response = damper_model.generate_content(problem)
-    return damper_response.text
+    return get_registry().ask("damper", problem, setup)
 def ask_electronics_specialist(problem: str, setup=None):
     """Konsultiert den Daempfer-Spezialisten bei Problemen mit den Daempfern eines Fahrzeugs."""
-    _electronics_prompt_path = "src/assets/prompts/electronics_prompt.txt"
-    with open(_electronics_prompt_path, "r", encoding="utf-8") as _electronics_prompt:
-        electronics_prompt = _electronics_prompt.read()
+    return get_registry().ask("electronics", problem, setup)
 
-    electronics_model= genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=electronics_prompt)
 
-    electronics_response = electronics_model.generate_content(problem)
-    return electronics_response.text
+# Werkzeuge, die der Manager immer hat. Die Setup-Getter kommen pro ACCSetup dazu.
+SPECIALIST_TOOLS = [ask_aero_specialist,
+                    ask_tyre_specialist,
+                    ask_damper_specialist,
+                    ask_electronics_specialist,
+                    ask_mech_grip_specialist]
 
 
+def setup_tools(acc_setup: ACCSetup) -> list:
+    return [acc_setup.get_setup,
+            acc_setup.get_mechanical_balance,
+            acc_setup.get_aero,
+            acc_setup.get_tyres_and_alignment,
+            acc_setup.get_dampers,
+            acc_setup.get_electronics]
+
 
 class SetupManager:
-    def __init__(self, setup_path=""):
-        mp_file_path = "src/assets/prompts/manager_prompt.txt"
-        with open(mp_file_path, "r", encoding="utf-8") as f:
-            self.prompt = f.read()
+    def __init__(self, setup_path="", max_parallel_tools: int = MAX_PARALLEL_TOOLS, backend=None):
+        """
+        :param setup_path: ACC setup json the manager and its tools work on
+        :param max_parallel_tools: how many function_calls of one manager turn run at the same time
+        :param backend: backend of the manager model (chat_model, function_response), defaults to the backend of
+                        the specialist registry. StubBackend runs the manager offline.
+        """
+        self.prompt = get_registry().prompt("manager")
+        self.backend = backend if backend is not None else get_registry().backend
 
         self.response = None
         self.acc_setup = None
+        self.lap_digest = None
+        self.tools = list(SPECIALIST_TOOLS)
+        self.tool_table = {}
+        self.setup_key = ""
+        self.tool_executor = ThreadPoolExecutor(max_workers=max(max_parallel_tools, 1), thread_name_prefix="tool")
 
         if setup_path:
             try:
                 self.acc_setup = ACCSetup(setup_path)
-                self.model = genai.GenerativeModel('gemini-1.5-flash-latest'
-                                              , system_instruction=self.prompt,
-                                              tools=[ask_aero_specialist,
-                                                     ask_tyre_specialist,
-                                                     ask_damper_specialist,
-                                                     ask_electronics_specialist,
-                                                     ask_mech_grip_specialist,
-                                                     self.acc_setup.get_setup,
-                                                     self.acc_setup.get_mechanical_balance,
-                                                     self.acc_setup.get_aero,
-                                                     self.acc_setup.get_tyres_and_alignment,
-                                                     self.acc_setup.get_dampers,
-                                                     self.acc_setup.get_electronics
-                                                     ]
-                                              )
-
+                self.tools += setup_tools(self.acc_setup)
             except Exception as e:
                 print(e)
                 print("Es konnte kein Setup geladen werden!")
 
-        else:
-            self.model = genai.GenerativeModel('gemini-1.5-flash-latest'
-                                              , system_instruction=self.prompt,
-                                              tools=[ask_aero_specialist,
-                                                     ask_tyre_specialist,
-                                                     ask_damper_specialist,
-                                                     ask_electronics_specialist,
-                                                     ask_mech_grip_specialist])
-
+        self._build_model(self.prompt)
         self.chat = self.model.start_chat()
 
-    def set_setup(self, setup:json):
+    def _build_model(self, system_instruction) -> None:
+        """Baut das Manager-Modell aus self.tools und die Lookup-Tabelle name -> Funktion für _call_tool."""
+        self.tool_table = {tool.__name__: tool for tool in self.tools}
+        # Schlüssel für den Antwort-Cache der Spezialisten, ändert sich mit jedem neuen Setup.
+        self.setup_key = setup_hash(self.acc_setup.get_setup()) if self.acc_setup else ""
+        self.model = self.backend.chat_model(system_instruction, self.tools)
+
+    def _rebuild(self) -> None:
+        """Baut das Modell mit den aktuellen Werkzeugen neu. Der Chat läuft mit dem bisherigen Verlauf auf dem
+        neuen Modell weiter, sonst sähe der Manager die neuen Werkzeuge nie."""
         history = self.chat.history
-        if not self.chat.history:
-            history = self.prompt
+        self._build_model(self.prompt)
+        self.chat = self.model.start_chat(history=history)
 
+    def set_setup(self, setup:json):
         try:
             self.acc_setup = ACCSetup(setup)
-
-            self.model = genai.GenerativeModel('gemini-1.5-flash-latest'
-                                               , system_instruction=history,
-                                               tools=[ask_aero_specialist,
-                                                      ask_tyre_specialist,
-                                                      ask_damper_specialist,
-                                                      ask_electronics_specialist,
-                                                      ask_mech_grip_specialist,
-                                                      self.acc_setup.get_setup,
-                                                      self.acc_setup.get_mechanical_balance,
-                                                      self.acc_setup.get_aero,
-                                                      self.acc_setup.get_tyres_and_alignment,
-                                                      self.acc_setup.get_dampers,
-                                                      self.acc_setup.get_electronics
-                                                      ]
-                                               )
+            # Nur die Setup-Getter sind neu, die Spezialisten bleiben.
+            self.tools = SPECIALIST_TOOLS + setup_tools(self.acc_setup)
+            if self.lap_digest is not None:
+                self.tools.append(self.lap_digest.get_lap_digest)
+            self._rebuild()
             return True
         except Exception as e:
             print(e)
             print("Es konnte kein Setup geladen werden!")
         return False
 
+    def set_laps(self, user_df, ref_df, track_model) -> None:
+        """Gibt dem Manager die Telemetrie der Session als Werkzeug get_lap_digest: die Kurven mit dem größten
+        Zeitverlust gegenüber der Referenzrunde, statt der Rohdaten."""
+        # pandas und die Analyse werden erst geladen, wenn es Telemetrie gibt
+        from coach_digest import LapDigest
+
+        self.lap_digest = LapDigest(user_df, ref_df, track_model)
+        self.tools = [tool for tool in self.tools if tool.__name__ != "get_lap_digest"]
+        self.tools.append(self.lap_digest.get_lap_digest)
+        self._rebuild()
+
+    def load_laps(self, user_lap: str, ref_lap: str, track: str, base_dir: Path = LAP_BASE_DIR) -> bool:
+        """Lädt zwei MoTeC-Exporte (Pfade relativ zu base_dir) und gibt sie dem Manager über set_laps."""
+        try:
+            from motec_csv_practice import TelemetryLoader
+            from track_model import TrackModel
+
+            loader = TelemetryLoader(base_dir)
+            user_df = loader.telemetry_from_csv(user_lap, track)
+            ref_df = loader.telemetry_from_csv(ref_lap, track)
+            self.set_laps(user_df, ref_df, TrackModel.for_track(base_dir, track))
+            return True
+        except Exception as e:
+            print(e)
+            print("Die Runden konnten nicht geladen werden!")
+        return False
+
     def send_message(self, message:str):
         return self.chat.send_message(message)
 
-    def ask(self, message:str):
-        response = self.chat.send_message(message)
-        found_tool_call = False
-        final_response = ""
+    def ask(self, message:str, stream: bool = False):
+        """
+        :param message: problem description of the driver
+        :param stream: print the answer while it arrives and the progress of every tool call
+        :return: the final answer of the manager
+        """
+        with profiling.run("ask"):
+            return self._ask(message, stream)
+
+    def _send(self, content, turn: int, stream: bool):
+        """One round trip to the manager. With stream the text parts are printed chunk by chunk, the returned
+        response is complete (text and function_calls) once the stream is consumed."""
+        with span("llm.manager", turn=turn):
+            if not stream:
+                return self.chat.send_message(content)
+
+            response = self.chat.send_message(content, stream=True)
+            for chunk in response:
+                for part in chunk.candidates[0].content.parts:
+                    if part.text:
+                        print(part.text, end="", flush=True)
+        return response
+
+    def _call_tool(self, tool_name: str, tool_args, progress: bool = False) -> str | None:
+        """Runs one function_call of the manager. Returns None if the tool is unknown."""
+        tool = self.tool_table.get(tool_name)
+        if tool is None:
+            return None
+
+        label = TOOL_LABELS.get(tool_name, tool_name)
+        if progress:
+            print(f"   ... {label}", flush=True)
+        started = time.perf_counter()
+        with span("llm.tool", tool=tool_name), using_setup(self.setup_key):
+            tool_response = tool(**tool_args)
+        if progress:
+            print(f"   ✓ {tool_name} fertig ({time.perf_counter() - started:.1f} s)", flush=True)
+
+        if isinstance(tool_response, dict):
+            tool_response = json.dumps(tool_response)
+        return tool_response
+
+    def _run_tools(self, function_calls: list, progress: bool = False) -> list:
+        """Runs all function_calls of one manager turn, up to max_parallel_tools at the same time.
+        The results keep the order of the calls."""
+        if len(function_calls) == 1:
+            return [self._call_tool(function_calls[0].name, function_calls[0].args, progress)]
+
+        futures = [self.tool_executor.submit(self._call_tool, fc.name, fc.args, progress) for fc in function_calls]
+        return [future.result() for future in futures]
+
+    def _ask(self, message:str, stream: bool = False):
+        response = self._send(message, 0, stream)
         max_func_calls = 2
         func_calls = 0
 
         while func_calls < max_func_calls:
-            print(response.candidates[0].content.parts)
-            last_parts = response.candidates[0].content.parts[0]
+            if not stream:
+                print(response.candidates[0].content.parts)
+            # Alle function_calls dieser Antwort, die ai kann mehrere Spezialisten gleichzeitig fragen.
+            function_calls = [part.function_call for part in response.candidates[0].content.parts
+                              if part.function_call]
 
             # Falls die letzte Antwort der ai kein function call war, wird abgebrochen.
-            if not last_parts.function_call:
+            if not function_calls:
                 break
 
-            # Instanzieren der temporären Variablen des Parts.
-            function_call = last_parts.function_call
-            tool_name = function_call.name
-            tool_args = function_call.args
-            print(f"-> Manager ruft auf: {tool_name}")
-            tool_response = None
-
-            if tool_name == "ask_aero_specialist":
-                tool_response = ask_aero_specialist(**tool_args)
-            elif tool_name == "ask_mech_grip_specialist":
-                tool_response = ask_mech_grip_specialist(**tool_args)
-            elif tool_name == "ask_tyre_specialist":
-                tool_response = ask_tyre_specialist(**tool_args)
-            elif tool_name == "ask_damper_specialist":
-                tool_response = ask_damper_specialist(**tool_args)
-            elif tool_name == "ask_electronics_specialist":
-                tool_response = ask_electronics_specialist(**tool_args)
-
-            elif tool_name == "get_tyres_and_alignment":
-                tool_response = self.acc_setup.get_tyres_and_alignment()
-                if isinstance(tool_response, dict):
-                    tool_response = json.dumps(tool_response)
-            elif tool_name == "get_setup":
-                tool_response = self.acc_setup.get_setup()
-                if isinstance(tool_response, dict):
-                    tool_response = json.dumps(tool_response)
-            elif tool_name == "get_mechanical_grip":
-                tool_response = self.acc_setup.get_mechanical_balance()
-                if isinstance(tool_response, dict):
-                    tool_response = json.dumps(tool_response)
-            elif tool_name == "get_aero":
-                tool_response = self.acc_setup.get_aero()
-                if isinstance(tool_response, dict):
-                    tool_response = json.dumps(tool_response)
-            elif tool_name == "get_dampers":
-                tool_response = self.acc_setup.get_dampers()
-                if isinstance(tool_response, dict):
-                    tool_response = json.dumps(tool_response)
-            elif tool_name == "get_electronics":
-                tool_response = self.acc_setup.get_electronics()
-                if isinstance(tool_response, dict):
-                    tool_response = json.dumps(tool_response)
-
-            if tool_response:
-                final_response = self.chat.send_message(
-                    content=[genai.protos.Part(
-                        function_response=genai.protos.FunctionResponse(
-                            name=tool_name,
-                            response={'result': tool_response}
-                        )
-                    )]
-                )
-                response = final_response
-                func_calls += 1
-
-            else:
-                print(f"Fehler: Werkzeug {tool_name} nicht gefunden")
+            if not stream:
+                for function_call in function_calls:
+                    print(f"-> Manager ruft auf: {function_call.name}")
+
+            tool_responses = self._run_tools(function_calls, progress=stream)
+
+            if not any(tool_responses):
+                print(f"Fehler: Werkzeug {', '.join(fc.name for fc in function_calls)} nicht gefunden")
                 break
 
+            parts = []
+            for function_call, tool_response in zip(function_calls, tool_responses):
+                if not tool_response:
+                    print(f"Fehler: Werkzeug {function_call.name} nicht gefunden")
+                    tool_response = f"Fehler: Werkzeug {function_call.name} nicht gefunden"
+                parts.append(self.backend.function_response(function_call.name, tool_response))
+
+            # Alle Antworten gehen in einer Nachricht zurück an den Manager.
+            response = self._send(parts, func_calls + 1, stream)
+            func_calls += 1
+
         return response.text
 
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Setup-Coach für ACC.")
+    parser.add_argument("--setup", default="src/assets/setups/SPA RACE BERNA 24 32.json")
+    parser.add_argument("--user-lap", help="MoTeC-Export der eigenen Runde, relativ zu src/")
+    parser.add_argument("--ref-lap", help="MoTeC-Export der Referenzrunde, relativ zu src/")
+    parser.add_argument("--track", default="spa")
+    args = parser.parse_args()
 
+    setup_manager = SetupManager(setup_path=args.setup)
+    if args.user_lap and args.ref_lap:
+        setup_manager.load_laps(args.user_lap, args.ref_lap, args.track)
 
-    setup_path = "src/assets/setups/SPA RACE BERNA 24 32.json"
-    setup_manager = SetupManager(setup_path=setup_path)
-    #setup_manager = SetupManager()
     while True:
-        user_input = input("Beschreibe dein Problem:\n")
+        user_input = input("Beschreibe dein Problem (e: Ende, laps <eigene.csv> <referenz.csv> [strecke]):\n")
         if user_input == "e":
             break
 
-        print(setup_manager.ask(user_input))
+        command = user_input.split()
+        if command and command[0] == "laps" and len(command) in (3, 4):
+            if setup_manager.load_laps(command[1], command[2], command[3] if len(command) == 4 else args.track):
+                print("Telemetrie geladen, der Manager kann sie mit get_lap_digest abrufen.")
+            continue
+
+        if STREAM_OUTPUT:
+            setup_manager.ask(user_input, stream=True)
+            print()
+        else:
+            print(setup_manager.ask(user_input))
@@ -1,146 +1,48 @@
-import dotenv
-import google.generativeai as genai
 import json
 
 
+from main import SPECIALIST_TOOLS, setup_tools
 from setup_parser import ACCSetup
-
-
-API_KEY = dotenv.get_key(".env", "GEMINI_API_KEY")
-
-genai.configure(api_key=API_KEY)
-
-
-def ask_aero_specialist(problem: str, setup=None):
-    """Konsultiert den Aerodynamik-Spezialisten bei Problemen mit der Aero-Balance eines Fahrzeugs."""
-    _aero_prompt_path = "src/assets/prompts/aero_prompt.txt"
-    with open(_aero_prompt_path, "r", encoding="utf-8") as _aero_prompt:
-        aero_prompt = _aero_prompt.read()
-        aero_prompt += "\n\n"
-        aero_prompt += (f"Setup:\n"
-                        f" {setup}")
-
-    aero_model = genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=aero_prompt)
-
-    aero_response = aero_model.generate_content(problem)
-    return aero_response.text
-def ask_mech_grip_specialist(problem: str, setup=None):
-    """Konsultiert den Mechanischen-Grip-Spezialisten bei Problemen mit dem mechanischen Grip eines Fahrzeugs."""
-    _mech_prompt_path = "src/assets/prompts/mechanical_grip.txt"
-    with open(_mech_prompt_path, "r", encoding="utf-8") as _mechanical_prompt:
-        mechanical_prompt = _mechanical_prompt.read()
-
-    mech_model = genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=mechanical_prompt)
-
-    mech_response = mech_model.generate_content(problem)
-    return mech_response.text
-def ask_tyre_specialist(problem: str, setup=None):
-    """Konsultiert den Reifen-Spezialisten bei Problemen mit Reifen, Sturz, Spur, Nachlauf und so weiter eines Fahrzeugs."""
-    _tyre_prompt_path = "src/assets/prompts/tyres_prompt.txt"
-    with open(_tyre_prompt_path, "r", encoding="utf-8") as _tyre_prompt:
-        tyre_prompt = _tyre_prompt.read()
-
-    tyre_model = genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=tyre_prompt)
-
-    tyre_response = tyre_model.generate_content(problem)
-    return tyre_response.text
-def ask_damper_specialist(problem: str, setup=None):
-    """Konsultiert den Daempfer-Spezialisten bei Problemen mit den Daempfern eines Fahrzeugs."""
-    _damper_prompt_path = "src/assets/prompts/dampers_prompt.txt"
-    with open(_damper_prompt_path, "r", encoding="utf-8") as _damper_prompt:
-        damper_prompt = _damper_prompt.read()
-
-    damper_model = genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=damper_prompt)
-
-    damper_response = damper_model.generate_content(problem)
-    return damper_response.text
-def ask_electronics_specialist(problem: str, setup=None):
-    """Konsultiert den Daempfer-Spezialisten bei Problemen mit den Daempfern eines Fahrzeugs."""
-    _electronics_prompt_path = "src/assets/prompts/electronics_prompt.txt"
-    with open(_electronics_prompt_path, "r", encoding="utf-8") as _electronics_prompt:
-        electronics_prompt = _electronics_prompt.read()
-
-    electronics_model= genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=electronics_prompt)
-
-    electronics_response = electronics_model.generate_content(problem)
-    return electronics_response.text
+from specialists import get_registry
 
 
 class SetupManager:
     def __init__(self, setup_path=""):
-        mp_file_path = "src/assets/prompts/manager_prompt.txt"
-        with open(mp_file_path, "r", encoding="utf-8") as f:
-            self.prompt = f.read()
+        self.prompt = get_registry().prompt("manager")
 
         self.response = None
         self.acc_setup = None
+        self.tools = list(SPECIALIST_TOOLS)
 
         if setup_path:
             try:
                 self.acc_setup = ACCSetup(setup_path)
-                self.model = genai.GenerativeModel('gemini-1.5-flash-latest'
-                                              , system_instruction=self.prompt,
-                                              tools=[ask_aero_specialist,
-                                                     ask_tyre_specialist,
-                                                     ask_damper_specialist,
-                                                     ask_electronics_specialist,
-                                                     ask_mech_grip_specialist,
-                                                     self.acc_setup.get_setup,
-                                                     self.acc_setup.get_mechanical_balance,
-                                                     self.acc_setup.get_aero,
-                                                     self.acc_setup.get_tyres_and_alignment,
-                                                     self.acc_setup.get_dampers,
-                                                     self.acc_setup.get_electronics
-                                                     ]
-                                              )
-
+                self.tools += setup_tools(self.acc_setup)
             except Exception as e:
                 print(e)
                 print("Es konnte kein Setup geladen werden!")
 
-        else:
-            self.model = genai.GenerativeModel('gemini-1.5-flash-latest'
-                                              , system_instruction=self.prompt,
-                                              tools=[ask_aero_specialist,
-                                                     ask_tyre_specialist,
-                                                     ask_damper_specialist,
-                                                     ask_electronics_specialist,
-                                                     ask_mech_grip_specialist])
-
+        self._build_model()
         self.chat = self.model.start_chat()
 
-    def set_setup(self, setup:json):
-        history = self.chat.history
-        if not self.chat.history:
-            history = self.prompt
+    def _build_model(self) -> None:
+        """Baut das Manager-Modell aus self.tools und die Lookup-Tabelle name -> Funktion."""
+        self.tool_table = {tool.__name__: tool for tool in self.tools}
+        self.model = get_registry().backend.chat_model(self.prompt, self.tools)
 
+    def set_setup(self, setup:json):
         try:
             self.acc_setup = ACCSetup(setup)
-
-            self.model = genai.GenerativeModel('gemini-1.5-flash-latest'
-                                               , system_instruction=history,
-                                               tools=[ask_aero_specialist,
-                                                      ask_tyre_specialist,
-                                                      ask_damper_specialist,
-                                                      ask_electronics_specialist,
-                                                      ask_mech_grip_specialist,
-                                                      self.acc_setup.get_setup,
-                                                      self.acc_setup.get_mechanical_balance,
-                                                      self.acc_setup.get_aero,
-                                                      self.acc_setup.get_tyres_and_alignment,
-                                                      self.acc_setup.get_dampers,
-                                                      self.acc_setup.get_electronics
-                                                      ]
-                                               )
+            self.tools = SPECIALIST_TOOLS + setup_tools(self.acc_setup)
+            history = self.chat.history
+            self._build_model()
+            self.chat = self.model.start_chat(history=history)
             return True
         except Exception as e:
             print(e)
             print("Es konnte kein Setup geladen werden!")
         return False
 
-    def send_function_response(self, chat, tool_name, payload_dict):
-        pass
-
     def find_function_call(self, response):
         for part in response.candidates[0].content.parts:
             if part.function_call:
@@ -149,14 +51,8 @@ class SetupManager:
         return None
 
     def send_function_response(self, chat, tool_name, payload_dict):
-
         chat.send_message(
-            content=[genai.protos.Part(
-                function_response=genai.protos.FunctionResponse(
-                    name=tool_name,
-                    response={'result': tool_response}
-                )
-            )]
+            content=[get_registry().backend.function_response(tool_name, tool_response)]
         )
 
     def ask(self, message:str):
@@ -181,50 +77,15 @@ class SetupManager:
             print(f"-> Manager ruft auf: {tool_name}")
             tool_response = None
 
-            if tool_name == "ask_aero_specialist":
-                tool_response = ask_aero_specialist(**tool_args)
-            elif tool_name == "ask_mech_grip_specialist":
-                tool_response = ask_mech_grip_specialist(**tool_args)
-            elif tool_name == "ask_tyre_specialist":
-                tool_response = ask_tyre_specialist(**tool_args)
-            elif tool_name == "ask_damper_specialist":
-                tool_response = ask_damper_specialist(**tool_args)
-            elif tool_name == "ask_electronics_specialist":
-                tool_response = ask_electronics_specialist(**tool_args)
-
-            elif tool_name == "get_tyres_and_alignment":
-                tool_response = self.acc_setup.get_tyres_and_alignment()
-                if isinstance(tool_response, dict):
-                    tool_response = json.dumps(tool_response)
-            elif tool_name == "get_setup":
-                tool_response = self.acc_setup.get_setup()
-                if isinstance(tool_response, dict):
-                    tool_response = json.dumps(tool_response)
-            elif tool_name == "get_mechanical_grip":
-                tool_response = self.acc_setup.get_mechanical_balance()
-                if isinstance(tool_response, dict):
-                    tool_response = json.dumps(tool_response)
-            elif tool_name == "get_aero":
-                tool_response = self.acc_setup.get_aero()
-                if isinstance(tool_response, dict):
-                    tool_response = json.dumps(tool_response)
-            elif tool_name == "get_dampers":
-                tool_response = self.acc_setup.get_dampers()
-                if isinstance(tool_response, dict):
-                    tool_response = json.dumps(tool_response)
-            elif tool_name == "get_electronics":
-                tool_response = self.acc_setup.get_electronics()
+            tool = self.tool_table.get(tool_name)
+            if tool is not None:
+                tool_response = tool(**tool_args)
                 if isinstance(tool_response, dict):
                     tool_response = json.dumps(tool_response)
 
             if tool_response:
                 final_response = self.chat.send_message(
-                    content=[genai.protos.Part(
-                        function_response=genai.protos.FunctionResponse(
-                            name=tool_name,
-                            response={'result': tool_response}
-                        )
-                    )]
+                    content=[get_registry().backend.function_response(tool_name, tool_response)]
                 )
                 response = final_response
                 func_calls += 1
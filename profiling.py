@@ -0,0 +1,143 @@
+"""Stage timing for the pipeline and the LLM calls.
+
+Disabled by default (PROFILING=1 or profiling.enable() switches it on). While disabled span() returns a shared
+no-op object, so instrumented code pays one function call and one flag check per span.
+
+    with span("loader.read_csv", file=str(path)):
+        df = pd.read_csv(path)
+
+Every finished span is written as one JSON record (stage, duration_ms and the given fields) to logs/profiling.log.
+run() groups the spans of one coaching run and logs count, total, p50 and p95 per stage when the run ends.
+"""
+import functools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from logger import get_logger
+
+log = get_logger("profiling", to_console=False, log_file="logs/profiling.log", json_file=True, queued=True)
+
+_enabled = os.getenv("PROFILING", "0") == "1"
+_lock = threading.Lock()
+_durations: dict[str, list[float]] = {}
+
+
+def enable(enabled: bool = True) -> None:
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def record(stage: str, seconds: float, **fields) -> None:
+    """Books one duration of a stage and emits it as a structured log record."""
+    with _lock:
+        _durations.setdefault(stage, []).append(seconds)
+    log.info("span", extra={"fields": {"stage": stage, "duration_ms": round(seconds * 1000, 3), **fields}})
+
+
+class _Span:
+    __slots__ = ("stage", "fields", "started")
+
+    def __init__(self, stage: str, fields: dict):
+        self.stage = stage
+        self.fields = fields
+        self.started = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        record(self.stage, time.perf_counter() - self.started, **self.fields)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(stage: str, **fields):
+    """Context manager that times the enclosed block as one call of 'stage'."""
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(stage, fields)
+
+
+def timed(stage: str | None = None):
+    """Decorator version of span(), the stage defaults to the qualified name of the function."""
+    def decorator(func):
+        name = stage or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _percentile(sorted_values: list[float], share: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(math.ceil(share * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summary() -> dict[str, dict[str, float]]:
+    """count, total_ms, p50_ms and p95_ms per stage since the last reset()."""
+    with _lock:
+        durations = {stage: sorted(values) for stage, values in _durations.items()}
+    return {
+        stage: {
+            "count": len(values),
+            "total_ms": round(sum(values) * 1000, 3),
+            "p50_ms": round(_percentile(values, 0.50) * 1000, 3),
+            "p95_ms": round(_percentile(values, 0.95) * 1000, 3),
+        }
+        for stage, values in durations.items()
+    }
+
+
+def reset() -> None:
+    with _lock:
+        _durations.clear()
+
+
+def log_summary(run_name: str = "") -> dict[str, dict[str, float]]:
+    """Logs one record per stage with the summary of the current run and returns it."""
+    stats = summary()
+    for stage, values in stats.items():
+        log.info("summary", extra={"fields": {"run": run_name, "stage": stage, **values}})
+    return stats
+
+
+@contextmanager
+def run(run_name: str):
+    """One coaching run: starts with empty timings and logs the summary when it ends."""
+    if not _enabled:
+        yield
+        return
+    reset()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(f"run.{run_name}", time.perf_counter() - started)
+        log_summary(run_name)
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from logger import get_logger
+
+log = get_logger("response_cache", to_console=False)
+
+# Bump this whenever the key or the stored answer changes, old databases are then emptied.
+SCHEMA_VERSION = 1
+
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_TTL_S = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,
+    specialist  TEXT NOT NULL,
+    response    TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    used_at     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_responses_used_at ON responses (used_at);
+"""
+
+
+def normalize_problem(problem: str) -> str:
+    """Case and whitespace do not change the question."""
+    return " ".join(str(problem).lower().split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def setup_hash(setup: dict | None) -> str:
+    """Hash of the ACCSetup.get_setup() output, independent of the key order."""
+    if not setup:
+        return ""
+    return text_hash(json.dumps(setup, sort_keys=True, default=str))
+
+
+class ResponseCache:
+    def __init__(self, db_path: Path | str, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_s: float = DEFAULT_TTL_S):
+        """SQLite-backed LRU cache with TTL for specialist answers, survives restarts.
+
+        An entry expires ttl_s seconds after it was stored. When more than max_entries answers are stored, the
+        ones that were used the longest time ago are removed. The connection is shared by the tool threads of the
+        SetupManager and guarded by a lock.
+
+        :param db_path: database file, ":memory:" for a cache that lives as long as the process
+        :param max_entries: maximal number of stored answers
+        :param ttl_s: lifetime of an answer in seconds
+        """
+        self.db_path = str(db_path)
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        if self.db_path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        self._migrate()
+
+    def _migrate(self) -> None:
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            log.info(f"response cache schema v{version} is outdated, rebuilding as v{SCHEMA_VERSION}")
+            with self.conn:
+                self.conn.execute("DROP TABLE IF EXISTS responses")
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def key_for(specialist: str, problem: str, prompt_hash: str, setup_key: str = "") -> str:
+        """
+        :param specialist: name of the specialist
+        :param problem: question as the manager asked it, it is normalized here
+        :param prompt_hash: hash of the system instruction (prompt file content)
+        :param setup_key: setup_hash() of the setup the manager works on
+        :return: hex sha256 digest
+        """
+        return text_hash("\0".join((f"v{SCHEMA_VERSION}", specialist, normalize_problem(problem),
+                                    prompt_hash, setup_key)))
+
+    def get(self, key: str) -> str | None:
+        """The stored answer or None on a miss. Expired answers count as a miss and are removed."""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with self.conn:
+                if now - row[1] > self.ttl_s:
+                    self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.misses += 1
+                    return None
+                self.conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return row[0]
+
+    def put(self, key: str, specialist: str, response: str) -> None:
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, specialist, response, created_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, specialist, response, now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self.conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_s,))
+        self.conn.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def clear(self) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM responses")
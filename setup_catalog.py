@@ -0,0 +1,270 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterator
+
+from logger import get_logger
+from setup_parser import ACCSetup
+
+log = get_logger("setup_catalog", to_console=False)
+
+# Bump this whenever the tables or the flattening change, old databases are then rebuilt.
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path        TEXT PRIMARY KEY,
+    mtime_ns    INTEGER NOT NULL,
+    size        INTEGER NOT NULL,
+    car         TEXT NOT NULL,
+    indexed_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_files_car ON files (car);
+
+CREATE TABLE IF NOT EXISTS params (
+    path        TEXT NOT NULL REFERENCES files (path) ON DELETE CASCADE,
+    name        TEXT NOT NULL,
+    leaf        TEXT NOT NULL,
+    by_leaf     INTEGER NOT NULL,   -- 1: the parameter a query by its leaf name refers to (see leaf_targets)
+    value       REAL,
+    text        TEXT,
+    PRIMARY KEY (path, name)
+);
+CREATE INDEX IF NOT EXISTS ix_params_name ON params (name, value);
+CREATE INDEX IF NOT EXISTS ix_params_leaf ON params (leaf, by_leaf, value);
+"""
+
+_OPERATORS = {"=": "=", "==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">=", "≤": "<=", "≥": ">="}
+_CONDITION = re.compile(r"^\s*([\w.\[\]]+)\s*(==|!=|<=|>=|=|<|>|≤|≥)\s*(.+?)\s*$")
+
+
+def flatten(value, prefix: str = "") -> Iterator[tuple[str, object]]:
+    """Every leaf of a setup JSON as (path, value), e.g. ("advancedSetup.aeroBalance.rideHeight[0]", 0)."""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from flatten(child, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, list):
+        for idx, child in enumerate(value):
+            yield from flatten(child, f"{prefix}[{idx}]")
+    else:
+        yield prefix, value
+
+
+def _depth(name: str) -> int:
+    return name.count(".") + name.count("[")
+
+
+def leaf_targets(names: list[str]) -> set[str]:
+    """Full paths that a bare leaf name (the last part of the path) stands for.
+
+    A leaf refers to the shortest path that ends with it, e.g. "tyrePressure[0]" is basicSetup.tyres.tyrePressure[0]
+    and not the pressure of a planned pit stop (basicSetup.strategy.pitStrategy[0].tyres.tyrePressure[0]).
+    If several paths of that length end with the leaf, it is ambiguous and refers to none of them.
+    """
+    shortest: dict[str, list[str]] = {}
+    for name in names:
+        leaf = name.rsplit(".", 1)[-1]
+        best = shortest.get(leaf)
+        if best is None or _depth(name) < _depth(best[0]):
+            shortest[leaf] = [name]
+        elif _depth(name) == _depth(best[0]):
+            best.append(name)
+    return {paths[0] for paths in shortest.values() if len(paths) == 1}
+
+
+def parse_condition(condition: str) -> tuple[str, str, float | str]:
+    """'rearWing >= 5' -> ("rearWing", ">=", 5.0). Values that are no number are compared as text."""
+    match = _CONDITION.match(condition)
+    if match is None:
+        raise ValueError(f"invalid condition: {condition!r}, expected e.g. 'rearWing >= 5'")
+    name, operator, value = match.groups()
+    try:
+        return name, _OPERATORS[operator], float(value)
+    except ValueError:
+        return name, _OPERATORS[operator], value.strip("'\"")
+
+
+class SetupCatalog:
+    def __init__(self, db_path: Path | str):
+        """Persistent index over folders of ACC setup files.
+
+        scan() reads every *.json below a folder once and stores carName and every parameter of the file (flattened
+        to dotted paths). Later scans only parse files whose mtime or size changed and drop files that are gone,
+        queries are answered from the index without opening any setup.
+
+        :param db_path: database file, ":memory:" for a throwaway index
+        """
+        self.db_path = str(db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if self.db_path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        self._migrate()
+
+    def _migrate(self) -> None:
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            log.info(f"setup catalog schema v{version} is outdated, rebuilding as v{SCHEMA_VERSION}")
+            with self.conn:
+                for table in ("params", "files"):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "SetupCatalog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def _index_file(self, path: str, stat: os.stat_result) -> bool:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                setup = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"{path} could not be read, skipping it: {e}")
+            return False
+        if not isinstance(setup, dict) or "carName" not in setup:
+            log.debug(f"{path} is no ACC setup, skipping it")
+            return False
+
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        self.conn.execute(
+            "INSERT INTO files (path, mtime_ns, size, car, indexed_at) VALUES (?, ?, ?, ?, ?)",
+            (path, stat.st_mtime_ns, stat.st_size, str(setup["carName"]), time.time())
+        )
+        params = list(flatten(setup))
+        targets = leaf_targets([name for name, _ in params])
+        rows = []
+        for name, value in params:
+            leaf = name.rsplit(".", 1)[-1]
+            by_leaf = int(name in targets)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                rows.append((path, name, leaf, by_leaf, float(value), None))
+            else:
+                rows.append((path, name, leaf, by_leaf, None, None if value is None else str(value)))
+        self.conn.executemany("INSERT INTO params (path, name, leaf, by_leaf, value, text) VALUES (?, ?, ?, ?, ?, ?)",
+                              rows)
+        return True
+
+    def scan(self, root: Path | str) -> dict[str, int]:
+        """Brings the index of all setups below root up to date.
+
+        :return: number of added, updated, unchanged, removed and skipped (unreadable or no setup) files
+        """
+        root = Path(root).resolve()
+        known = {
+            row["path"]: (row["mtime_ns"], row["size"])
+            for row in self.conn.execute("SELECT path, mtime_ns, size FROM files WHERE path LIKE ? ESCAPE '\\'",
+                                         (_like_prefix(str(root) + os.sep),))
+        }
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "skipped": 0}
+
+        with self.conn:
+            for file_path in root.rglob("*.json"):
+                path = str(file_path)
+                stat = file_path.stat()
+                before = known.pop(path, None)
+                if before == (stat.st_mtime_ns, stat.st_size):
+                    counts["unchanged"] += 1
+                elif self._index_file(path, stat):
+                    counts["added" if before is None else "updated"] += 1
+                else:
+                    if before is not None:
+                        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                    counts["skipped"] += 1
+
+            self.conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in known])
+            counts["removed"] = len(known)
+
+        log.info(f"scanned {root}: {counts}")
+        return counts
+
+    def query(self, car: str | None = None, *conditions: str) -> list[str]:
+        """Paths of all setups of a car (any car if None) that meet every condition.
+
+        A condition compares one parameter with a value, e.g. "rearWing >= 5" or
+        "advancedSetup.mechanicalBalance.brakeBias < 50". The parameter is either the full dotted path or its
+        last part. A last part stands for the shortest path that ends with it (see leaf_targets), so
+        "tyrePressure[0]" is the running pressure of basicSetup.tyres and not one of the pit stop pressures.
+        Use the full path for the others.
+
+        :raises ValueError: for a last part that ends several paths of the same length
+        """
+        sql = ["SELECT path FROM files WHERE 1 = 1"]
+        params: list = []
+        if car is not None:
+            sql.append("AND car = ?")
+            params.append(car)
+
+        for condition in conditions:
+            name, operator, value = parse_condition(condition)
+            column = "value" if isinstance(value, float) else "text"
+            if "." in name:
+                sql.append(f"AND path IN (SELECT path FROM params WHERE name = ? AND {column} {operator} ?)")
+            else:
+                self._check_leaf(name)
+                sql.append(f"AND path IN (SELECT path FROM params WHERE leaf = ? AND by_leaf = 1 "
+                           f"AND {column} {operator} ?)")
+            params += [name, value]
+
+        sql.append("ORDER BY path")
+        return [row["path"] for row in self.conn.execute(" ".join(sql), params)]
+
+    def _check_leaf(self, leaf: str) -> None:
+        # a file that has the leaf but no by_leaf row for it has several paths of the same length ending with it
+        row = self.conn.execute(
+            "SELECT name FROM params WHERE leaf = ? AND by_leaf = 0 AND NOT EXISTS "
+            "(SELECT 1 FROM params AS p WHERE p.path = params.path AND p.leaf = ? AND p.by_leaf = 1) LIMIT 1",
+            (leaf, leaf)
+        ).fetchone()
+        if row is not None:
+            raise ValueError(f"'{leaf}' is ambiguous (e.g. {row['name']}), use the full path")
+
+    def cars(self) -> dict[str, int]:
+        """Number of indexed setups per car."""
+        rows = self.conn.execute("SELECT car, COUNT(*) AS n FROM files GROUP BY car ORDER BY car")
+        return {row["car"]: row["n"] for row in rows}
+
+    def params(self, path: str) -> dict[str, float | str | None]:
+        """All indexed parameters of one setup, read from the index."""
+        rows = self.conn.execute("SELECT name, value, text FROM params WHERE path = ? ORDER BY rowid",
+                                 (str(Path(path).resolve()),))
+        return {row["name"]: row["value"] if row["text"] is None else row["text"] for row in rows}
+
+    @staticmethod
+    def open(path: str) -> ACCSetup:
+        """The setup file as ACCSetup, e.g. for SetupManager.set_setup()."""
+        return ACCSetup(path)
+
+
+def _like_prefix(prefix: str) -> str:
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indexes ACC setup files and searches them.")
+    parser.add_argument("root", type=Path, help="folder with setup JSON files, scanned recursively")
+    parser.add_argument("--db", type=Path, default=Path(".cache/setup_catalog.sqlite"))
+    parser.add_argument("--car", help="e.g. ferrari_296_gt3")
+    parser.add_argument("--where", action="append", default=[], help="e.g. 'rearWing >= 5', may be repeated")
+    args = parser.parse_args()
+
+    args.db.parent.mkdir(parents=True, exist_ok=True)
+    with SetupCatalog(args.db) as catalog:
+        print(catalog.scan(args.root))
+        for setup_path in catalog.query(args.car, *args.where):
+            print(setup_path)
@@ -2,10 +2,6 @@ import json
 
 setup_path = "src/assets/setups/placeholder_setup.json"
 
-with open(setup_path, "r") as _setup:
-    setup = json.load(_setup)
-    print(setup)
-
 class ACCSetup:
     def __init__(self, setup_file=setup_path):
         """Can be seen as a parser for ACC-Setup Files."""
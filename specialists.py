@@ -0,0 +1,277 @@
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable
+
+from logger import get_logger
+from response_cache import ResponseCache, text_hash
+
+log = get_logger("specialists", to_console=False)
+
+PROMPT_DIR = Path("src/assets/prompts")
+MODEL_NAME = "gemini-1.5-flash-latest"
+RESPONSE_CACHE_PATH = ".cache/specialist_responses.sqlite"
+
+# setup_hash() of the setup the current tool call works on, set by the SetupManager per tool call
+_active_setup: ContextVar[str] = ContextVar("active_setup", default="")
+
+
+_genai = None
+_genai_lock = threading.Lock()
+
+
+def load_genai():
+    """Imports and configures the Gemini SDK on first use, the API key is read from .env at that point."""
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import dotenv
+            import google.generativeai as genai
+
+            genai.configure(api_key=dotenv.get_key(".env", "GEMINI_API_KEY"))
+            _genai = genai
+    return _genai
+
+
+@dataclass(frozen=True)
+class Specialist:
+    name: str
+    prompt_file: str
+    with_setup: bool = False        # the setup is appended to the system instruction
+
+
+SPECIALISTS = {
+    s.name: s for s in (
+        Specialist("aero", "aero_prompt.txt", with_setup=True),
+        Specialist("mech_grip", "mechanical_grip.txt"),
+        Specialist("tyre", "tyres_prompt.txt"),
+        Specialist("damper", "dampers_prompt.txt"),
+        Specialist("electronics", "electronics_prompt.txt"),
+        Specialist("manager", "manager_prompt.txt"),
+    )
+}
+
+
+@contextmanager
+def using_setup(setup_key: str):
+    """Specialist answers inside the block are cached for this setup (see response_cache.setup_hash)."""
+    token = _active_setup.set(setup_key)
+    try:
+        yield
+    finally:
+        _active_setup.reset(token)
+
+
+class GeminiBackend:
+    def __init__(self, model_name: str = MODEL_NAME):
+        """Answers with the Gemini API. Every specialist keeps its GenerativeModel, it is only rebuilt when the
+        system instruction changes."""
+        self.genai = load_genai()
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._models: dict[str, tuple[str, object]] = {}      # name -> (hash of the system instruction, model)
+
+    def model(self, name: str, system_instruction: str):
+        key = text_hash(system_instruction)
+        cached = self._models.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        with self._lock:
+            cached = self._models.get(name)
+            if cached is None or cached[0] != key:
+                cached = (key, self.genai.GenerativeModel(self.model_name, system_instruction=system_instruction))
+                self._models[name] = cached
+        return cached[1]
+
+    def generate(self, name: str, system_instruction: str, problem: str) -> str:
+        return self.model(name, system_instruction).generate_content(problem).text
+
+    def chat_model(self, system_instruction: str, tools: list):
+        """Model of the manager with function calling, SetupManager starts its chat on it."""
+        return self.genai.GenerativeModel(self.model_name, system_instruction=system_instruction, tools=tools)
+
+    def function_response(self, name: str, result: str):
+        """Part that hands the result of a function_call back to the manager."""
+        return self.genai.protos.Part(
+            function_response=self.genai.protos.FunctionResponse(name=name, response={"result": result})
+        )
+
+
+@dataclass
+class StubFunctionCall:
+    name: str
+    args: dict
+
+
+@dataclass
+class StubPart:
+    """The fields of a Gemini part that SetupManager reads."""
+    text: str = ""
+    function_call: StubFunctionCall | None = None
+    function_response: dict | None = None      # {"name": tool name, "response": {"result": text}}
+
+
+class StubResponse:
+    def __init__(self, parts: list[StubPart]):
+        """Manager turn of the stub, shaped like a Gemini response (candidates[0].content.parts, text).
+        Streamed, it is its own single chunk."""
+        self.candidates = [SimpleNamespace(content=SimpleNamespace(parts=parts))]
+
+    @property
+    def text(self) -> str:
+        return "".join(part.text for part in self.candidates[0].content.parts)
+
+    def __iter__(self):
+        yield self
+
+
+def echo_manager(content, history: list) -> str:
+    """Default turn of the stub manager: repeats the message, or the tool results it got back."""
+    if isinstance(content, str):
+        return f"[manager] {content}"
+    return "\n".join(part.function_response["response"]["result"] for part in content)
+
+
+class StubChat:
+    def __init__(self, turn: Callable, history: list | None = None):
+        self.turn = turn
+        self.history = list(history or [])      # (role, content) of every message
+
+    def send_message(self, content, stream: bool = False) -> StubResponse:
+        reply = self.turn(content, self.history)
+        parts = [StubPart(text=reply)] if isinstance(reply, str) else list(reply)
+        self.history += [("user", content), ("model", parts)]
+        return StubResponse(parts)
+
+
+class StubChatModel:
+    def __init__(self, turn: Callable, system_instruction: str, tools: list):
+        self.turn = turn
+        self.system_instruction = system_instruction
+        self.tools = tools
+
+    def start_chat(self, history: list | None = None) -> StubChat:
+        return StubChat(self.turn, history)
+
+
+class StubBackend:
+    def __init__(self, answer: Callable[[str, str, str], str] | None = None, manager: Callable | None = None):
+        """Local backend without network access, for the specialists and the manager turns of SetupManager.
+        Runs the whole tool loop offline, e.g. in tests or with LLM_BACKEND=stub.
+
+        :param answer: answer(name, system_instruction, problem) -> text, defaults to echoing name and problem
+        :param manager: manager(content, history) -> text or list of StubPart (e.g. with a StubFunctionCall),
+                        one manager turn. content is the message or the list of function_response parts.
+                        Defaults to echo_manager.
+        """
+        self.answer = answer
+        self.manager = manager if manager is not None else echo_manager
+        self.calls: list[tuple[str, str]] = []      # (name, problem) of every generate call
+
+    def generate(self, name: str, system_instruction: str, problem: str) -> str:
+        self.calls.append((name, problem))
+        if self.answer is not None:
+            return self.answer(name, system_instruction, problem)
+        return f"[{name}] {problem}"
+
+    def chat_model(self, system_instruction: str, tools: list) -> StubChatModel:
+        return StubChatModel(self.manager, system_instruction, tools)
+
+    def function_response(self, name: str, result: str) -> StubPart:
+        return StubPart(function_response={"name": name, "response": {"result": result}})
+
+
+BACKENDS = {
+    "gemini": GeminiBackend,
+    "stub": StubBackend,
+}
+
+
+class SpecialistRegistry:
+    def __init__(self, prompt_dir: Path = PROMPT_DIR, backend=None, cache: ResponseCache | None = None,
+                 watch: bool = False):
+        """Loads the prompts of all specialists once and routes their questions to one backend.
+
+        :param prompt_dir: folder of the prompt files
+        :param backend: object with generate(name, system_instruction, problem) -> str, and chat_model() /
+                        function_response() for the manager of SetupManager, defaults to GeminiBackend
+        :param cache: optional response cache in front of the backend
+        :param watch: check the modification time of a prompt file on every use and reload it when it changed
+        """
+        self.prompt_dir = Path(prompt_dir)
+        self.backend = backend if backend is not None else GeminiBackend()
+        self.cache = cache
+        self.watch = watch
+        self._lock = threading.Lock()
+        self._prompts: dict[str, tuple[int, str]] = {}      # name -> (mtime_ns, text)
+
+        for name in SPECIALISTS:
+            self._load_prompt(name)
+
+    def _load_prompt(self, name: str) -> tuple[int, str]:
+        path = self.prompt_dir / SPECIALISTS[name].prompt_file
+        mtime = path.stat().st_mtime_ns
+        with open(path, "r", encoding="utf-8") as f:
+            entry = (mtime, f.read())
+        self._prompts[name] = entry
+        log.info(f"prompt '{name}' loaded from {path}")
+        return entry
+
+    def prompt(self, name: str) -> str:
+        """Current prompt text of a specialist."""
+        entry = self._prompts[name]
+        if self.watch:
+            path = self.prompt_dir / SPECIALISTS[name].prompt_file
+            if path.stat().st_mtime_ns != entry[0]:
+                with self._lock:
+                    entry = self._load_prompt(name)
+        return entry[1]
+
+    def system_instruction(self, name: str, setup=None) -> str:
+        prompt = self.prompt(name)
+        if SPECIALISTS[name].with_setup:
+            prompt += "\n\n"
+            prompt += (f"Setup:\n"
+                       f" {setup}")
+        return prompt
+
+    def ask(self, name: str, problem: str, setup=None) -> str:
+        """Consults one specialist and returns its answer, from the cache if the same question was asked before
+        with the same prompt about the same setup."""
+        system_instruction = self.system_instruction(name, setup)
+        if self.cache is None:
+            return self.backend.generate(name, system_instruction, problem)
+
+        key = ResponseCache.key_for(name, problem, text_hash(system_instruction), _active_setup.get())
+        answer = self.cache.get(key)
+        if answer is not None:
+            log.debug(f"cache hit: {name}")
+            return answer
+
+        answer = self.backend.generate(name, system_instruction, problem)
+        self.cache.put(key, name, answer)
+        return answer
+
+
+_registry: SpecialistRegistry | None = None
+
+
+def get_registry() -> SpecialistRegistry:
+    """The registry of the process, created on first use.
+
+    PROMPT_RELOAD=1 turns on the prompt file watch, LLM_BACKEND picks the backend of the specialists and the manager (gemini, stub)
+    and RESPONSE_CACHE the cache database (empty: no cache).
+    """
+    global _registry
+    if _registry is None:
+        backend = BACKENDS[os.getenv("LLM_BACKEND", "gemini")]()
+        cache_path = os.getenv("RESPONSE_CACHE", RESPONSE_CACHE_PATH)
+        _registry = SpecialistRegistry(backend=backend,
+                                       cache=ResponseCache(cache_path) if cache_path else None,
+                                       watch=os.getenv("PROMPT_RELOAD", "0") == "1")
+    return _registry
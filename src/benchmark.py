@@ -0,0 +1,205 @@
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator
+
+import numpy as np
+import pandas as pd
+from lap_telemetry import LapTelemetry
+from motec_csv_practice import TelemetryLoader
+from synthetic_motec import SyntheticLapGenerator, load_bundled_laps, write_motec_csv
+from telemetry_analyzer import Analyze
+from track_model import TrackModel, map_paths
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+
+SESSION_SIZES = (1, 100, 10_000)
+TRACK = "spa"
+
+
+@dataclass(frozen=True)
+class StageResult:
+    session: str
+    stage: str
+    laps: int
+    rows: int
+    seconds: float
+    laps_per_s: float
+    rows_per_s: float
+    peak_mem_mb: float          # tracemalloc peak of one call of the stage
+
+
+def _measure(session: str, stage: str, items: list, fn: Callable[[object], int], n_laps: int) -> StageResult:
+    """Runs fn for n_laps items (cycling through items). fn returns the number of rows it processed.
+    Timing and memory are measured in separate passes, tracemalloc would distort the timing."""
+    rows = 0
+    started = time.perf_counter()
+    for lap_no in range(n_laps):
+        rows += fn(items[lap_no % len(items)])
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn(items[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return StageResult(
+        session=session,
+        stage=stage,
+        laps=n_laps,
+        rows=rows,
+        seconds=round(seconds, 6),
+        laps_per_s=round(n_laps / seconds, 3) if seconds else float("inf"),
+        rows_per_s=round(rows / seconds, 1) if seconds else float("inf"),
+        peak_mem_mb=round(peak / 2 ** 20, 3)
+    )
+
+
+def run_session(session: str, laps: Iterator[pd.DataFrame], n_laps: int, work_dir: Path,
+                pool_size: int = 20) -> list[StageResult]:
+    """Times every pipeline stage on a session of n_laps laps.
+
+    Only pool_size distinct laps are generated, written and kept in memory, the stages cycle through them, so sessions
+    of any size fit into memory and onto disk.
+    """
+    base_dir = work_dir / session
+    track_dir = base_dir / "assets" / "MoTec" / TRACK
+    track_dir.mkdir(parents=True, exist_ok=True)
+    for map_file in map_paths(SRC_DIR, TRACK):
+        shutil.copy(map_file, track_dir / map_file.name)
+
+    files = []
+    for lap_no, lap_df in zip(range(min(pool_size, n_laps)), laps):
+        file_name = f"assets/MoTec/{TRACK}/lap_{lap_no:05d}.csv"
+        write_motec_csv(lap_df, base_dir / file_name, venue=TRACK)
+        files.append(file_name)
+
+    loader = TelemetryLoader(base_dir)
+    track_model = TrackModel.for_track(base_dir, TRACK)
+    raw_laps = [loader._read_motec_csv(base_dir / f) for f in files]
+    resampled = [loader.telemetry_from_csv(f, TRACK) for f in files]
+
+    raw_rows = {f: len(raw_df) for f, raw_df in zip(files, raw_laps)}
+
+    def load_csv(file_name):
+        loader.telemetry_from_csv(file_name, TRACK)
+        return raw_rows[file_name]
+
+    def resample(raw_df):
+        TelemetryLoader._resample_df(raw_df)
+        return len(raw_df)
+
+    def load_map(_):
+        TrackModel.clear_cache()
+        TrackModel.for_track(base_dir, TRACK)
+        return 0
+
+    def analyze_corners(lap_df):
+        analyze = Analyze(lap_df)
+        for corner in track_model.corners.values():
+            analyze.corner(analyze._get_df_from_corner(corner), corner)
+        return len(lap_df)
+
+    boundaries = [(s.start_m, s.end_m) for s in track_model.segments.values()] + \
+                 [(c.start_m, c.end_m) for c in track_model.corners.values()]
+
+    # rows of this stage are lookups
+    def time_deltas(analyze):
+        for start_m, end_m in boundaries:
+            analyze.get_time_delta(start_m, end_m)
+        return len(boundaries)
+
+    def all_segments(lap_df):
+        LapTelemetry(lap_df, track_model).get_all_segments()
+        return len(lap_df)
+
+    results = [
+        _measure(session, "TelemetryLoader.telemetry_from_csv", files, load_csv, n_laps),
+        _measure(session, "TelemetryLoader._resample_df", raw_laps, resample, n_laps),
+        _measure(session, "TrackModel.for_track (cold)", [None], load_map, n_laps),
+        _measure(session, "Analyze.corner", resampled, analyze_corners, n_laps),
+        _measure(session, "Analyze.get_time_delta", [Analyze(df) for df in resampled], time_deltas, n_laps),
+        _measure(session, "LapTelemetry.get_all_segments", resampled, all_segments, n_laps),
+    ]
+    shutil.rmtree(base_dir, ignore_errors=True)
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_benchmarks(sizes=SESSION_SIZES, pool_size: int = 20) -> dict:
+    """Runs the bundled Spa laps and one synthetic session per size.
+
+    :return: {"meta": {...}, "results": [StageResult as dict, ...]}
+    """
+    base_laps = load_bundled_laps()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="lap_bench_") as work_dir:
+        work_dir = Path(work_dir)
+        results += run_session("bundled", iter(base_laps), len(base_laps), work_dir, pool_size)
+        for n_laps in sizes:
+            generator = SyntheticLapGenerator(base_laps, seed=n_laps)
+            results += run_session(f"synthetic_{n_laps}", generator.laps(n_laps), n_laps, work_dir, pool_size)
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+        },
+        "results": [asdict(result) for result in results],
+    }
+
+
+def compare(report: dict, baseline: dict) -> list[str]:
+    """One line per stage and session: laps/s of the report relative to the baseline."""
+    old = {(r["session"], r["stage"]): r for r in baseline["results"]}
+    lines = []
+    for result in report["results"]:
+        before = old.get((result["session"], result["stage"]))
+        if before is None or not before["laps_per_s"]:
+            continue
+        ratio = result["laps_per_s"] / before["laps_per_s"]
+        lines.append(f"{result['session']:>18} | {result['stage']:<36} | {ratio:6.2f}x laps/s "
+                     f"| peak {before['peak_mem_mb']:.1f} -> {result['peak_mem_mb']:.1f} MB")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Times the loader -> analyzer pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(SESSION_SIZES),
+                        help="number of laps of the synthetic sessions")
+    parser.add_argument("--pool", type=int, default=20, help="distinct laps written per session")
+    parser.add_argument("--output", type=Path, help="write the JSON report to this file")
+    parser.add_argument("--baseline", type=Path, help="JSON report of an earlier run to compare with")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.pool)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        for line in compare(report, json.loads(args.baseline.read_text(encoding="utf-8"))):
+            print(line, file=sys.stderr)
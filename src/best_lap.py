@@ -0,0 +1,147 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from distance_index import DistanceIndex
+from resampling import DistanceResampler
+from track_model import TrackModel
+
+# tolerance in meters for a lap to count as covering a segment boundary
+COVERAGE_TOLERANCE_M = 5.0
+
+
+@dataclass(frozen=True)
+class TheoreticalBestLap:
+    lap_time_s: float               # sum of the best segment times
+    segments: pd.DataFrame          # segment_id, name, best_time_s, source_lap, median_time_s, gain_s
+    reference: pd.DataFrame         # spliced lap: Distance, Time, channels, segment_id, corner_id, source_lap
+
+
+def _boundaries(track_model: TrackModel) -> tuple[np.ndarray, np.ndarray]:
+    segments = list(track_model.segments.values())
+    return (np.array([s.start_m for s in segments], dtype=np.float64),
+            np.array([s.end_m for s in segments], dtype=np.float64))
+
+
+def segment_time_matrix(laps: list[pd.DataFrame], track_model: TrackModel) -> np.ndarray:
+    """Time of every lap in every segment.
+
+    One vectorized time lookup per lap reads all segment boundaries at once. Segments a lap does not fully
+    cover (out laps, laps cut by the stint reader) are NaN.
+
+    :param laps: resampled laps
+    :param track_model: compiled map of the track
+    :return: (laps x segments) matrix in seconds, columns in the order of track_model.segments
+    """
+    start_m, end_m = _boundaries(track_model)
+    times = np.full((len(laps), len(start_m)), np.nan, dtype=np.float64)
+
+    for row, lap_df in enumerate(laps):
+        distance = lap_df["Distance"].to_numpy(dtype=np.float64)
+        index = DistanceIndex(distance, lap_df["Time"])
+        covered = (start_m >= distance[0] - COVERAGE_TOLERANCE_M) & (end_m <= distance[-1] + COVERAGE_TOLERANCE_M)
+        times[row] = np.where(covered, index.time_delta(start_m, end_m), np.nan)
+
+    return times
+
+
+def best_segments(times: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Best time per segment and the row (lap) it came from.
+
+    :param times: (laps x segments) matrix, e.g. from segment_time_matrix() or MetricsStore.segment_times()
+    :return: best_time_s per segment, source row per segment
+    """
+    times = np.asarray(times, dtype=np.float64)
+    if times.ndim != 2 or times.shape[0] == 0:
+        raise ValueError("Need a (laps x segments) matrix with at least one lap.")
+    missing = np.isnan(times).all(axis=0)
+    if missing.any():
+        raise ValueError(f"No lap covers the segment(s) at column {np.flatnonzero(missing).tolist()}.")
+
+    source = np.nanargmin(times, axis=0)
+    return times[source, np.arange(times.shape[1])], source
+
+
+def splice_reference(laps: list[pd.DataFrame], source: np.ndarray, track_model: TrackModel,
+                     step: float = 1.0) -> pd.DataFrame:
+    """Builds a virtual lap that drives every segment like its source lap.
+
+    All channels are taken from the source lap of each segment. The clock restarts at the segment start and is
+    carried over from segment to segment, so the result works as a reference lap for lap_compare.compare_laps().
+
+    :param laps: resampled laps
+    :param source: index into laps per segment, see best_segments()
+    :param track_model: compiled map of the track
+    :param step: grid step in meters
+    :return: DataFrame with Distance, Time, the shared channels of the source laps, segment_id, corner_id, source_lap
+    """
+    start_m, end_m = _boundaries(track_model)
+    used = np.unique(source)
+
+    skip = {"Distance", "Time", "segment_id", "corner_id"}
+    channels = [c for c in laps[used[0]].columns
+                if c not in skip and pd.api.types.is_numeric_dtype(laps[used[0]][c])
+                and all(c in laps[lap_no].columns for lap_no in used)]
+
+    grid = np.arange(start_m[0], end_m[-1] + step / 2, step)
+    # a boundary meter belongs to the segment that starts there
+    column = np.clip(np.searchsorted(start_m, grid, side="right") - 1, 0, len(start_m) - 1)
+
+    time = np.empty_like(grid)
+    values = np.empty((len(grid), len(channels)), dtype=np.float64)
+    segment_time = np.empty(len(start_m), dtype=np.float64)
+
+    # every source lap is read once for all segments it contributes
+    for lap_no in used:
+        lap_df = laps[lap_no]
+        distance = lap_df["Distance"].to_numpy(dtype=np.float64)
+        index = DistanceIndex(distance, lap_df["Time"])
+        columns = np.flatnonzero(source == lap_no)
+        rows = np.isin(column, columns)
+
+        segment_start_time = index.time_at(start_m[columns])
+        segment_time[columns] = index.time_at(end_m[columns]) - segment_start_time
+        entry_time = np.empty(len(start_m), dtype=np.float64)
+        entry_time[columns] = segment_start_time
+
+        time[rows] = index.time_at(grid[rows]) - entry_time[column[rows]]
+        values[rows] = DistanceResampler(distance, grid[rows]).apply(lap_df[channels].to_numpy(dtype=np.float64))
+
+    offsets = np.concatenate(([0.0], np.cumsum(segment_time)[:-1]))
+    reference = pd.concat([
+        pd.DataFrame({"Distance": grid, "Time": time + offsets[column]}),
+        pd.DataFrame(values, columns=channels)
+    ], axis=1)
+    reference = track_model.apply(reference)
+    reference["source_lap"] = source[column]
+    return reference
+
+
+def theoretical_best_lap(laps: list[pd.DataFrame], track_model: TrackModel, step: float = 1.0) -> TheoreticalBestLap:
+    """Theoretical best lap of a set of laps: the best time of every segment, which lap it came from and the
+    spliced speed trace of those segments as a virtual reference lap.
+
+    :param laps: resampled laps of one track, e.g. from TelemetryLoader or StintReader
+    :param track_model: compiled map of the track
+    :param step: grid step of the spliced reference in meters
+    :return: TheoreticalBestLap
+    """
+    times = segment_time_matrix(laps, track_model)
+    best, source = best_segments(times)
+    median = np.nanmedian(times, axis=0)
+
+    segments = list(track_model.segments.values())
+    segment_table = pd.DataFrame({
+        "segment_id": [s.id for s in segments],
+        "name": [s.name for s in segments],
+        "best_time_s": best,
+        "source_lap": source,
+        "median_time_s": median,
+        "gain_s": median - best,
+    })
+
+    return TheoreticalBestLap(
+        lap_time_s=float(best.sum()),
+        segments=segment_table,
+        reference=splice_reference(laps, source, track_model, step=step)
+    )
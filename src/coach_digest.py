@@ -0,0 +1,130 @@
+import pandas as pd
+from corner_engine import CornerEngine
+from lap_compare import LapComparison, compare_laps
+from track_model import TrackModel
+
+DEFAULT_TOP_N = 5
+DEFAULT_TOKEN_BUDGET = 300
+CHARS_PER_TOKEN = 4         # rough size of a Gemini token for German/English text with numbers
+
+# CornerMetrics fields of the digest: field -> (label, unit, format of the user value and of the delta)
+DIGEST_FIELDS = {
+    "brake_point_m": ("brake point", "m", "{:.0f}", "{:+.0f}"),
+    "entry_speed_kmh": ("entry", "km/h", "{:.0f}", "{:+.0f}"),
+    "min_speed_kmh": ("min speed", "km/h", "{:.0f}", "{:+.0f}"),
+    "exit_speed_kmh": ("exit", "km/h", "{:.0f}", "{:+.0f}"),
+    "exit_throttle_init_m": ("throttle on", "m", "{:.0f}", "{:+.0f}"),
+    "tbf95_s": ("full brake", "s", "{:.2f}", "{:+.2f}"),
+    "ttf95_s": ("full throttle", "s", "{:.2f}", "{:+.2f}"),
+    "rolling_delta_s": ("coasting", "s", "{:.2f}", "{:+.2f}"),
+    "g_lat_max": ("max g lat", "G", "{:.2f}", "{:+.2f}"),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count estimate without calling the model's tokenizer."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def corner_deltas(user_df: pd.DataFrame, ref_df: pd.DataFrame, track_model: TrackModel,
+                  comparison: LapComparison | None = None) -> pd.DataFrame:
+    """Time lost and the CornerMetrics of the user lap next to their deltas to the reference lap.
+
+    :param comparison: result of compare_laps() for the same laps, computed if None
+    :return: one row per corner, sorted by time lost (largest first): corner_id, name, delta_s and for every
+             DIGEST_FIELDS field the user value and '<field>_delta' (user - reference)
+    """
+    if comparison is None:
+        comparison = compare_laps(user_df, ref_df, track_model)
+
+    fields = list(DIGEST_FIELDS)
+    user_metrics = comparison.user_corner_metrics
+    ref_metrics = comparison.ref_corner_metrics
+    if user_metrics is None or ref_metrics is None:
+        engine = CornerEngine(track_model)
+        user_metrics, ref_metrics = engine.compute(user_df), engine.compute(ref_df)
+    user_metrics = user_metrics[fields].reset_index(drop=True)
+    ref_metrics = ref_metrics[fields].reset_index(drop=True)
+
+    table = comparison.corners[["corner_id", "name", "delta_s"]].reset_index(drop=True)
+    table = pd.concat([table, user_metrics, (user_metrics - ref_metrics).add_suffix("_delta")], axis=1)
+    return table.sort_values("delta_s", ascending=False, ignore_index=True)
+
+
+def _corner_line(rank: int, row) -> str:
+    parts = [f"{rank}. {row['name']}: {row['delta_s']:+.3f} s"]
+    for field, (label, unit, value_fmt, delta_fmt) in DIGEST_FIELDS.items():
+        value, delta = row[field], row[f"{field}_delta"]
+        if pd.isna(value) or pd.isna(delta):
+            continue
+        delta_text = delta_fmt.format(delta)
+        # metrics that match the reference (at the printed precision) only cost tokens
+        if not delta_text.strip("+-0."):
+            continue
+        parts.append(f"{label} {value_fmt.format(value)} {unit} ({delta_text})")
+    return " | ".join(parts)
+
+
+def build_digest(user_df: pd.DataFrame, ref_df: pd.DataFrame, track_model: TrackModel, top_n: int = DEFAULT_TOP_N,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """Compact text of a user vs. reference lap comparison for the coach prompt.
+
+    One header line with the lap delta, then one line per corner for the top_n corners where the user loses the
+    most time. Corners are dropped from the bottom of the ranking until the digest, including the header and the
+    closing line that counts the dropped corners, fits into token_budget. The header is always kept.
+
+    :return: the digest, every delta is user - reference (positive time = user is slower)
+    """
+    comparison = compare_laps(user_df, ref_df, track_model)
+    table = corner_deltas(user_df, ref_df, track_model, comparison)
+    lost = table[table["delta_s"] > 0].head(top_n)
+
+    lines = [f"Lap delta {comparison.total_delta_s:+.3f} s vs. reference, "
+             f"{len(lost)} corner(s) with the most time lost (user value, delta to reference):"]
+    used = estimate_tokens(lines[0])
+
+    def trailer(left_out: int) -> str:
+        return f"({left_out} more corner(s) left out, token budget {token_budget})"
+
+    for rank, (_, row) in enumerate(lost.iterrows(), start=1):
+        line = _corner_line(rank, row)
+        cost = estimate_tokens(line) + 1
+        # room for the closing line stays reserved as long as corners could still be dropped after this one
+        reserved = estimate_tokens(trailer(len(lost) - rank)) + 1 if rank < len(lost) else 0
+        if used + cost + reserved > token_budget:
+            lines.append(trailer(len(lost) - rank + 1))
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+
+class LapDigest:
+    def __init__(self, user_df: pd.DataFrame, ref_df: pd.DataFrame, track_model: TrackModel,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET):
+        """Telemetry of the current session as a tool of the SetupManager.
+
+        :param user_df: resampled user lap
+        :param ref_df: resampled reference lap
+        :param track_model: compiled map of the track
+        :param token_budget: upper bound of the digest in (estimated) tokens
+        """
+        self.user_df = user_df
+        self.ref_df = ref_df
+        self.track_model = track_model
+        self.token_budget = token_budget
+        self._digests: dict[int, str] = {}
+
+    def get_lap_digest(self, top_n: int = DEFAULT_TOP_N) -> str:
+        """Returns the comparison of the driver's lap with the reference lap: the corners where the driver loses
+        the most time, each with brake point, entry, minimum and exit speed, throttle application and their
+        deltas to the reference (driver - reference).
+
+        :param top_n: number of corners
+        :return: the ranked corner digest as text
+        """
+        top_n = int(top_n)
+        if top_n not in self._digests:
+            self._digests[top_n] = build_digest(self.user_df, self.ref_df, self.track_model, top_n,
+                                                self.token_budget)
+        return self._digests[top_n]
@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+from lap_dataclasses import CORNER_METRIC_FIELDS, CornerMetrics
+from distance_index import DistanceIndex
+from track_model import TrackModel
+
+FULL_INPUT = 95             # tbf95_s / ttf95_s: pedal >= 95 %
+BRAKE_ON = 70               # brake point: first sample with BRAKE >= 70 % (same as Analyze.get_break_points)
+BRAKE_OFF = 1               # below 1 % the brake counts as released
+TRAIL_BRAKE_MAX = 15        # trail braking: 0 % < BRAKE < 15 % on the neighbouring samples
+THROTTLE_ON = 10            # exit_throttle_init_m: first sample after the apex with THROTTLE >= 10 %
+COAST_MAX = 5               # rolling: THROTTLE and BRAKE both below 5 %
+STEERING_PEAK_SHARE = 0.5   # steering_delta_s: time with |STEERANGLE| >= 50 % of the corner's peak
+BRAKE_LOOKBACK_M = 200      # brake zone starts this far before cornerStart_m
+EXIT_WINDOW_M = 100         # exit phase runs from the apex to cornerEnd_m + 100 m
+
+
+class _Spans:
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        """Row ranges [start, end) of several corners, gathered back to back into one flat array.
+
+        Corners may touch or overlap, gathering the rows (instead of slicing the lap) keeps every range
+        contiguous so that every reduction is a single np.*.reduceat over all corners.
+        """
+        self.valid = ends > starts
+        # empty ranges get one dummy row so reduceat stays aligned, their results are masked with NaN.
+        # The dummy is row 0: an empty range of a lap that ends before the corner starts at len(lap).
+        starts = np.where(self.valid, starts, 0)
+        self.lengths = np.where(self.valid, ends - starts, 1)
+        self.offsets = np.concatenate(([0], np.cumsum(self.lengths)[:-1]))
+        self.labels = np.repeat(np.arange(len(starts)), self.lengths)
+        self.rows = np.arange(self.lengths.sum()) - self.offsets[self.labels] + starts[self.labels]
+
+    def gather(self, values: np.ndarray) -> np.ndarray:
+        return values[self.rows]
+
+    def _masked(self, result: np.ndarray) -> np.ndarray:
+        return np.where(self.valid, result, np.nan)
+
+    def sum(self, values: np.ndarray) -> np.ndarray:
+        return self._masked(np.add.reduceat(values, self.offsets))
+
+    def mean(self, values: np.ndarray) -> np.ndarray:
+        return self.sum(values) / self.lengths
+
+    def max(self, values: np.ndarray) -> np.ndarray:
+        return self._masked(np.maximum.reduceat(values, self.offsets))
+
+    def min(self, values: np.ndarray) -> np.ndarray:
+        return self._masked(np.minimum.reduceat(values, self.offsets))
+
+    def first(self, values: np.ndarray) -> np.ndarray:
+        return self._masked(values[self.offsets])
+
+    def last(self, values: np.ndarray) -> np.ndarray:
+        return self._masked(values[self.offsets + self.lengths - 1])
+
+    def first_where(self, mask: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Value at the first row of every range where mask is True, NaN if there is none."""
+        positions = np.where(mask, np.arange(len(mask)), len(mask))
+        first = np.minimum.reduceat(positions, self.offsets)
+        found = self.valid & (first < len(mask))
+        return np.where(found, values[np.minimum(first, len(mask) - 1)], np.nan)
+
+    def masked_range(self, mask: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """max - min of values over the rows where mask is True, NaN if there are none."""
+        upper = np.maximum.reduceat(np.where(mask, values, -np.inf), self.offsets)
+        lower = np.minimum.reduceat(np.where(mask, values, np.inf), self.offsets)
+        return np.where(self.valid & np.isfinite(upper), upper - lower, np.nan)
+
+
+class CornerEngine:
+    def __init__(self, track_model: TrackModel):
+        """Computes the CornerMetrics of all corners of a lap in one vectorized pass.
+
+        :param track_model: compiled map of the track the laps were driven on
+        """
+        self.track_model = track_model
+        corners = list(track_model.corners.values())
+        self.corner_ids = np.array([c.id for c in corners], dtype=np.int32)
+        self.segment_ids = np.array([c.segment_id for c in corners], dtype=np.int32)
+        self.start_m = np.array([c.start_m for c in corners], dtype=np.float64)
+        self.apex_m = np.array([c.apex_m for c in corners], dtype=np.float64)
+        self.end_m = np.array([c.end_m for c in corners], dtype=np.float64)
+
+    def compute(self, lap_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        :param lap_df: resampled lap from TelemetryLoader, may be a partial lap (out-lap, end of a stint)
+        :return: one row per corner: corner_id, segment_id and every CornerMetrics field. All fields of a corner
+                 the lap does not reach (no sample between cornerStart_m and cornerEnd_m) are NaN.
+        """
+        distance = lap_df["Distance"].to_numpy(dtype=np.float64)
+        time = lap_df["Time"].to_numpy(dtype=np.float64)
+        speed = lap_df["SPEED"].to_numpy(dtype=np.float64)
+        g_lat = lap_df["G_LAT"].to_numpy(dtype=np.float64)
+        g_lon = lap_df["G_LON"].to_numpy(dtype=np.float64)
+        steer = lap_df["STEERANGLE"].to_numpy(dtype=np.float64)
+        brake = lap_df["BRAKE"].to_numpy(dtype=np.float64)
+        throttle = lap_df["THROTTLE"].to_numpy(dtype=np.float64)
+
+        # time and distance every row stands for (up to the next row)
+        dt = np.diff(time, append=time[-1] + (time[-1] - time[-2]))
+        dm = np.diff(distance, append=distance[-1] + (distance[-1] - distance[-2]))
+
+        def rows(meters: np.ndarray, side: str) -> np.ndarray:
+            return np.searchsorted(distance, meters, side=side)
+
+        corner = _Spans(rows(self.start_m, "left"), rows(self.end_m, "right"))
+        brake_zone = _Spans(rows(self.start_m - BRAKE_LOOKBACK_M, "left"), rows(self.apex_m, "right"))
+        exit_zone = _Spans(rows(self.apex_m, "left"), rows(self.end_m + EXIT_WINDOW_M, "right"))
+
+        index = DistanceIndex(distance, time)
+        m = {}
+
+        m["time_delta_s"] = index.time_delta(self.start_m, self.end_m)
+
+        # Speed Measurements
+        c_speed = corner.gather(speed)
+        c_distance = corner.gather(distance)
+        m["entry_speed_kmh"] = corner.first(c_speed)
+        m["apex_speed_kmh"] = np.interp(self.apex_m, distance, speed)
+        m["exit_speed_kmh"] = corner.last(c_speed)
+        m["avg_speed_kmh"] = corner.mean(c_speed)
+        m["max_speed_kmh"] = corner.max(c_speed)
+        m["min_speed_kmh"] = corner.min(c_speed)
+        m["min_speed_m"] = corner.first_where(c_speed == m["min_speed_kmh"][corner.labels], c_distance)
+
+        # G-Forces
+        c_g_lat = corner.gather(g_lat)
+        c_g_lon = corner.gather(g_lon)
+        m["g_lat_avg"] = corner.mean(c_g_lat)
+        m["g_lat_max"] = corner.max(c_g_lat)
+        m["g_lat_min"] = corner.min(c_g_lat)
+        m["g_long_avg"] = corner.mean(c_g_lon)
+        m["g_long_max"] = corner.max(c_g_lon)
+        m["g_long_min"] = corner.min(c_g_lon)
+
+        # Driver's Input
+        c_steer = corner.gather(steer)
+        c_brake = corner.gather(brake)
+        c_throttle = corner.gather(throttle)
+        c_dt = corner.gather(dt)
+        c_dm = corner.gather(dm)
+        m["avg_steerangle"] = corner.mean(c_steer)
+        m["max_steerangle"] = corner.max(c_steer)
+        m["max_steerangle_m"] = corner.first_where(c_steer == m["max_steerangle"][corner.labels], c_distance)
+
+        m["avg_brake"] = corner.mean(c_brake)
+        m["max_brake"] = corner.max(c_brake)
+        m["avg_throttle"] = corner.mean(c_throttle)
+
+        m["tbf95_s"] = corner.sum(np.where(c_brake >= FULL_INPUT, c_dt, 0.0))
+        m["ttf95_s"] = corner.sum(np.where(c_throttle >= FULL_INPUT, c_dt, 0.0))
+
+        # Abstract Metrics
+        b_brake = brake_zone.gather(brake)
+        b_braking = b_brake > BRAKE_OFF
+        m["brake_point_m"] = brake_zone.first_where(b_brake >= BRAKE_ON, brake_zone.gather(distance))
+        m["brake_delta_m"] = brake_zone.sum(np.where(b_braking, brake_zone.gather(dm), 0.0))
+        m["brake_delta_s"] = brake_zone.sum(np.where(b_braking, brake_zone.gather(dt), 0.0))
+
+        # same rule as Analyze._trail_brake_delta: the samples before and after are both light braking
+        light_braking = (brake > 0) & (brake < TRAIL_BRAKE_MAX)
+        trail_braking = corner.gather(np.r_[False, light_braking[:-1]] & np.r_[light_braking[1:], False])
+        m["trail_brake_delta_s"] = corner.masked_range(trail_braking, corner.gather(time))
+        m["trail_brake_delta_m"] = corner.masked_range(trail_braking, c_distance)
+
+        e_throttle = exit_zone.gather(throttle)
+        m["exit_throttle_init_m"] = exit_zone.first_where(e_throttle >= THROTTLE_ON, exit_zone.gather(distance))
+        m["avg_exit_throttle"] = exit_zone.mean(e_throttle)
+        m["exit_speed_delta_s"] = index.time_delta(self.apex_m, self.end_m + EXIT_WINDOW_M)
+
+        coasting = (c_throttle < COAST_MAX) & (c_brake < COAST_MAX)
+        m["rolling_delta_s"] = corner.sum(np.where(coasting, c_dt, 0.0))
+        m["rolling_delta_m"] = corner.sum(np.where(coasting, c_dm, 0.0))
+
+        c_abs_steer = np.abs(c_steer)
+        steer_peak = corner.max(c_abs_steer)
+        steering = c_abs_steer >= STEERING_PEAK_SHARE * steer_peak[corner.labels]
+        m["steering_delta_s"] = corner.sum(np.where(steering, c_dt, 0.0))
+
+        # share of the corner's peak lateral grip that was used on average
+        c_abs_g_lat = np.abs(c_g_lat)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            m["cpi_factor"] = corner.mean(c_abs_g_lat) / corner.max(c_abs_g_lat)
+
+        # the lookups by distance (time deltas, apex speed) clamp to the ends of the lap instead of failing
+        reached = corner.valid
+        table = pd.DataFrame({"corner_id": self.corner_ids, "segment_id": self.segment_ids})
+        for name in CORNER_METRIC_FIELDS:
+            table[name] = np.where(reached, m[name], np.nan)
+        return table
+
+
+def to_corner_metrics(table: pd.DataFrame) -> dict[int, CornerMetrics]:
+    """Turns a table from CornerEngine.compute() into CornerMetrics objects, keyed on corner_id."""
+    records = table[CORNER_METRIC_FIELDS].to_dict("records")
+    return {int(corner_id): CornerMetrics(**record) for corner_id, record in zip(table["corner_id"], records)}
@@ -0,0 +1,143 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from lap_dataclasses import CORNER_METRIC_FIELDS, CornerMetrics
+
+CORNER_TABLE_DTYPE = np.dtype(
+    [("lap_id", np.int32), ("corner_id", np.int32)] + [(name, np.float32) for name in CORNER_METRIC_FIELDS]
+)
+
+_AGGREGATIONS = {
+    "min": np.minimum.reduceat,
+    "max": np.maximum.reduceat,
+    "sum": np.add.reduceat,
+}
+
+
+class CornerMetricsRow:
+    __slots__ = ("_record",)
+
+    def __init__(self, record: np.void):
+        """Read-only view on one row of a CornerMetricsTable. Reads like a CornerMetrics object
+        (row.apex_speed_kmh, row.lap_id, ...) without copying the row."""
+        self._record = record
+
+    def __getattr__(self, name: str):
+        try:
+            return self._record[name].item()
+        except (KeyError, ValueError):
+            raise AttributeError(name) from None
+
+    def __repr__(self) -> str:
+        return f"CornerMetricsRow(lap_id={self.lap_id}, corner_id={self.corner_id})"
+
+    def to_corner_metrics(self) -> CornerMetrics:
+        return CornerMetrics(**{name: self._record[name].item() for name in CORNER_METRIC_FIELDS})
+
+
+class CornerMetricsTable:
+    def __init__(self, rows: np.ndarray | None = None, capacity: int = 1024):
+        """Columnar store for the CornerMetrics of many laps: one structured NumPy row per (lap_id, corner_id)
+        with float32 metrics, about 150 bytes per corner instead of one Python object per value.
+
+        :param rows: existing rows with CORNER_TABLE_DTYPE
+        :param capacity: initial number of rows, grows by doubling
+        """
+        if rows is None:
+            rows = np.zeros(0, dtype=CORNER_TABLE_DTYPE)
+        self._size = len(rows)
+        self._rows = np.zeros(max(capacity, self._size), dtype=CORNER_TABLE_DTYPE)
+        self._rows[:self._size] = rows
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, idx: int) -> CornerMetricsRow:
+        if not -self._size <= idx < self._size:
+            raise IndexError(f"row {idx} out of range")
+        return CornerMetricsRow(self._rows[idx % self._size])
+
+    def __iter__(self):
+        for idx in range(self._size):
+            yield CornerMetricsRow(self._rows[idx])
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Structured array of all rows (a view, valid until the next append)."""
+        return self._rows[:self._size]
+
+    def column(self, name: str) -> np.ndarray:
+        """View of one column, e.g. table.column('apex_speed_kmh')."""
+        return self.rows[name]
+
+    def _reserve(self, extra: int) -> np.ndarray:
+        needed = self._size + extra
+        if needed > len(self._rows):
+            grown = np.zeros(max(needed, 2 * len(self._rows)), dtype=CORNER_TABLE_DTYPE)
+            grown[:self._size] = self.rows
+            self._rows = grown
+        block = self._rows[self._size:needed]
+        self._size = needed
+        return block
+
+    def append(self, lap_id: int, corner_id: int, metrics: CornerMetrics) -> None:
+        row = self._reserve(1)
+        row["lap_id"] = lap_id
+        row["corner_id"] = corner_id
+        for name in CORNER_METRIC_FIELDS:
+            row[name] = getattr(metrics, name)
+
+    def append_lap(self, lap_id: int, corner_table: pd.DataFrame) -> None:
+        """Adds all corners of one lap, as returned by CornerEngine.compute()."""
+        block = self._reserve(len(corner_table))
+        block["lap_id"] = lap_id
+        block["corner_id"] = corner_table["corner_id"].to_numpy()
+        for name in CORNER_METRIC_FIELDS:
+            block[name] = corner_table[name].to_numpy()
+
+    def filter(self, lap_ids=None, corner_ids=None, mask: np.ndarray | None = None) -> "CornerMetricsTable":
+        """Rows of the given laps/corners (and where mask is True) as a new table."""
+        rows = self.rows
+        keep = np.ones(len(rows), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        if lap_ids is not None:
+            keep &= np.isin(rows["lap_id"], np.atleast_1d(lap_ids))
+        if corner_ids is not None:
+            keep &= np.isin(rows["corner_id"], np.atleast_1d(corner_ids))
+        return CornerMetricsTable(rows[keep])
+
+    def aggregate(self, field: str, by: str = "corner_id", how: str = "mean") -> pd.Series:
+        """Aggregates one metric across laps, e.g. the best apex speed per corner.
+
+        :param field: CornerMetrics field
+        :param by: "corner_id" or "lap_id"
+        :param how: "min", "max", "sum" or "mean" (NaNs are not skipped)
+        :return: Series indexed by the group key
+        """
+        rows = self.rows
+        if len(rows) == 0:
+            return pd.Series(dtype=np.float64, name=field)
+
+        order = np.argsort(rows[by], kind="stable")
+        keys = rows[by][order]
+        values = rows[field][order].astype(np.float64)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+        if how == "mean":
+            result = np.add.reduceat(values, starts) / np.diff(np.r_[starts, len(values)])
+        elif how in _AGGREGATIONS:
+            result = _AGGREGATIONS[how](values, starts)
+        else:
+            raise ValueError(f"unknown aggregation '{how}'")
+
+        return pd.Series(result, index=pd.Index(keys[starts], name=by), name=field)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.rows)
+
+    def save(self, path: Path) -> None:
+        np.save(path, self.rows)
+
+    @classmethod
+    def load(cls, path: Path) -> "CornerMetricsTable":
+        return cls(np.load(path))
@@ -0,0 +1,49 @@
+import numpy as np
+
+
+class DistanceIndex:
+    def __init__(self, distance, time):
+        """Reads the lap time at any distance without scanning the lap.
+
+        Resampled laps lie on a regular meter grid, so the row of a distance is just (distance - start) / step.
+        Fractional meters are interpolated linearly, distances outside the lap are clamped to its first/last sample.
+
+        :param distance: 'Distance' column of the lap, sorted
+        :param time: 'Time' column of the lap
+        """
+        self.distance = np.asarray(distance, dtype=np.float64)
+        self.time = np.asarray(time, dtype=np.float64)
+        if len(self.distance) < 2:
+            raise ValueError("A distance index needs at least two samples.")
+
+        self.start_m = float(self.distance[0])
+        self.step = float(self.distance[1] - self.distance[0])
+        steps = np.diff(self.distance)
+        self.is_regular = self.step > 0 and bool(np.allclose(steps, self.step))
+
+    def time_at(self, meters):
+        """Lap time at the given distance(s) in meters. Accepts scalars and arrays."""
+        if self.is_regular and np.isscalar(meters):
+            # plain float math, numpy's per-call overhead would dominate for a single lookup
+            last = len(self.time) - 1
+            position = min(max((float(meters) - self.start_m) / self.step, 0.0), last)
+            row = min(int(position), last - 1)
+            t0 = self.time[row]
+            return float(t0 + (position - row) * (self.time[row + 1] - t0))
+
+        meters = np.asarray(meters, dtype=np.float64)
+
+        if not self.is_regular:
+            result = np.interp(meters, self.distance, self.time)
+        else:
+            last = len(self.time) - 1
+            position = np.clip((meters - self.start_m) / self.step, 0, last)
+            row = np.minimum(position.astype(np.int64), last - 1)
+            frac = position - row
+            result = self.time[row] + frac * (self.time[row + 1] - self.time[row])
+
+        return result.item() if result.ndim == 0 else result
+
+    def time_delta(self, start_m, end_m):
+        """Time needed from start_m to end_m. Accepts scalars and arrays of the same shape."""
+        return self.time_at(end_m) - self.time_at(start_m)
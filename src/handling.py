@@ -0,0 +1,154 @@
+from dataclasses import asdict, dataclass
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from track_model import NO_ID
+
+# Thresholds of the yaw-error flags (see motect_csv.py)
+LAT_G_MIN = 1.5         # only look at samples with |G_LAT| above this (= in a corner)
+REL_THR = 0.25          # relative yaw error that counts as over-/understeer
+ABS_YAW_THR = 0.3       # minimal yaw rate in rad/s, filters noise at low rotation
+SMOOTHING_S = 0.10      # width of the smoothing window in seconds
+
+
+@dataclass(frozen=True)
+class HandlingEvent:
+    kind: str                   # "oversteer" or "understeer"
+    start_m: float
+    end_m: float
+    peak_rel_yaw_err: float
+    corner_id: int              # NO_ID if the event is not inside a corner
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Centered rolling mean in O(n) via cumulative sums.
+    Same result as Series.rolling(window, center=True, min_periods=1).mean(), NaNs are skipped."""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+
+    n = len(values)
+    idx = np.arange(n)
+    lower = np.clip(idx - window // 2, 0, n)
+    upper = np.clip(idx - window // 2 + window, 0, n)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (sums[upper] - sums[lower]) / (counts[upper] - counts[lower])
+
+
+def _runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) row of every run of True values."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+class HandlingDetector:
+    def __init__(self, lat_g_min: float = LAT_G_MIN, rel_threshold: float = REL_THR,
+                 abs_yaw_threshold: float = ABS_YAW_THR, smoothing_s: float = SMOOTHING_S):
+        """Finds oversteer and understeer on a resampled lap by comparing the measured yaw rate (ROTY)
+        with the yaw rate expected from lateral acceleration and speed."""
+        self.lat_g_min = lat_g_min
+        self.rel_threshold = rel_threshold
+        self.abs_yaw_threshold = abs_yaw_threshold
+        self.smoothing_s = smoothing_s
+
+    def _window(self, time: np.ndarray) -> int:
+        dt = np.nanmedian(np.diff(time)) if len(time) > 1 else np.nan
+        if not np.isfinite(dt) or dt <= 0:
+            return 3
+        return max(3, int(round(self.smoothing_s / dt)))
+
+    def yaw_error(self, lap_df: pd.DataFrame) -> pd.DataFrame:
+        """Smoothed yaw error and over-/understeer flags for every row of the lap.
+
+        :return: DataFrame with Distance, yaw_expected, yaw_error, rel_yaw_err, oversteer_flag, understeer_flag
+        """
+        yaw = self.yaw_error_arrays(
+            lap_df["Time"].to_numpy(dtype=np.float64),
+            lap_df["SPEED"].to_numpy(dtype=np.float64),
+            lap_df["G_LAT"].to_numpy(dtype=np.float64),
+            lap_df["ROTY"].to_numpy(dtype=np.float64)
+        )
+        return pd.DataFrame({"Distance": lap_df["Distance"].to_numpy(), **yaw})
+
+    def yaw_error_arrays(self, time: np.ndarray, speed: np.ndarray, g_lat: np.ndarray,
+                         roty: np.ndarray) -> dict[str, np.ndarray]:
+        """Same as yaw_error() on plain arrays, e.g. the views of a ChannelRingBuffer in live mode.
+
+        :param time: Time in s
+        :param speed: SPEED in km/h
+        :param g_lat: G_LAT
+        :param roty: ROTY in deg/s
+        """
+        window = self._window(time)
+
+        v_ms = rolling_mean(speed * (1000 / 3600), window)
+        g_lat = rolling_mean(g_lat, window)
+        roty = rolling_mean(np.deg2rad(roty), window)
+
+        eps = 1e-6
+        yaw_expected = g_lat / (np.abs(v_ms) + eps)     # rad/s
+        yaw_error = roty - yaw_expected
+        rel_yaw_err = yaw_error / (np.abs(yaw_expected) + 1e-3)
+
+        in_corner = np.abs(g_lat) > self.lat_g_min
+        rotating = np.abs(roty) > self.abs_yaw_threshold
+
+        return {
+            "yaw_expected": yaw_expected,
+            "yaw_error": yaw_error,
+            "rel_yaw_err": rel_yaw_err,
+            "oversteer_flag": in_corner & rotating & (rel_yaw_err > self.rel_threshold),
+            "understeer_flag": in_corner & rotating & (rel_yaw_err < -self.rel_threshold),
+        }
+
+    def detect(self, lap_df: pd.DataFrame) -> list[HandlingEvent]:
+        """Over- and understeer events of a lap, ordered by distance."""
+        yaw = self.yaw_error(lap_df)
+        distance = yaw["Distance"].to_numpy(dtype=np.float64)
+        rel_yaw_err = yaw["rel_yaw_err"].to_numpy()
+        corner_ids = lap_df["corner_id"].to_numpy() if "corner_id" in lap_df else np.full(len(lap_df), NO_ID)
+
+        events = []
+        for kind, flag in (("oversteer", "oversteer_flag"), ("understeer", "understeer_flag")):
+            for start, end in zip(*_runs(yaw[flag].to_numpy())):
+                err = rel_yaw_err[start:end]
+                peak = start + int(np.argmax(np.abs(err)))
+                events.append(HandlingEvent(
+                    kind=kind,
+                    start_m=float(distance[start]),
+                    end_m=float(distance[end - 1]),
+                    peak_rel_yaw_err=float(rel_yaw_err[peak]),
+                    corner_id=int(corner_ids[peak])
+                ))
+        return sorted(events, key=lambda e: e.start_m)
+
+    def detect_many(self, laps: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """Runs the detector over many laps (no plotting), e.g. every lap of a StintReader.
+
+        :return: one row per event with the lap number and all HandlingEvent fields
+        """
+        rows = []
+        for lap_no, lap_df in enumerate(laps):
+            rows.extend({"lap": lap_no, **asdict(event)} for event in self.detect(lap_df))
+        return pd.DataFrame(rows, columns=["lap", "kind", "start_m", "end_m", "peak_rel_yaw_err", "corner_id"])
+
+
+def balance_stats(events: pd.DataFrame, n_laps: int) -> pd.DataFrame:
+    """Handling balance per corner from HandlingDetector.detect_many().
+
+    :param events: result of detect_many()
+    :param n_laps: number of laps that were analysed
+    :return: per corner_id: number of over-/understeer events and the share of laps that had them
+    """
+    laps = max(n_laps, 1)
+    counts = events.pivot_table(index="corner_id", columns="kind", values="lap", aggfunc="count", fill_value=0)
+    laps_with = events.pivot_table(index="corner_id", columns="kind", values="lap", aggfunc="nunique", fill_value=0)
+
+    stats = pd.DataFrame(index=counts.index)
+    for kind in ("oversteer", "understeer"):
+        stats[f"{kind}_events"] = counts[kind] if kind in counts else 0
+        stats[f"{kind}_lap_share"] = (laps_with[kind] if kind in laps_with else 0) / laps
+    return stats
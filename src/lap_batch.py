@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from logger import get_logger
+from lap_dataclasses import LapAnalysis
+from lap_telemetry import LapTelemetry
+from motec_csv_practice import TelemetryLoader
+from track_model import TrackModel
+
+log = get_logger("lap_batch", to_console=False)
+
+# Worker state, set once per process by _init_worker.
+_loader: TelemetryLoader | None = None
+_track: str = ""
+_track_model: TrackModel | None = None
+_reference_times: list[float] = []
+
+
+def _segment_times(segments: list[dict]) -> list[float]:
+    return [segment["metrics"]["timeDelta"] for segment in segments]
+
+
+def _init_worker(base_dir: Path, track: str, reference_df: pd.DataFrame, cache_dir: Path | None, dtype) -> None:
+    """Runs once per worker process. The reference lap travels to every worker exactly once here
+    instead of being pickled with every task."""
+    global _loader, _track, _track_model, _reference_times
+    _loader = TelemetryLoader(base_dir, cache_dir=cache_dir, dtype=dtype)
+    _track = track
+    _track_model = TrackModel.for_track(base_dir, track)
+    _reference_times = _segment_times(LapTelemetry(reference_df, _track_model).get_all_segments())
+
+
+def _analyze_lap(lap_path: str) -> LapAnalysis:
+    lap_df = _loader.telemetry_from_csv(lap_path, _track)
+    segments = LapTelemetry(lap_df, _track_model).get_all_segments()
+    deltas = [round(float(lap_time - ref_time), 3)
+              for lap_time, ref_time in zip(_segment_times(segments), _reference_times)]
+    return LapAnalysis(lap_path=lap_path, segments=segments, segment_delta_s=deltas)
+
+
+def analyze_laps(lap_paths: list[str], reference_path: str, track: str, base_dir: Path,
+                 max_workers: int | None = None, cache_dir: Path | None = None,
+                 dtype=np.float64) -> list[LapAnalysis]:
+    """Loads and analyses many laps against one reference lap on a process pool.
+
+    :param lap_paths: MoTeC csv files of the laps, relative to base_dir
+    :param reference_path: MoTeC csv file of the reference lap, relative to base_dir
+    :param track: Name of the racetrack
+    :param base_dir: folder that contains the 'assets' folder
+    :param max_workers: number of worker processes, defaults to the number of cores
+    :param cache_dir: optional lap cache shared by all workers
+    :param dtype: dtype of the resampled channels
+    :return: one LapAnalysis per lap, in the order of lap_paths
+    """
+    loader = TelemetryLoader(base_dir, cache_dir=cache_dir, dtype=dtype)
+    reference_df = loader.telemetry_from_csv(reference_path, track)
+
+    max_workers = min(max_workers or os.cpu_count() or 1, max(len(lap_paths), 1))
+    log.info(f"analysing {len(lap_paths)} laps against '{reference_path}' on {max_workers} processes")
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(base_dir, track, reference_df, cache_dir, dtype)
+    ) as executor:
+        return list(executor.map(_analyze_lap, lap_paths))
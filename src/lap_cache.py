@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from logger import get_logger
+
+log = get_logger("lap_cache", to_console=False)
+
+# Bump this whenever the layout of a cached lap or the resampling/joining changes.
+CACHE_VERSION = 2
+
+
+class LapCache:
+    def __init__(self, cache_dir: Path):
+        """On-disk cache for resampled and track-joined laps.
+
+        Every lap lives in its own folder below cache_dir. Numeric channels are stored as one .npy file
+        per column and opened memory-mapped, everything else (names, descriptions, id lists) goes to a
+        small JSON file.
+        """
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def key_for(*file_paths: Path, salt: str = "") -> str:
+        """Builds the cache key from the content of the given files (telemetry csv + track map files).
+
+        :param file_paths: all files the cached lap depends on
+        :param salt: extra parameters that change the result, e.g. the resampling step
+        :return: hex sha256 digest
+        """
+        digest = hashlib.sha256(f"v{CACHE_VERSION}|{salt}".encode("utf-8"))
+        for file_path in file_paths:
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def load(self, key: str) -> pd.DataFrame | None:
+        """Opens a cached lap memory-mapped. Returns None on a cache miss.
+
+        The channels are mapped copy-on-write: the frame can be changed like a freshly parsed lap, the changes
+        stay in memory and never reach the cache files.
+        """
+        lap_dir = self.cache_dir / key
+        meta_path = lap_dir / "meta.json"
+        if not meta_path.exists():
+            return None
+
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(lap_dir / "objects.json", "r", encoding="utf-8") as f:
+                objects = json.load(f)
+
+            columns = {}
+            for idx, column in enumerate(meta["columns"]):
+                if column["kind"] == "npy":
+                    columns[column["name"]] = np.load(lap_dir / f"{idx}.npy", mmap_mode="c")
+                else:
+                    values = [np.nan if v is None else v for v in objects[column["name"]]]
+                    columns[column["name"]] = pd.Series(values, dtype=object)
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f"cached lap {key} could not be read, ignoring it: {e}")
+            return None
+
+        log.debug(f"cache hit: {key}")
+        return pd.DataFrame(columns, copy=False)
+
+    def store(self, key: str, lap_df: pd.DataFrame) -> None:
+        """Writes the lap to the cache. The folder is built next to the target and moved in place at the end,
+        so a crashed write never leaves a half-written lap behind."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_dir))
+
+        try:
+            meta = {"version": CACHE_VERSION, "rows": len(lap_df), "columns": []}
+            objects = {}
+            for idx, name in enumerate(lap_df.columns):
+                values = lap_df[name]
+                if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+                    np.save(tmp_dir / f"{idx}.npy", values.to_numpy())
+                    meta["columns"].append({"name": name, "kind": "npy"})
+                else:
+                    objects[name] = [None if _is_missing(v) else v for v in values.tolist()]
+                    meta["columns"].append({"name": name, "kind": "json"})
+
+            with open(tmp_dir / "objects.json", "w", encoding="utf-8") as f:
+                json.dump(objects, f, ensure_ascii=False, default=_to_builtin)
+            # meta.json is written last, a lap folder without it counts as a miss.
+            with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+
+            os.replace(tmp_dir, self.cache_dir / key)
+        except OSError as e:
+            # e.g. another process already stored the same lap
+            log.warning(f"lap {key} could not be cached: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def clear(self) -> None:
+        """Removes all cached laps."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def _is_missing(value) -> bool:
+    return isinstance(value, float) and np.isnan(value)
+
+
+def _to_builtin(value):
+    """json.dump fallback for numpy scalars inside object columns."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from corner_engine import CornerEngine
+from distance_index import DistanceIndex
+from track_model import TrackModel
+
+
+@dataclass(frozen=True)
+class LapComparison:
+    trace: pd.DataFrame         # Distance, time_user_s, time_ref_s, delta_s, speed_user_kmh, speed_ref_kmh
+    segments: pd.DataFrame      # segment_id, name, time_user_s, time_ref_s, delta_s
+    corners: pd.DataFrame       # corner_id, segment_id, name, time_user_s, time_ref_s, delta_s, brake_point_delta_m
+    user_corner_metrics: pd.DataFrame | None = None     # CornerEngine.compute() of both laps, one row per corner
+    ref_corner_metrics: pd.DataFrame | None = None
+
+    @property
+    def total_delta_s(self) -> float:
+        return float(self.trace["delta_s"].iloc[-1])
+
+
+def delta_trace(user_df: pd.DataFrame, ref_df: pd.DataFrame, step: float = 1.0) -> pd.DataFrame:
+    """Running time delta of the user lap against the reference lap, aligned by distance.
+
+    Both laps are read on the meters they have in common, the clocks start at 0 on the first shared meter.
+    A positive delta_s means the user is behind the reference at that point of the track.
+
+    :param user_df: resampled user lap
+    :param ref_df: resampled reference lap
+    :param step: grid step of the trace in meters
+    :return: DataFrame with Distance, time_user_s, time_ref_s, delta_s, speed_user_kmh, speed_ref_kmh
+    """
+    user_distance = user_df["Distance"].to_numpy(dtype=np.float64)
+    ref_distance = ref_df["Distance"].to_numpy(dtype=np.float64)
+
+    start_m = max(user_distance[0], ref_distance[0])
+    end_m = min(user_distance[-1], ref_distance[-1])
+    if end_m <= start_m:
+        raise ValueError("The laps have no distance in common.")
+    grid = np.arange(start_m, end_m + step / 2, step)
+
+    user_time = DistanceIndex(user_distance, user_df["Time"]).time_at(grid)
+    ref_time = DistanceIndex(ref_distance, ref_df["Time"]).time_at(grid)
+    user_time = user_time - user_time[0]
+    ref_time = ref_time - ref_time[0]
+
+    return pd.DataFrame({
+        "Distance": grid,
+        "time_user_s": user_time,
+        "time_ref_s": ref_time,
+        "delta_s": user_time - ref_time,
+        "speed_user_kmh": np.interp(grid, user_distance, user_df["SPEED"].to_numpy(dtype=np.float64)),
+        "speed_ref_kmh": np.interp(grid, ref_distance, ref_df["SPEED"].to_numpy(dtype=np.float64)),
+    })
+
+
+def _attribute(trace: pd.DataFrame, start_m: np.ndarray, end_m: np.ndarray) -> dict[str, np.ndarray]:
+    """Time of both laps and the time gained/lost between start_m and end_m, read from the trace.
+    Ranges that lie completely outside of the trace (e.g. corners after the end of a partial lap) are NaN."""
+    distance = trace["Distance"].to_numpy()
+    user_time = np.interp(end_m, distance, trace["time_user_s"]) - np.interp(start_m, distance, trace["time_user_s"])
+    ref_time = np.interp(end_m, distance, trace["time_ref_s"]) - np.interp(start_m, distance, trace["time_ref_s"])
+    covered = (end_m >= distance[0]) & (start_m <= distance[-1])
+    user_time = np.where(covered, user_time, np.nan)
+    ref_time = np.where(covered, ref_time, np.nan)
+    return {"time_user_s": user_time, "time_ref_s": ref_time, "delta_s": user_time - ref_time}
+
+
+def compare_laps(user_df: pd.DataFrame, ref_df: pd.DataFrame, track_model: TrackModel) -> LapComparison:
+    """Compares a user lap with a reference lap over the whole track.
+
+    :param user_df: resampled user lap
+    :param ref_df: resampled reference lap
+    :param track_model: compiled map of the track
+    :return: LapComparison with the delta trace and the time gained/lost per segment and per corner
+    """
+    trace = delta_trace(user_df, ref_df)
+
+    segments = list(track_model.segments.values())
+    segment_table = pd.DataFrame({
+        "segment_id": [s.id for s in segments],
+        "name": [s.name for s in segments],
+        **_attribute(trace,
+                     np.array([s.start_m for s in segments], dtype=np.float64),
+                     np.array([s.end_m for s in segments], dtype=np.float64))
+    })
+
+    engine = CornerEngine(track_model)
+    corner_table = pd.DataFrame({
+        "corner_id": engine.corner_ids,
+        "segment_id": engine.segment_ids,
+        "name": [c.name for c in track_model.corners.values()],
+        **_attribute(trace, engine.start_m, engine.end_m)
+    })
+    user_metrics = engine.compute(user_df)
+    ref_metrics = engine.compute(ref_df)
+    # brake points are matched by corner, not by their position in the list of brake events
+    corner_table["brake_point_delta_m"] = (
+        user_metrics["brake_point_m"].to_numpy() - ref_metrics["brake_point_m"].to_numpy()
+    )
+
+    return LapComparison(trace=trace, segments=segment_table, corners=corner_table,
+                         user_corner_metrics=user_metrics, ref_corner_metrics=ref_metrics)
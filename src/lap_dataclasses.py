@@ -1,8 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import Optional
 
-from pyasn1_modules.rfc5914 import TrustAnchorInfo
-
 
 @dataclass(frozen=True)
 class Segment:
@@ -10,6 +8,7 @@ class Segment:
     name: str
     start_m: float
     end_m: float
+    corner_ids: tuple[int, ...] = ()
 
 @dataclass(frozen=True)
 class SegmentMetrics:
@@ -59,7 +58,7 @@ class CornerMetrics:
 
     exit_throttle_init_m: Optional[float] = 0.0  # Measurement from where the driver is on the gas again on corner_exit.
     avg_exit_throttle: Optional[float] = 0.0      # avg. throttle input from apex_m to exit_m + 100
-    exit_speed_delta_s: Optional[float] = 0.0     # avg. Speed from apex_m to exit_m + 100m
+    exit_speed_delta_s: Optional[float] = 0.0     # Time/s from apex_m to exit_m + 100m
 
     rolling_delta_s: Optional[float] = 0.0        # Time/s without throttle or brake
     rolling_delta_m: Optional[float] = 0.0
@@ -68,6 +67,9 @@ class CornerMetrics:
 
     cpi_factor: Optional[float] = 0.0
 
+# names of all CornerMetrics fields, in declaration order
+CORNER_METRIC_FIELDS = [f.name for f in fields(CornerMetrics)]
+
 @dataclass(frozen=True)
 class Corner:
     id: int
@@ -75,4 +77,11 @@ class Corner:
     start_m: float
     apex_m: float
     end_m: float
-    corner_metrics: CornerMetrics
+    corner_metrics: Optional[CornerMetrics] = None
+    segment_id: int = 0
+
+@dataclass(frozen=True)
+class LapAnalysis:
+    lap_path: str
+    segments: list[dict]            # LapTelemetry.get_all_segments() of the lap
+    segment_delta_s: list[float]    # segment time of the lap minus segment time of the reference lap
@@ -0,0 +1,279 @@
+import math
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+from logger import get_logger
+from lap_dataclasses import Corner, CornerMetrics
+from motec_csv_practice import MOTEC_HEADER_ROWS
+from ring_buffer import ChannelRingBuffer
+from track_model import TrackModel
+
+log = get_logger("live_telemetry", to_console=False, queued=True)
+
+LIVE_CHANNELS = ["Distance", "Time", "SPEED", "G_LAT", "G_LON", "STEERANGLE", "BRAKE", "THROTTLE"]
+
+FULL_INPUT = 95             # tbf95_s / ttf95_s: pedal >= 95 %
+TRAIL_BRAKE_MAX = 15        # trail braking: 0 % < BRAKE < 15 % on the neighbouring samples
+COAST_MAX = 5               # rolling: THROTTLE and BRAKE both below 5 %
+LAP_WRAP_M = 50             # a drop of Distance larger than this starts a new lap
+
+# CornerMetrics fields that need the brake zone before cornerStart_m, the exit window behind cornerEnd_m or a second
+# pass over the corner (steering_delta_s compares every sample with the peak steering angle), they are not computed
+# live. NaN (like CornerEngine for missing data) instead of the 0.0 default, which is a real value.
+NOT_LIVE = dict.fromkeys(("brake_point_m", "brake_delta_m", "brake_delta_s", "exit_throttle_init_m",
+                          "avg_exit_throttle", "exit_speed_delta_s", "steering_delta_s"), math.nan)
+
+
+class ReplaySource:
+    def __init__(self, csv_path: Path, rate: float | None = 1.0, motec: bool = False,
+                 channels: list[str] = LIVE_CHANNELS):
+        """Plays a recorded lap back as a stream of samples, e.g. src/record_telemetry.csv.
+
+        :param csv_path: plain csv (header in the first row) or MoTeC export (motec=True)
+        :param rate: 1.0 = real time, 10.0 = ten times faster, None = as fast as possible
+        :param motec: True if the file has the MoTeC header and units rows
+        :param channels: channels every sample carries
+        """
+        skiprows = [*range(MOTEC_HEADER_ROWS), MOTEC_HEADER_ROWS + 1] if motec else None
+        data = pd.read_csv(csv_path, skiprows=skiprows, usecols=lambda c: c in channels)
+        self.channels = [c for c in channels if c in data.columns]
+        self.values = data[self.channels].to_numpy(dtype=np.float64)
+        self.rate = rate
+
+    def __iter__(self) -> Iterator[dict[str, float]]:
+        time_col = self.channels.index("Time")
+        first_time = self.values[0, time_col] if len(self.values) else 0.0
+        wall_start = time.perf_counter()
+
+        for row in self.values:
+            if self.rate:
+                due = wall_start + (row[time_col] - first_time) / self.rate
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            yield dict(zip(self.channels, row.tolist()))
+
+
+class CornerAccumulator:
+    def __init__(self, corner: Corner):
+        """Online version of Analyze.corner: every sample updates running sums and extremes in O(1).
+
+        The fields in NOT_LIVE need samples outside of the corner (brake zone, exit window) or a second pass over
+        it, they are NaN.
+        """
+        self.corner = corner
+        self.count = 0
+        self.sums = {"SPEED": 0.0, "G_LAT": 0.0, "G_LON": 0.0, "STEERANGLE": 0.0, "BRAKE": 0.0, "THROTTLE": 0.0}
+        self.maxs = {key: -math.inf for key in self.sums}
+        self.mins = {key: math.inf for key in self.sums}
+        self.abs_g_lat_sum = 0.0       # cpi_factor: mean |G_LAT| over its peak
+        self.min_speed_m = math.nan
+        self.max_steerangle_m = math.nan
+
+        self.entry_speed = math.nan
+        self.exit_speed = math.nan
+        self.apex_speed = math.nan
+        self.apex_gap = math.inf
+
+        self.time_start = math.nan
+        self.time_end = math.nan
+
+        self.tbf95_s = 0.0
+        self.ttf95_s = 0.0
+        self.rolling_delta_s = 0.0
+        self.rolling_delta_m = 0.0
+
+        self.trail_min = (math.inf, math.inf)      # (Time, Distance)
+        self.trail_max = (-math.inf, -math.inf)
+        self.prev: dict[str, float] | None = None
+        self.prev_prev_brake = math.nan
+
+    def start(self, sample: dict[str, float], before: dict[str, float] | None) -> None:
+        """Opens the corner. 'before' is the last sample before cornerStart_m, used to interpolate the start time."""
+        self.time_start = _time_at(self.corner.start_m, before, sample)
+        if before is not None:
+            self.prev_prev_brake = before["BRAKE"]
+
+    def update(self, sample: dict[str, float]) -> None:
+        self.count += 1
+        for key in self.sums:
+            value = sample[key]
+            self.sums[key] += value
+            if value > self.maxs[key]:
+                self.maxs[key] = value
+                if key == "STEERANGLE":
+                    self.max_steerangle_m = sample["Distance"]
+            if value < self.mins[key]:
+                self.mins[key] = value
+                if key == "SPEED":
+                    self.min_speed_m = sample["Distance"]
+
+        self.abs_g_lat_sum += abs(sample["G_LAT"])
+
+        if self.count == 1:
+            self.entry_speed = sample["SPEED"]
+        self.exit_speed = sample["SPEED"]
+
+        apex_gap = abs(sample["Distance"] - self.corner.apex_m)
+        if apex_gap < self.apex_gap:
+            self.apex_gap = apex_gap
+            self.apex_speed = sample["SPEED"]
+
+        self._close_interval(sample)
+        self.prev = sample
+
+    def _close_interval(self, sample: dict[str, float]) -> None:
+        """Books the interval since the previous sample onto the previous sample (like CornerEngine)."""
+        prev = self.prev
+        if prev is None:
+            return
+        dt = sample["Time"] - prev["Time"]
+        dm = sample["Distance"] - prev["Distance"]
+        if prev["BRAKE"] >= FULL_INPUT:
+            self.tbf95_s += dt
+        if prev["THROTTLE"] >= FULL_INPUT:
+            self.ttf95_s += dt
+        if prev["THROTTLE"] < COAST_MAX and prev["BRAKE"] < COAST_MAX:
+            self.rolling_delta_s += dt
+            self.rolling_delta_m += dm
+
+        # the previous sample is trail braking if the samples around it are both light braking
+        if _light_braking(self.prev_prev_brake) and _light_braking(sample["BRAKE"]):
+            self.trail_min = (min(self.trail_min[0], prev["Time"]), min(self.trail_min[1], prev["Distance"]))
+            self.trail_max = (max(self.trail_max[0], prev["Time"]), max(self.trail_max[1], prev["Distance"]))
+        self.prev_prev_brake = prev["BRAKE"]
+
+    def finish(self, after: dict[str, float]) -> CornerMetrics:
+        """Closes the corner with the first sample behind cornerEnd_m and returns its metrics."""
+        self.time_end = _time_at(self.corner.end_m, self.prev, after)
+        self._close_interval(after)
+        n = max(self.count, 1)
+        has_trail = math.isfinite(self.trail_max[0])
+        g_lat_peak = max(self.maxs["G_LAT"], -self.mins["G_LAT"])
+
+        return CornerMetrics(
+            time_delta_s=self.time_end - self.time_start,
+            entry_speed_kmh=self.entry_speed,
+            apex_speed_kmh=self.apex_speed,
+            exit_speed_kmh=self.exit_speed,
+            avg_speed_kmh=self.sums["SPEED"] / n,
+            max_speed_kmh=self.maxs["SPEED"],
+            min_speed_kmh=self.mins["SPEED"],
+            min_speed_m=self.min_speed_m,
+            g_lat_avg=self.sums["G_LAT"] / n,
+            g_lat_max=self.maxs["G_LAT"],
+            g_lat_min=self.mins["G_LAT"],
+            g_long_avg=self.sums["G_LON"] / n,
+            g_long_max=self.maxs["G_LON"],
+            g_long_min=self.mins["G_LON"],
+            avg_steerangle=self.sums["STEERANGLE"] / n,
+            max_steerangle=self.maxs["STEERANGLE"],
+            max_steerangle_m=self.max_steerangle_m,
+            avg_brake=self.sums["BRAKE"] / n,
+            max_brake=self.maxs["BRAKE"],
+            avg_throttle=self.sums["THROTTLE"] / n,
+            tbf95_s=self.tbf95_s,
+            ttf95_s=self.ttf95_s,
+            trail_brake_delta_s=self.trail_max[0] - self.trail_min[0] if has_trail else math.nan,
+            trail_brake_delta_m=self.trail_max[1] - self.trail_min[1] if has_trail else math.nan,
+            rolling_delta_s=self.rolling_delta_s,
+            rolling_delta_m=self.rolling_delta_m,
+            cpi_factor=self.abs_g_lat_sum / n / g_lat_peak if g_lat_peak > 0 else math.nan,
+            **NOT_LIVE,
+        )
+
+
+def _light_braking(brake: float) -> bool:
+    return 0 < brake < TRAIL_BRAKE_MAX
+
+
+def _time_at(meters: float, before: dict[str, float] | None, after: dict[str, float] | None) -> float:
+    """Interpolates the time at which the car passed 'meters' between two samples."""
+    if before is None:
+        return after["Time"]
+    if after is None or after["Distance"] == before["Distance"]:
+        return before["Time"]
+    share = (meters - before["Distance"]) / (after["Distance"] - before["Distance"])
+    share = min(max(share, 0.0), 1.0)
+    return before["Time"] + share * (after["Time"] - before["Time"])
+
+
+class LiveCornerTracker:
+    def __init__(self, track_model: TrackModel, history: ChannelRingBuffer | None = None):
+        """Follows the car around the track and emits the metrics of every corner as soon as cornerEnd_m is passed.
+
+        Corners are walked in track order, so every sample only touches the (at most two) open corners.
+
+        :param track_model: compiled map of the track
+        :param history: optional ring buffer that receives every sample, for windowed live analysis
+        """
+        self.corners = sorted(track_model.corners.values(), key=lambda c: c.start_m)
+        self.next_corner = 0
+        self.open: list[CornerAccumulator] = []
+        self.last_sample: dict[str, float] | None = None
+        self.history = history
+
+    def reset(self) -> None:
+        """Starts a new lap, open corners are dropped."""
+        self.next_corner = 0
+        self.open = []
+        self.last_sample = None
+        if self.history is not None:
+            self.history.clear()
+
+    def push(self, sample: dict[str, float]) -> list[tuple[Corner, CornerMetrics]]:
+        """Feeds one sample.
+
+        :param sample: channel values, at least the LIVE_CHANNELS
+        :return: (corner, metrics) of every corner that was finished by this sample, usually none
+        """
+        distance = sample["Distance"]
+        if self.last_sample is not None and distance < self.last_sample["Distance"] - LAP_WRAP_M:
+            self.reset()
+
+        finished = []
+        still_open = []
+        for accumulator in self.open:
+            if distance > accumulator.corner.end_m:
+                finished.append((accumulator.corner, accumulator.finish(sample)))
+            else:
+                still_open.append(accumulator)
+        self.open = still_open
+
+        while self.next_corner < len(self.corners) and self.corners[self.next_corner].start_m <= distance:
+            corner = self.corners[self.next_corner]
+            self.next_corner += 1
+            if distance > corner.end_m:
+                # joined the lap behind this corner
+                continue
+            accumulator = CornerAccumulator(corner)
+            accumulator.start(sample, self.last_sample)
+            self.open.append(accumulator)
+
+        for accumulator in self.open:
+            accumulator.update(sample)
+
+        if self.history is not None:
+            self.history.append(sample)
+        self.last_sample = sample
+        return finished
+
+
+def ingest(source: Iterable[dict[str, float]], tracker: LiveCornerTracker,
+           on_corner: Callable[[Corner, CornerMetrics], None]) -> int:
+    """Runs a live session: feeds every sample of the source into the tracker and hands finished corners to on_corner.
+
+    :return: number of processed samples
+    """
+    samples = 0
+    for sample in source:
+        started = time.perf_counter()
+        finished = tracker.push(sample)
+        samples += 1
+        for corner, metrics in finished:
+            log.debug("%s finished after %.3f ms", corner.name, (time.perf_counter() - started) * 1000)
+            on_corner(corner, metrics)
+    return samples
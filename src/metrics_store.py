@@ -0,0 +1,260 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+from logger import get_logger
+from lap_dataclasses import CORNER_METRIC_FIELDS, LapAnalysis
+
+log = get_logger("metrics_store", to_console=False)
+
+# Bump this whenever the tables change, old databases are then rebuilt.
+SCHEMA_VERSION = 1
+
+# keys of segment_data["metrics"] (LapTelemetry._get_segment_data) -> column
+SEGMENT_METRIC_COLUMNS = {
+    "avgThrottle": "avg_throttle",
+    "avgBreak": "avg_brake",
+    "avgSpeed": "avg_speed_kmh",
+    "topSpeed": "top_speed_kmh",
+    "minSpeed": "min_speed_kmh",
+    "timeDelta": "time_s",
+}
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS laps (
+    lap_id      INTEGER PRIMARY KEY,
+    track       TEXT NOT NULL,
+    car         TEXT NOT NULL,
+    session     TEXT NOT NULL,
+    lap_path    TEXT NOT NULL,
+    lap_time_s  REAL,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_laps_track_car_session ON laps (track, car, session);
+
+CREATE TABLE IF NOT EXISTS corners (
+    track       TEXT NOT NULL,
+    corner_id   INTEGER NOT NULL,
+    name        TEXT NOT NULL,
+    PRIMARY KEY (track, corner_id)
+);
+
+CREATE TABLE IF NOT EXISTS segment_metrics (
+    lap_id      INTEGER NOT NULL REFERENCES laps (lap_id) ON DELETE CASCADE,
+    track       TEXT NOT NULL,
+    car         TEXT NOT NULL,
+    session     TEXT NOT NULL,
+    segment_id  INTEGER NOT NULL,
+    {", ".join(f"{column} REAL" for column in SEGMENT_METRIC_COLUMNS.values())},
+    PRIMARY KEY (lap_id, segment_id)
+);
+CREATE INDEX IF NOT EXISTS ix_segment_metrics_lookup ON segment_metrics (track, car, segment_id, lap_id);
+CREATE INDEX IF NOT EXISTS ix_segment_metrics_session ON segment_metrics (session, segment_id);
+
+CREATE TABLE IF NOT EXISTS corner_metrics (
+    lap_id      INTEGER NOT NULL REFERENCES laps (lap_id) ON DELETE CASCADE,
+    track       TEXT NOT NULL,
+    car         TEXT NOT NULL,
+    session     TEXT NOT NULL,
+    corner_id   INTEGER NOT NULL,
+    {", ".join(f"{field} REAL" for field in CORNER_METRIC_FIELDS)},
+    PRIMARY KEY (lap_id, corner_id)
+);
+CREATE INDEX IF NOT EXISTS ix_corner_metrics_lookup ON corner_metrics (track, car, corner_id, lap_id);
+CREATE INDEX IF NOT EXISTS ix_corner_metrics_session ON corner_metrics (session, corner_id);
+"""
+
+
+class MetricsStore:
+    def __init__(self, db_path: Path | str):
+        """Local SQLite store for the per-lap, per-segment and per-corner metrics of LapTelemetry.get_all_segments().
+
+        track, car and session are stored on every metrics row, so questions like "best La Source exit speed
+        of the last 500 laps" are answered from one index range instead of a join or reloading the csv files.
+
+        :param db_path: database file, ":memory:" for a throwaway store
+        """
+        self.db_path = str(db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if self.db_path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        self._migrate()
+
+    def _migrate(self) -> None:
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            log.info(f"metrics store schema v{version} is outdated, rebuilding as v{SCHEMA_VERSION}")
+            with self.conn:
+                for table in ("corner_metrics", "segment_metrics", "corners", "laps"):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "MetricsStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _insert_lap(self, track: str, car: str, session: str, segments: list[dict], lap_path: str) -> int:
+        lap_time = sum(segment["metrics"]["timeDelta"] for segment in segments)
+        cursor = self.conn.execute(
+            "INSERT INTO laps (track, car, session, lap_path, lap_time_s, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (track, car, session, lap_path, lap_time, time.time())
+        )
+        lap_id = cursor.lastrowid
+
+        segment_rows = []
+        corner_rows = []
+        corner_names = []
+        for segment in segments:
+            metrics = segment["metrics"]
+            segment_rows.append((lap_id, track, car, session, segment["id"],
+                                 *(metrics.get(key) for key in SEGMENT_METRIC_COLUMNS)))
+            for corner in segment["corners"]:
+                corner_rows.append((lap_id, track, car, session, corner["id"],
+                                    *(corner["metrics"].get(field) for field in CORNER_METRIC_FIELDS)))
+                corner_names.append((track, corner["id"], corner["name"]))
+
+        segment_columns = ", ".join(SEGMENT_METRIC_COLUMNS.values())
+        self.conn.executemany(
+            f"INSERT INTO segment_metrics (lap_id, track, car, session, segment_id, {segment_columns}) "
+            f"VALUES ({', '.join('?' * (5 + len(SEGMENT_METRIC_COLUMNS)))})",
+            segment_rows
+        )
+        self.conn.executemany(
+            f"INSERT INTO corner_metrics (lap_id, track, car, session, corner_id, {', '.join(CORNER_METRIC_FIELDS)}) "
+            f"VALUES ({', '.join('?' * (5 + len(CORNER_METRIC_FIELDS)))})",
+            corner_rows
+        )
+        self.conn.executemany("INSERT OR IGNORE INTO corners (track, corner_id, name) VALUES (?, ?, ?)", corner_names)
+        return lap_id
+
+    def add_lap(self, track: str, car: str, session: str, segments: list[dict], lap_path: str = "") -> int:
+        """Stores one lap.
+
+        :param track: Name of the racetrack
+        :param car: car of the lap, e.g. ACCSetup.get_car_name()
+        :param session: free text that groups laps, e.g. the name of the stint file
+        :param segments: LapTelemetry.get_all_segments() of the lap
+        :param lap_path: csv file the lap came from
+        :return: lap_id of the new lap
+        """
+        with self.conn:
+            return self._insert_lap(track, car, session, segments, lap_path)
+
+    def add_laps(self, track: str, car: str, session: str, laps: Iterable[LapAnalysis]) -> list[int]:
+        """Stores many laps, e.g. the result of lap_batch.analyze_laps(), in a single transaction."""
+        started = time.perf_counter()
+        with self.conn:
+            lap_ids = [self._insert_lap(track, car, session, lap.segments, lap.lap_path) for lap in laps]
+        log.info(f"stored {len(lap_ids)} laps in {time.perf_counter() - started:.3f} s")
+        return lap_ids
+
+    def corner_id(self, track: str, name: str) -> int:
+        """Looks a corner up by (a part of) its name, e.g. corner_id("spa", "La Source") -> 1001."""
+        row = self.conn.execute(
+            "SELECT corner_id FROM corners WHERE track = ? AND name LIKE ? ORDER BY corner_id LIMIT 1",
+            (track, f"%{name}%")
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"no corner '{name}' on track '{track}'")
+        return row["corner_id"]
+
+    @staticmethod
+    def _filters(track: str, car: str | None, session: str | None) -> tuple[str, list]:
+        where = ["track = ?"]
+        params = [track]
+        if car is not None:
+            where.append("car = ?")
+            params.append(car)
+        if session is not None:
+            where.append("session = ?")
+            params.append(session)
+        return " AND ".join(where), params
+
+    def best_corner_metric(self, track: str, corner: int | str, field: str, car: str | None = None,
+                           session: str | None = None, last_n_laps: int | None = None,
+                           how: str = "max") -> tuple[float, int] | None:
+        """Best value of one CornerMetrics field, e.g. the best La Source exit speed over the last 500 laps:
+        best_corner_metric("spa", "La Source", "exit_speed_kmh", car="ferrari_296_gt3", last_n_laps=500)
+
+        :param corner: corner_id or (a part of) the corner name
+        :param field: CornerMetrics field
+        :param last_n_laps: only look at the newest n laps of that corner
+        :param how: "max" or "min"
+        :return: (value, lap_id) or None if there are no laps
+        """
+        if field not in CORNER_METRIC_FIELDS:
+            raise ValueError(f"unknown corner metric '{field}'")
+        if how not in ("max", "min"):
+            raise ValueError(f"unknown aggregation '{how}'")
+        corner_id = corner if isinstance(corner, int) else self.corner_id(track, corner)
+
+        where, params = self._filters(track, car, session)
+        order = "DESC" if how == "max" else "ASC"
+        limit = "LIMIT ?" if last_n_laps is not None else ""
+        row = self.conn.execute(
+            f"SELECT {field} AS value, lap_id FROM ("
+            f"  SELECT {field}, lap_id FROM corner_metrics WHERE {where} AND corner_id = ? "
+            f"  ORDER BY lap_id DESC {limit}"
+            f") WHERE value IS NOT NULL ORDER BY value {order} LIMIT 1",
+            [*params, corner_id, *([last_n_laps] if last_n_laps is not None else [])]
+        ).fetchone()
+        return None if row is None else (row["value"], row["lap_id"])
+
+    def corner_history(self, track: str, corner: int | str, car: str | None = None, session: str | None = None,
+                       last_n_laps: int | None = None) -> pd.DataFrame:
+        """All stored metrics of one corner, newest lap first."""
+        corner_id = corner if isinstance(corner, int) else self.corner_id(track, corner)
+        where, params = self._filters(track, car, session)
+        limit = "LIMIT ?" if last_n_laps is not None else ""
+        return pd.read_sql_query(
+            f"SELECT * FROM corner_metrics WHERE {where} AND corner_id = ? ORDER BY lap_id DESC {limit}",
+            self.conn,
+            params=[*params, corner_id, *([last_n_laps] if last_n_laps is not None else [])]
+        )
+
+    def segment_history(self, track: str, segment_id: int, car: str | None = None, session: str | None = None,
+                        last_n_laps: int | None = None) -> pd.DataFrame:
+        """All stored metrics of one segment, newest lap first."""
+        where, params = self._filters(track, car, session)
+        limit = "LIMIT ?" if last_n_laps is not None else ""
+        return pd.read_sql_query(
+            f"SELECT * FROM segment_metrics WHERE {where} AND segment_id = ? ORDER BY lap_id DESC {limit}",
+            self.conn,
+            params=[*params, segment_id, *([last_n_laps] if last_n_laps is not None else [])]
+        )
+
+    def segment_times(self, track: str, car: str | None = None, session: str | None = None,
+                      last_n_laps: int | None = None) -> pd.DataFrame:
+        """Lap x segment time matrix (index lap_id, one column per segment_id), input for best_lap.best_segments()."""
+        where, params = self._filters(track, car, session)
+        limit = "LIMIT ?" if last_n_laps is not None else ""
+        laps = pd.read_sql_query(
+            f"SELECT lap_id FROM laps WHERE {where} ORDER BY lap_id DESC {limit}",
+            self.conn,
+            params=[*params, *([last_n_laps] if last_n_laps is not None else [])]
+        )
+        if laps.empty:
+            return pd.DataFrame()
+        times = pd.read_sql_query(
+            f"SELECT lap_id, segment_id, time_s FROM segment_metrics WHERE {where} AND lap_id >= ?",
+            self.conn,
+            params=[*params, int(laps["lap_id"].min())]
+        )
+        return times.pivot(index="lap_id", columns="segment_id", values="time_s")
+
+    def laps(self, track: str, car: str | None = None, session: str | None = None) -> pd.DataFrame:
+        """The stored laps, newest first."""
+        where, params = self._filters(track, car, session)
+        return pd.read_sql_query(f"SELECT * FROM laps WHERE {where} ORDER BY lap_id DESC", self.conn, params=params)
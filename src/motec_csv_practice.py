@@ -1,14 +1,20 @@
 import pandas as pd, numpy as np
 from pandas import DataFrame
 from logger import get_logger
+from profiling import span
 from lap_dataclasses import CornerMetrics
-import json
 from pathlib import Path
+from lap_cache import LapCache
+from resampling import resample_by_distance
+from track_model import TrackModel
 log = get_logger(to_console=False)
 
 file_path_user = "assets/MoTec/spa/Spa-ferrari_296_gt3-8-hotlap_2-17-880.csv"
 file_path_fastest_lap = "assets/MoTec/spa/Spa-ferrari_296_gt3-fastest_lap.csv"
 
+# MoTeC csv layout: 14 rows of session info, the channel names and one row with the units.
+MOTEC_HEADER_ROWS = 14
+
 class TelemetryAnalyzer:
     def __init__(self, lap_df: DataFrame):
         self.telemetry_lap_df = lap_df or pd.DataFrame()
@@ -44,111 +50,143 @@ class TelemetryAnalyzer:
         return apex_df
 
 class TelemetryLoader:
-    def __init__(self, base_dir: Path):
+    def __init__(self, base_dir: Path, cache_dir: Path | None = None, dtype=np.float64):
+        """
+        :param base_dir: folder that contains the 'assets' folder
+        :param cache_dir: optional folder for the on-disk lap cache. Without it every lap is parsed from the csv.
+        :param dtype: dtype of the resampled channels, np.float32 halves the memory of a lap
+        """
         self.telemetry_lap_df: pd.DataFrame | None = None
         self.base_dir = base_dir
+        self.cache = LapCache(cache_dir) if cache_dir else None
+        self.dtype = np.dtype(dtype)
 
     def telemetry_from_csv(self, hotlap_path: str, track: str) -> DataFrame | None:
-        """Loads the Telemetry from a MoTec csv file and validates it for further use."""
-        #base_dir = (Path(__file__).resolve().parent / "assets" / "MoTec")
-        def _get_file_paths(_track: str):
-            """
-
-            :param _track: Name of the racetrack
-            :return: segments_file_path, corners_file_path
-            """
-
-            try:
-                track_folder = self.base_dir / "assets"  / "MoTec" / _track.lower()
-                log.debug(f"track_folder: {track_folder}")
-                _segments_path = track_folder / f"{_track.lower()}_segments.json"
-                _corners_path = track_folder / f"{_track.lower()}_corners.json"
-                return _segments_path, _corners_path
-
-            except Exception as e:
-                print(f"Segmente und Corners konnten nicht geladen werden! {e}")
-                return ""
+        """Loads the Telemetry from a MoTec csv file and validates it for further use.
+        The lap gets the integer columns 'segment_id' and 'corner_id', details come from the TrackModel."""
+        track_model = TrackModel.for_track(self.base_dir, track)
+        orig_hotlap_path = self.base_dir / hotlap_path
 
-        segments_path, corners_path = _get_file_paths(track)
-        segments_df, corners_df  = self._load_map(segments_path, corners_path)
+        cache_key = None
+        if self.cache:
+            with span("loader.cache_load"):
+                cache_key = LapCache.key_for(orig_hotlap_path, track_model.segments_path, track_model.corners_path,
+                                             salt=f"step=1.0|{self.dtype}")
+                cached_df = self.cache.load(cache_key)
+            if cached_df is not None:
+                self.telemetry_lap_df = cached_df
+                return cached_df
 
         # Red the telemetry.csv
-        orig_hotlap_path = self.base_dir / hotlap_path
+        with span("loader.read_csv"):
+            _telemetry_df = self._read_motec_csv(orig_hotlap_path)
+        with span("loader.resample", rows=len(_telemetry_df)):
+            telemetry_df = self._resample_df(_telemetry_df, dtype=self.dtype)
+        with span("loader.track_join"):
+            full_telemetry_df = track_model.apply(telemetry_df)
 
-        _telemetry_df = pd.read_csv(orig_hotlap_path, skiprows=14).drop(0)
-        telemetry_df = self._resample_df(_telemetry_df)
-
-        telemetry_df_sorted = telemetry_df.sort_values("Distance")
-        # merge the segments with the telemetry
-        telemetry_with_segments_df = pd.merge_asof(
-            left=telemetry_df_sorted,
-            right=segments_df,
-            left_on="Distance",
-            right_on="segmentStart_m",
-            direction="backward"
-        )
-        # Add the corners on top
-        full_telemetry_df = pd.merge_asof(
-            left=telemetry_with_segments_df,
-            right=corners_df,
-            left_on="Distance",
-            right_on="cornerStart_m",
-            direction="backward"
-        )
+        if cache_key:
+            with span("loader.cache_store"):
+                self.cache.store(cache_key, full_telemetry_df)
 
         self.telemetry_lap_df = full_telemetry_df
 
         return full_telemetry_df
 
-
     @staticmethod
-    def _load_map(file_path_segments, file_path_corners) -> tuple[pd.DataFrame, pd.DataFrame]:
-        """
-        Loads the segments- and corners-JSON to a DataFrame and returns it as a tuple
-        :param file_path_segments:
-        :param file_path_corners:
-        :return: segments_df, corners_df
-        """
-        with open(file_path_segments, "r") as f:
-            segments = json.load(f)
-        with open(file_path_corners, "r") as f:
-            corners = json.load(f)
+    def _read_motec_csv(file_path: Path) -> DataFrame:
+        """Reads a MoTeC csv export. The units row is skipped while parsing, so the channels come out numeric."""
+        return pd.read_csv(file_path, skiprows=[*range(MOTEC_HEADER_ROWS), MOTEC_HEADER_ROWS + 1])
 
-        corners_df = pd.json_normalize(corners["corners"])
-        corners_df_sorted = corners_df.sort_values('cornerStart_m')
+    @staticmethod
+    def _resample_df(lap_data: DataFrame, step=1.0, dtype=np.float64) -> pd.DataFrame:
+        """Resamples the samplerate the length of the racetrack."""
+        return resample_by_distance(lap_data, step=step, dtype=dtype)
 
-        segments_df = pd.json_normalize(segments["segments"])
-        segments_df_sorted = segments_df.sort_values("segmentStart_m")
+class StintReader:
+    def __init__(self, loader: TelemetryLoader, chunksize: int = 50_000, wrap_tolerance_m: float = 50.0):
+        """Reads multi-lap MoTeC exports (e.g. a whole stint) chunk by chunk and yields one lap at a time.
 
-        return segments_df_sorted, corners_df_sorted
+        Only the current lap and one csv chunk are kept in memory, so the file size does not matter.
 
-    @staticmethod
-    def _resample_df(lap_data: DataFrame, step=1.0) -> pd.DataFrame:
-        """Resamples the samplerate the length of the racetrack."""
-        telemetry = lap_data.copy()
-        telemetry["Distance"] = pd.to_numeric(telemetry["Distance"], errors="coerce")
-        telemetry = telemetry.dropna(subset=["Distance"]).sort_values("Distance")
+        :param loader: TelemetryLoader that provides base_dir, the track maps and the resampling dtype
+        :param chunksize: number of csv rows parsed at once
+        :param wrap_tolerance_m: a drop of 'Distance' larger than this starts a new lap
+        """
+        self.loader = loader
+        self.chunksize = chunksize
+        self.wrap_tolerance_m = wrap_tolerance_m
 
-        track_distance = telemetry["Distance"].astype(float).values
+    def iter_laps(self, stint_path: str, track: str):
+        """Generator over all laps of a stint export.
 
-        start_meter = int(np.floor(track_distance.min()))
-        end_meter = int(np.ceil(track_distance.max()))
-        meter_grid = np.arange(start_meter, end_meter, step)
+        A new lap starts where LAP_BEACON rises from 0 or where 'Distance' wraps back to zero.
+        Time of every lap is rebased to start at 0, a session-cumulative Distance is rebased as well.
 
-        resampled_data = {"Distance": meter_grid}
+        :param stint_path: path of the csv, relative to the loader's base_dir
+        :param track: Name of the racetrack
+        :return: resampled, track-joined lap DataFrames in the order they were driven
+        """
+        track_model = TrackModel.for_track(self.loader.base_dir, track)
 
-        for col in telemetry:
-            if col == "Distance":
+        for raw_lap in self._iter_raw_laps(self.loader.base_dir / stint_path, track_model.track_length_m):
+            if len(raw_lap) < 2:
                 continue
-            channel_values = pd.to_numeric(telemetry[col], errors="coerce")
-            resampled_data[col] = np.interp(
-                meter_grid.astype(float),
-                track_distance,
-                channel_values)
+            with span("loader.resample", rows=len(raw_lap)):
+                telemetry_df = TelemetryLoader._resample_df(raw_lap, dtype=self.loader.dtype)
+            with span("loader.track_join"):
+                full_telemetry_df = track_model.apply(telemetry_df)
+            yield full_telemetry_df
+
+    def _iter_raw_laps(self, file_path: Path, track_length_m: float):
+        """Splits the raw samples of the csv into laps, still in the original sample rate."""
+        reader = pd.read_csv(
+            file_path,
+            skiprows=[*range(MOTEC_HEADER_ROWS), MOTEC_HEADER_ROWS + 1],
+            chunksize=self.chunksize
+        )
+
+        pending: list[DataFrame] = []
+        prev_distance = np.nan
+        prev_beacon = 0.0
+
+        for chunk in reader:
+            distance = pd.to_numeric(chunk["Distance"], errors="coerce").to_numpy(dtype=float)
+            wraps = np.diff(distance, prepend=prev_distance) < -self.wrap_tolerance_m
+
+            if "LAP_BEACON" in chunk:
+                beacon = pd.to_numeric(chunk["LAP_BEACON"], errors="coerce").fillna(0).to_numpy(dtype=float)
+                rises = (beacon > 0) & (np.concatenate(([prev_beacon], beacon[:-1])) <= 0)
+                prev_beacon = beacon[-1]
+            else:
+                rises = np.zeros(len(chunk), dtype=bool)
+
+            prev_distance = distance[-1]
+
+            start = 0
+            for boundary in np.flatnonzero(wraps | rises):
+                pending.append(chunk.iloc[start:boundary])
+                yield self._finish_lap(pending, track_length_m)
+                pending = []
+                start = boundary
+            pending.append(chunk.iloc[start:])
+
+        yield self._finish_lap(pending, track_length_m)
+
+    def _finish_lap(self, pieces: list[DataFrame], track_length_m: float) -> DataFrame:
+        lap_df = pd.concat(pieces, ignore_index=True)
+        if lap_df.empty:
+            return lap_df
+        lap_df["Distance"] = pd.to_numeric(lap_df["Distance"], errors="coerce")
+        # Only a session-cumulative Distance (longer than the track) is rebased to the lap start. Out-laps and
+        # laps that start mid-track keep their distance, it already is the position on the track.
+        if lap_df["Distance"].max() > track_length_m + self.wrap_tolerance_m:
+            lap_df["Distance"] -= lap_df["Distance"].iloc[0]
+        if "Time" in lap_df:
+            lap_df["Time"] = pd.to_numeric(lap_df["Time"], errors="coerce")
+            lap_df["Time"] -= lap_df["Time"].iloc[0]
+        return lap_df
 
-        df_out = pd.DataFrame(resampled_data)
-        df_out["Distance"] = df_out["Distance"].astype(int)
-        return df_out
 
 if __name__ == "__main__":
 
@@ -160,4 +198,4 @@ if __name__ == "__main__":
     #record_df.to_csv("record_telemetry.csv", index=False, encoding="utf-8")
     #user_df.to_csv("user_telemetry.csv", index=False, encoding="utf-8")
 
-    print(user_df.info())
+    log.debug("user lap: %d rows, %d channels", *user_df.shape)
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+
+class DistanceResampler:
+    def __init__(self, distance: np.ndarray, meter_grid: np.ndarray):
+        """Precomputes the linear interpolation from the (sorted) sample distances onto the meter grid.
+
+        The neighbour indices and weights only depend on the two distance arrays, so they are computed once
+        and then reused for every channel. The result is identical to calling np.interp per channel.
+
+        :param distance: sorted distances of the raw samples
+        :param meter_grid: target distances
+        """
+        distance = np.asarray(distance, dtype=np.float64)
+        grid = np.asarray(meter_grid, dtype=np.float64)
+        if len(distance) < 2:
+            raise ValueError("At least two samples are needed to resample a lap.")
+
+        left = np.searchsorted(distance, grid, side="right") - 1
+        left = np.clip(left, 0, len(distance) - 2)
+        right = left + 1
+
+        span = distance[right] - distance[left]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = np.where(span > 0, (grid - distance[left]) / span, 0.0)
+
+        # np.interp clamps to the first/last sample outside of the recorded range
+        weight = np.where(grid <= distance[0], 0.0, weight)
+        weight = np.where(grid >= distance[-1], 1.0, weight)
+
+        self.left = left
+        self.right = right
+        self.weight = weight
+
+    def apply(self, channels: np.ndarray, dtype=np.float64) -> np.ndarray:
+        """Resamples all channels of a (samples x channels) matrix in one gather.
+
+        :param channels: numeric matrix, one column per channel, rows in the same order as the distances
+        :param dtype: dtype of the returned matrix, e.g. np.float32 to halve the memory
+        :return: (grid x channels) matrix
+        """
+        values = np.asarray(channels, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, None]
+
+        left_values = values[self.left]
+        right_values = values[self.right]
+        weight = self.weight[:, None]
+
+        resampled = left_values + weight * (right_values - left_values)
+        # Exact hits keep the sample value, even if the neighbour is NaN (same as np.interp).
+        resampled = np.where(weight == 0.0, left_values, resampled)
+        resampled = np.where(weight == 1.0, right_values, resampled)
+
+        return resampled.astype(dtype, copy=False)
+
+
+def to_channel_matrix(telemetry: DataFrame) -> np.ndarray:
+    """Converts all channels of a telemetry DataFrame to one float64 matrix.
+    Non-numeric cells become NaN, just like pd.to_numeric(..., errors='coerce')."""
+    try:
+        return telemetry.to_numpy(dtype=np.float64)
+    except (TypeError, ValueError):
+        return telemetry.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def resample_by_distance(lap_data: DataFrame, step=1.0, dtype=np.float64) -> DataFrame:
+    """Resamples every channel of a lap onto a regular distance grid.
+
+    :param lap_data: raw telemetry with a 'Distance' column
+    :param step: grid step in meters
+    :param dtype: dtype of the resampled channels (np.float64 or np.float32)
+    :return: DataFrame with an int 'Distance' column followed by all other channels
+    """
+    track_distance = pd.to_numeric(lap_data["Distance"], errors="coerce").to_numpy(dtype=np.float64)
+    valid = ~np.isnan(track_distance)
+    order = np.argsort(track_distance[valid], kind="stable")
+    track_distance = track_distance[valid][order]
+
+    channel_names = [col for col in lap_data.columns if col != "Distance"]
+    channels = to_channel_matrix(lap_data[channel_names])[valid][order]
+
+    start_meter = int(np.floor(track_distance.min()))
+    end_meter = int(np.ceil(track_distance.max()))
+    meter_grid = np.arange(start_meter, end_meter, step)
+
+    resampled = DistanceResampler(track_distance, meter_grid).apply(channels, dtype=dtype)
+
+    df_out = pd.DataFrame(resampled, columns=channel_names)
+    df_out.insert(0, "Distance", meter_grid.astype(int))
+    return df_out
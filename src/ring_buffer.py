@@ -0,0 +1,78 @@
+import numpy as np
+
+# Channels the live analysis keeps a history of
+HISTORY_CHANNELS = [
+    "Time", "Distance", "SPEED", "BRAKE", "THROTTLE", "G_LAT", "G_LON", "ROTY", "STEERANGLE",
+    "SUS_TRAVEL_LF", "SUS_TRAVEL_RF", "SUS_TRAVEL_LR", "SUS_TRAVEL_RR",
+    "WHEEL_SPEED_LF", "WHEEL_SPEED_RF", "WHEEL_SPEED_LR", "WHEEL_SPEED_RR",
+]
+
+
+class ChannelRingBuffer:
+    def __init__(self, channels: list[str] = HISTORY_CHANNELS, capacity: int = 4096, dtype=np.float64):
+        """Preallocated history of the last `capacity` samples, one column per channel.
+
+        Every sample is written twice, at i and i + capacity. That way the last n samples are always one
+        contiguous block of the storage and every window is a zero-copy view, no matter where the write
+        position currently is. Appending never allocates.
+
+        :param channels: channel names, "Time" and "Distance" are needed for the windowed views
+        :param capacity: number of samples that are kept
+        :param dtype: dtype of the storage
+        """
+        self.channels = list(channels)
+        self.columns = {name: idx for idx, name in enumerate(self.channels)}
+        self.capacity = capacity
+        self._data = np.full((2 * capacity, len(self.channels)), np.nan, dtype=dtype)
+        self._next = 0          # write position in [0, capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, sample: dict[str, float]) -> None:
+        """Adds one sample. Channels missing in the sample are stored as NaN."""
+        row = self._data[self._next]
+        for name, idx in self.columns.items():
+            row[idx] = sample.get(name, np.nan)
+        self._data[self._next + self.capacity] = row
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def append_row(self, values: np.ndarray) -> None:
+        """Adds one sample given as an array in channel order (faster than append)."""
+        self._data[self._next] = values
+        self._data[self._next + self.capacity] = values
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def last(self, n: int | None = None) -> np.ndarray:
+        """View of the last n samples (oldest first) as a (n x channels) matrix."""
+        n = self._size if n is None else min(n, self._size)
+        end = self._next + self.capacity
+        return self._data[end - n:end]
+
+    def channel(self, name: str, n: int | None = None) -> np.ndarray:
+        """View of the last n values of one channel."""
+        return self.last(n)[:, self.columns[name]]
+
+    def _window(self, axis_channel: str, span: float) -> np.ndarray:
+        window = self.last()
+        axis = window[:, self.columns[axis_channel]]
+        if len(axis) == 0:
+            return window
+        # Time/Distance grow monotonically inside one lap, so the window start is a binary search
+        start = np.searchsorted(axis, axis[-1] - span, side="left")
+        return window[start:]
+
+    def window_by_time(self, seconds: float) -> np.ndarray:
+        """View of all samples of the last `seconds` seconds."""
+        return self._window("Time", seconds)
+
+    def window_by_distance(self, meters: float) -> np.ndarray:
+        """View of all samples of the last `meters` meters. Call clear() on a new lap, Distance restarts at 0."""
+        return self._window("Distance", meters)
+
+    def clear(self) -> None:
+        self._next = 0
+        self._size = 0
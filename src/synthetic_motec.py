@@ -0,0 +1,201 @@
+import argparse
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+
+import numpy as np
+import pandas as pd
+from motec_csv_practice import MOTEC_HEADER_ROWS
+from resampling import DistanceResampler
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+
+# resampled Spa laps that ship with the repo, the templates of every synthetic lap
+BUNDLED_LAPS = ["record_telemetry.csv", "user_telemetry.csv"]
+
+# columns the old map join added to the bundled laps, they are not MoTeC channels
+MAP_COLUMNS = {
+    "segment_id", "segment_id_x", "segment_id_y", "segmentDescription", "segmentStart_m", "segmentEnd_m",
+    "corner_ids", "corner_id", "cornerName", "cornerDescription", "cornerStart_m", "cornerApex_m", "cornerEnd_m",
+}
+
+# units row of the export, channels that are not listed get an empty unit
+CHANNEL_UNITS = {
+    "Distance": "m", "Time": "s", "SPEED": "km/h", "THROTTLE": "%", "BRAKE": "%", "CLUTCH": "%",
+    "G_LAT": "G", "G_LON": "G", "ROTY": "deg/s", "STEERANGLE": "deg", "RPMS": "rpm",
+    "SUS_TRAVEL_LF": "mm", "SUS_TRAVEL_RF": "mm", "SUS_TRAVEL_LR": "mm", "SUS_TRAVEL_RR": "mm",
+    "WHEEL_SPEED_LF": "km/h", "WHEEL_SPEED_RF": "km/h", "WHEEL_SPEED_LR": "km/h", "WHEEL_SPEED_RR": "km/h",
+    "BRAKE_TEMP_LF": "C", "BRAKE_TEMP_RF": "C", "BRAKE_TEMP_LR": "C", "BRAKE_TEMP_RR": "C",
+    "TYRE_PRESS_LF": "psi", "TYRE_PRESS_RF": "psi", "TYRE_PRESS_LR": "psi", "TYRE_PRESS_RR": "psi",
+}
+
+SPEED_NOISE = 0.02          # +- share of the speed trace, varies smoothly along the lap
+THROTTLE_NOISE = 0.05       # +- share of partial throttle
+BRAKE_SHIFT_M = 8.0         # standard deviation of the brake point shift in meters
+NOISE_KNOT_M = 200.0        # distance between the knots of the smooth noise
+SAMPLE_RATES_HZ = (20.0, 120.0)
+
+
+def load_bundled_laps() -> list[pd.DataFrame]:
+    """The bundled laps without the columns of the old map join."""
+    laps = []
+    for name in BUNDLED_LAPS:
+        lap_df = pd.read_csv(SRC_DIR / name)
+        laps.append(lap_df[[c for c in lap_df.columns
+                            if c not in MAP_COLUMNS and pd.api.types.is_numeric_dtype(lap_df[c])]])
+    return laps
+
+
+def _brake_zones(brake: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) row of every run of BRAKE > 0."""
+    edges = np.diff(np.concatenate(([0], (brake > 0).astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+class SyntheticLapGenerator:
+    def __init__(self, base_laps: list[pd.DataFrame] | None = None, seed: int | None = 0,
+                 speed_noise: float = SPEED_NOISE, throttle_noise: float = THROTTLE_NOISE,
+                 brake_shift_m: float = BRAKE_SHIFT_M, sample_rates_hz: tuple[float, float] = SAMPLE_RATES_HZ):
+        """Produces raw laps that look like MoTeC exports by perturbing real laps.
+
+        Every lap starts from one of the base laps on its 1 m grid. The speed and partial throttle are scaled by
+        smooth noise, every brake zone is moved by a random number of meters, the time is integrated again from the
+        new speed and finally all channels are sampled at a random constant sample rate.
+
+        :param base_laps: resampled laps with at least Distance, Time, SPEED, BRAKE and THROTTLE,
+                          defaults to the bundled Spa laps
+        :param seed: seed of the random generator, None for a different session every time
+        :param speed_noise: maximal relative change of the speed
+        :param throttle_noise: maximal relative change of partial throttle
+        :param brake_shift_m: standard deviation of the brake point shift
+        :param sample_rates_hz: range the sample rate of every lap is drawn from
+        """
+        self.base_laps = base_laps if base_laps is not None else load_bundled_laps()
+        self.channels = [c for c in self.base_laps[0].columns if all(c in lap.columns for lap in self.base_laps)]
+        self.rng = np.random.default_rng(seed)
+        self.speed_noise = speed_noise
+        self.throttle_noise = throttle_noise
+        self.brake_shift_m = brake_shift_m
+        self.sample_rates_hz = sample_rates_hz
+
+    def _smooth_noise(self, distance: np.ndarray, amplitude: float) -> np.ndarray:
+        knots = np.arange(distance[0], distance[-1] + NOISE_KNOT_M, NOISE_KNOT_M)
+        return np.interp(distance, knots, self.rng.uniform(-amplitude, amplitude, len(knots)))
+
+    def _shift_brake_zones(self, distance: np.ndarray, brake: np.ndarray) -> np.ndarray:
+        """Moves every brake zone along the track. Positive shifts brake later."""
+        source = distance.copy()
+        starts, ends = _brake_zones(brake)
+        for start, end in zip(starts, ends):
+            shift = self.rng.normal(0.0, self.brake_shift_m)
+            # the zone is read from 'shift' meters earlier, including the run-up to it
+            lo = max(start - int(abs(shift)) - 1, 0)
+            hi = min(end + int(abs(shift)) + 1, len(distance))
+            source[lo:hi] = distance[lo:hi] - shift
+        return np.interp(source, distance, brake)
+
+    def lap(self, base: int | None = None) -> pd.DataFrame:
+        """One synthetic lap in the raw sample rate.
+
+        :param base: index of the base lap, random if None
+        :return: DataFrame with the channels of the base laps, Time and Distance start at 0
+        """
+        base_df = self.base_laps[self.rng.integers(len(self.base_laps)) if base is None else base]
+        values = base_df[self.channels].to_numpy(dtype=np.float64, copy=True)
+        col = {name: idx for idx, name in enumerate(self.channels)}
+
+        distance = values[:, col["Distance"]] - values[0, col["Distance"]]
+        values[:, col["Distance"]] = distance
+
+        speed = values[:, col["SPEED"]] * (1 + self._smooth_noise(distance, self.speed_noise))
+        values[:, col["SPEED"]] = speed
+
+        throttle = values[:, col["THROTTLE"]]
+        partial = throttle < 100
+        throttle[partial] *= 1 + self._smooth_noise(distance, self.throttle_noise)[partial]
+        values[:, col["THROTTLE"]] = np.clip(throttle, 0, 100)
+
+        values[:, col["BRAKE"]] = np.clip(self._shift_brake_zones(distance, values[:, col["BRAKE"]]), 0, 100)
+
+        # time from the new speed, meter by meter
+        speed_ms = np.maximum(speed, 1.0) / 3.6
+        time = np.concatenate(([0.0], np.cumsum(np.diff(distance) / speed_ms[:-1])))
+        values[:, col["Time"]] = time
+
+        rate = self.rng.uniform(*self.sample_rates_hz)
+        time_grid = np.arange(0.0, time[-1], 1.0 / rate)
+        raw = DistanceResampler(time, time_grid).apply(values)
+        return pd.DataFrame(raw, columns=self.channels)
+
+    def laps(self, n_laps: int) -> Iterator[pd.DataFrame]:
+        for _ in range(n_laps):
+            yield self.lap()
+
+
+def _write_header(f: TextIO, channels: list[str], venue: str, vehicle: str, duration_s: float, rate: str) -> None:
+    info = [["Format", "MoTeC CSV File"], ["Venue", venue], ["Vehicle", vehicle], ["Driver", ""],
+            ["Device", "ACC"], ["Comment", "synthetic"], ["Log Date", ""], ["Log Time", ""],
+            ["Sample Rate", rate], ["Duration", f"{duration_s:.3f}"], ["Range", "entire outing"],
+            ["Beacon Markers", ""], [], []]
+    assert len(info) == MOTEC_HEADER_ROWS
+    for row in info:
+        f.write(",".join(f'"{cell}"' for cell in row) + "\n")
+    f.write(",".join(f'"{c}"' for c in channels) + "\n")
+    f.write(",".join(f'"{CHANNEL_UNITS.get(c, "")}"' for c in channels) + "\n")
+
+
+def write_motec_csv(lap_df: pd.DataFrame, file_path: Path, venue: str = "spa",
+                    vehicle: str = "ferrari_296_gt3") -> None:
+    """Writes one lap in the layout of a MoTeC csv export: 14 rows of session info, channel names, units."""
+    rate = 1.0 / np.median(np.diff(lap_df["Time"])) if len(lap_df) > 1 else 0.0
+    with open(file_path, "w", encoding="utf-8", newline="") as f:
+        _write_header(f, list(lap_df.columns), venue, vehicle, float(lap_df["Time"].iloc[-1]), f"{rate:.0f}")
+        lap_df.to_csv(f, header=False, index=False, float_format="%.10g")
+
+
+def write_stint(laps: Iterable[pd.DataFrame], file_path: Path, venue: str = "spa",
+                vehicle: str = "ferrari_296_gt3") -> int:
+    """Writes many laps into one MoTeC export, the way StintReader expects a stint.
+
+    Time runs on over the whole stint (every lap starts one sample interval after the last sample of the lap before,
+    so Time stays strictly increasing), Distance restarts every lap and LAP_BEACON marks the first sample of every
+    lap after the first. Laps are written one by one, so the stint can be of any size.
+
+    :return: number of written laps
+    """
+    n_laps = 0
+    lap_start = 0.0
+    with open(file_path, "w", encoding="utf-8", newline="") as f:
+        for lap_df in laps:
+            lap_df = lap_df.copy()
+            lap_df["Time"] += lap_start
+            if "LAP_BEACON" in lap_df:
+                lap_df["LAP_BEACON"] = 0.0
+                if n_laps:
+                    lap_df.loc[0, "LAP_BEACON"] = 1.0
+            if not n_laps:
+                # the duration is unknown until the last lap, MoTeC leaves it empty for live exports as well
+                _write_header(f, list(lap_df.columns), venue, vehicle, 0.0, "")
+            lap_df.to_csv(f, header=False, index=False, float_format="%.10g")
+            lap_start = float(lap_df["Time"].iloc[-1])
+            if len(lap_df) > 1:
+                lap_start += float(np.median(np.diff(lap_df["Time"])))
+            n_laps += 1
+    return n_laps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Writes synthetic MoTeC laps based on the bundled Spa laps.")
+    parser.add_argument("output", type=Path, help="csv file (with --stint) or folder for single-lap files")
+    parser.add_argument("--laps", type=int, default=10)
+    parser.add_argument("--stint", action="store_true", help="write all laps into one stint file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generator = SyntheticLapGenerator(seed=args.seed)
+    if args.stint:
+        write_stint(generator.laps(args.laps), args.output)
+    else:
+        args.output.mkdir(parents=True, exist_ok=True)
+        for lap_no, lap in enumerate(generator.laps(args.laps)):
+            write_motec_csv(lap, args.output / f"synthetic_lap_{lap_no:05d}.csv")
@@ -1,4 +1,6 @@
+from dataclasses import replace
 from lap_dataclasses import Corner, CornerMetrics
+from distance_index import DistanceIndex
 import pandas as pd
 import numpy as np
 from logger import get_logger
@@ -7,12 +9,12 @@ log = get_logger("telemetry_analyzer", to_console=False)
 
 class Analyze:
     def __init__(self, df: pd.DataFrame):
-        self.corner_metrics = CornerMetrics
         self.lap_df = df
+        self.distance_index = DistanceIndex(df["Distance"], df["Time"])
 
     def _get_df_from_corner(self, corner: Corner) -> pd.DataFrame:
-        _start = Corner.start_m
-        _end = Corner.end_m
+        _start = corner.start_m
+        _end = corner.end_m
 
         corner_df = self.lap_df[(self.lap_df["Distance"] >= _start) & (self.lap_df["Distance"] <= _end)]
 
@@ -23,14 +25,9 @@ class Analyze:
 
 
 
-    def get_time_delta(self,start_m: int, end_m: int):
-        time_start_df =  self.lap_df[self.lap_df["Distance"] == start_m]
-        time_start = time_start_df["Time"].iloc[0]
-
-        time_end_df = self.lap_df[self.lap_df["Distance"] == end_m]
-        time_end = time_end_df["Time"].iloc[0]
-
-        return time_end - time_start
+    def get_time_delta(self, start_m: float, end_m: float):
+        """Time from start_m to end_m in seconds. Fractional meters are interpolated."""
+        return self.distance_index.time_delta(start_m, end_m)
 
     def delta_m(self, a, b) -> float:
 
@@ -76,51 +73,47 @@ class Analyze:
 
         return trail_brake_delta_s, trail_brake_delta_m
 
-    def corner(self, corner_df: pd.DataFrame):
-        c = Corner
-        c.name = corner_df["cornerName"].iloc[0]
-        c.id = corner_df["corner_id"]
-        c.start_m = corner_df["cornerEnd_m"].iloc[0]
-        c.apex_m = corner_df["cornerApex_m"].iloc[0]
-        c.end_m = corner_df["cornerStart_m"].iloc[0]
-
-        cm = CornerMetrics
-        # Speed Measurements
-        cm.time_delta_s = self.get_time_delta(int(c.start_m), int(c.end_m))
-
-        cm.entry_speed_kmh = corner_df["SPEED"].iloc[0]
-        cm.exit_speed_kmh = corner_df["SPEED"].iloc[1]
-        cm.apex_speed_kmh = corner_df[corner_df["Distance"] == c.apex_m]["SPEED"]
-        cm.avg_speed_kmh = corner_df["SPEED"].mean()
-        cm.max_speed_kmh = corner_df["SPEED"].max()
-        cm.min_speed_kmh = corner_df["SPEED"].min()
-        cm.min_speed_m = corner_df[corner_df["SPEED"] == cm.min_speed_kmh]["Distance"]
-
-        # G-Forces
-        cm.g_lat_avg = corner_df["G_LAT"].mean()
-        cm.g_lat_max = corner_df["G_LAT"].max()
-        cm.g_lat_min = corner_df["G_LAT"].min()
-        cm.g_long_avg = corner_df["G_LONG"].mean()
-        cm.g_long_max = corner_df["G_LONG"].max()
-        cm.g_long_min = corner_df["G_LONG"].min()
-
-        # Driver's Input
-        cm.avg_steerangle = corner_df["STEERANGLE"].mean()
-        cm.max_steerangle = corner_df["STEERANGLE"].max()
-        cm.max_steerangle_m = corner_df[corner_df["STEERANGLE"] == cm.max_steerangle]["Distance"]
-
-        cm.avg_brake = corner_df["BRAKE"].mean()
-        cm.max_brake = corner_df["BRAKE"].max()
-
-        cm.avg_throttle = corner_df["THROTTLE"].mean()
-
-        _trail_brake_delta = self._trail_brake_delta(corner_df)
-        cm.trail_brake_delta_s = _trail_brake_delta[0]
-        cm.trail_brake_delta_m = _trail_brake_delta[1]
-
-        _break_point = self.get_breakpoint(c)
-
-        c.corner_metrics = cm
-        print("--> corner_metrics")
-        #print(self.corner_metrics.max_brake)
-        return c
\ No newline at end of file
+    def corner(self, corner_df: pd.DataFrame, corner: Corner) -> Corner:
+        """Computes the CornerMetrics of one corner and returns a copy of the corner that carries them.
+        For all corners of a lap at once use CornerEngine."""
+        def _distance_where(mask: pd.Series) -> float:
+            hits = corner_df.loc[mask, "Distance"]
+            return float(hits.iloc[0]) if not hits.empty else np.nan
+
+        apex_rows = corner_df[corner_df["Distance"] == corner.apex_m]
+        trail_brake_delta_s, trail_brake_delta_m = self._trail_brake_delta(corner_df)
+
+        cm = CornerMetrics(
+            # Speed Measurements
+            time_delta_s=self.get_time_delta(corner.start_m, corner.end_m),
+            entry_speed_kmh=corner_df["SPEED"].iloc[0],
+            apex_speed_kmh=apex_rows["SPEED"].iloc[0] if not apex_rows.empty else np.nan,
+            exit_speed_kmh=corner_df["SPEED"].iloc[-1],
+            avg_speed_kmh=corner_df["SPEED"].mean(),
+            max_speed_kmh=corner_df["SPEED"].max(),
+            min_speed_kmh=corner_df["SPEED"].min(),
+            min_speed_m=_distance_where(corner_df["SPEED"] == corner_df["SPEED"].min()),
+
+            # G-Forces
+            g_lat_avg=corner_df["G_LAT"].mean(),
+            g_lat_max=corner_df["G_LAT"].max(),
+            g_lat_min=corner_df["G_LAT"].min(),
+            g_long_avg=corner_df["G_LON"].mean(),
+            g_long_max=corner_df["G_LON"].max(),
+            g_long_min=corner_df["G_LON"].min(),
+
+            # Driver's Input
+            avg_steerangle=corner_df["STEERANGLE"].mean(),
+            max_steerangle=corner_df["STEERANGLE"].max(),
+            max_steerangle_m=_distance_where(corner_df["STEERANGLE"] == corner_df["STEERANGLE"].max()),
+
+            avg_brake=corner_df["BRAKE"].mean(),
+            max_brake=corner_df["BRAKE"].max(),
+
+            avg_throttle=corner_df["THROTTLE"].mean(),
+
+            trail_brake_delta_s=trail_brake_delta_s,
+            trail_brake_delta_m=trail_brake_delta_m
+        )
+
+        return replace(corner, corner_metrics=cm)
@@ -2,12 +2,122 @@ from lap_dataclasses import Segment,Corner
 from pathlib import Path
 import json
 
+import numpy as np
+import pandas as pd
+
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 
+# id used in the index for meters that belong to no segment / no corner
+NO_ID = 0
+
+# Compiled tracks: resolved segments path -> (mtime_ns of both map files, model). A changed map replaces its entry.
+_TRACK_CACHE: dict[str, tuple[tuple[int, int], "TrackModel"]] = {}
+
+
+def map_paths(base_dir: Path, track: str) -> tuple[Path, Path]:
+    """
+
+    :param base_dir: folder that contains the 'assets' folder
+    :param track: Name of the racetrack
+    :return: segments_file_path, corners_file_path
+    """
+    track_folder = Path(base_dir) / "assets" / "MoTec" / track.lower()
+    return track_folder / f"{track.lower()}_segments.json", track_folder / f"{track.lower()}_corners.json"
+
+
 class TrackModel:
+    def __init__(self, segments_path: Path, corners_path: Path):
+        """Compiled track map: segments, corners and an index that maps every meter of the track
+        to its segment_id and corner_id.
+
+        Use TrackModel.for_track() to get the cached instance of a track.
+        """
+        self.segments_path = Path(segments_path)
+        self.corners_path = Path(corners_path)
+
+        with open(self.segments_path, "r", encoding="utf-8") as f:
+            segments = json.load(f)
+        with open(self.corners_path, "r", encoding="utf-8") as f:
+            corners = json.load(f)
+
+        self.track = segments.get("track", "")
+        self.segments: dict[int, Segment] = {
+            s["segment_id"]: Segment(
+                id=s["segment_id"],
+                name=s["segmentDescription"],
+                start_m=s["segmentStart_m"],
+                end_m=s["segmentEnd_m"],
+                corner_ids=tuple(s["corner_ids"])
+            )
+            for s in sorted(segments["segments"], key=lambda s: s["segmentStart_m"])
+        }
+        self.corners: dict[int, Corner] = {
+            c["corner_id"]: Corner(
+                id=c["corner_id"],
+                name=c["cornerName"],
+                start_m=c["cornerStart_m"],
+                apex_m=c["cornerApex_m"],
+                end_m=c["cornerEnd_m"],
+                segment_id=c["segment_id"]
+            )
+            for c in sorted(corners["corners"], key=lambda c: c["cornerStart_m"])
+        }
+
+        last_meter = max(
+            [segments.get("trackLength_m", 0)]
+            + [s.end_m for s in self.segments.values()]
+            + [c.end_m for c in self.corners.values()]
+        )
+        self.track_length_m = int(segments.get("trackLength_m", last_meter))
+
+        self.segment_index = np.full(int(last_meter) + 1, NO_ID, dtype=np.int32)
+        for segment in self.segments.values():
+            self.segment_index[int(segment.start_m):int(segment.end_m) + 1] = segment.id
+
+        # Corners include their end meter. Where two corners touch, the later corner owns the shared meter.
+        self.corner_index = np.full(int(last_meter) + 1, NO_ID, dtype=np.int32)
+        for corner in self.corners.values():
+            self.corner_index[int(corner.start_m):int(corner.end_m) + 1] = corner.id
+
+    @classmethod
+    def for_track(cls, base_dir: Path, track: str) -> "TrackModel":
+        """Returns the compiled model of a track. It is built once and rebuilt only if a map file changes."""
+        segments_path, corners_path = map_paths(base_dir, track)
+        key = str(segments_path.resolve())
+        mtimes = (segments_path.stat().st_mtime_ns, corners_path.stat().st_mtime_ns)
+        cached = _TRACK_CACHE.get(key)
+        if cached is None or cached[0] != mtimes:
+            cached = (mtimes, cls(segments_path, corners_path))
+            _TRACK_CACHE[key] = cached
+        return cached[1]
+
+    @staticmethod
+    def clear_cache() -> None:
+        """Drops every compiled track, the next for_track() builds it again."""
+        _TRACK_CACHE.clear()
+
+    def _meters(self, distance) -> np.ndarray:
+        meters = np.asarray(distance, dtype=np.float64).astype(np.int64)
+        return np.clip(meters, 0, len(self.segment_index) - 1)
 
+    def segment_ids(self, distance) -> np.ndarray:
+        """segment_id for every given distance in meters."""
+        return self.segment_index[self._meters(distance)]
 
+    def corner_ids(self, distance) -> np.ndarray:
+        """corner_id for every given distance in meters, NO_ID outside of corners."""
+        return self.corner_index[self._meters(distance)]
 
-    segment = Segment
+    def apply(self, lap_df: pd.DataFrame) -> pd.DataFrame:
+        """Adds the integer columns 'segment_id' and 'corner_id' to a resampled lap."""
+        meters = self._meters(lap_df["Distance"].to_numpy())
+        return lap_df.assign(
+            segment_id=self.segment_index[meters],
+            corner_id=self.corner_index[meters]
+        )
 
+    def segment(self, segment_id: int) -> Segment:
+        return self.segments[segment_id]
 
+    def corner(self, corner_id: int) -> Corner:
+        return self.corners[corner_id]
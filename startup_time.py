@@ -0,0 +1,90 @@
+"""Cold start time of the entry points.
+
+Every module is imported in a fresh interpreter, so nothing is cached in sys.modules. Reported is the median of
+the import itself and of the whole process (interpreter start + import + exit) over several runs.
+
+    PYTHONPATH=.:src python startup_time.py [--runs 5]
+
+The exit code is 1 if an import misses its target or loads one of the HEAVY_MODULES, which are only allowed to
+be imported on first use (Gemini SDK when the manager talks to the model, pandas when telemetry is loaded).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# module -> upper bound of the import in seconds
+STARTUP_TARGETS_S = {
+    "main": 0.15,               # CLI, up to the first prompt
+    "setup_parser": 0.02,       # setup getters of the manager tools
+    "specialists": 0.10,        # specialist tools incl. response cache
+}
+
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "openpyxl", "google.generativeai", "dotenv")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, runs: int = 5) -> dict:
+    """Median import and process time of one module over runs fresh interpreters."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(PROJECT_ROOT), str(PROJECT_ROOT / "src"), env.get("PYTHONPATH", "")])
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+
+    imports, processes, heavy = [], [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, env=env,
+                                capture_output=True, text=True, check=True)
+        processes.append(time.perf_counter() - started)
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        imports.append(probe["seconds"])
+        heavy = probe["heavy"]
+
+    return {
+        "module": module,
+        "import_ms": round(statistics.median(imports) * 1000, 1),
+        "process_ms": round(statistics.median(processes) * 1000, 1),
+        "target_ms": round(STARTUP_TARGETS_S[module] * 1000, 1),
+        "heavy_modules": heavy,
+    }
+
+
+def check(results: list[dict]) -> list[str]:
+    """One line per missed target or eagerly loaded heavy module."""
+    failures = []
+    for result in results:
+        if result["import_ms"] > result["target_ms"]:
+            failures.append(f"{result['module']}: import {result['import_ms']} ms > target {result['target_ms']} ms")
+        if result["heavy_modules"]:
+            failures.append(f"{result['module']}: imports {', '.join(result['heavy_modules'])} at startup")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the cold start of the entry points.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("modules", nargs="*", default=list(STARTUP_TARGETS_S))
+    args = parser.parse_args()
+
+    results = [measure(module, args.runs) for module in args.modules]
+    for result in results:
+        print(f"{result['module']:<16} import {result['import_ms']:>7.1f} ms (target {result['target_ms']:.0f} ms) "
+              f"| process {result['process_ms']:>7.1f} ms")
+
+    failures = check(results)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# the root modules and the src modules are imported by their plain names
+for path in (PROJECT_ROOT, PROJECT_ROOT / "src"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def spa():
+    from track_model import TrackModel
+
+    return TrackModel.for_track(PROJECT_ROOT / "src", "spa")
+
+
+@pytest.fixture(scope="session")
+def bundled_laps():
+    """The two resampled Spa laps that ship with the repo (record lap, user lap)."""
+    from synthetic_motec import load_bundled_laps
+
+    return load_bundled_laps()
+
+
+@pytest.fixture(scope="session")
+def motec_base_dir(tmp_path_factory, bundled_laps):
+    """base_dir with the Spa maps and both bundled laps as MoTeC exports (assets/MoTec/spa/record.csv, user.csv)."""
+    import shutil
+    from synthetic_motec import write_motec_csv
+
+    base_dir = tmp_path_factory.mktemp("motec")
+    track_dir = base_dir / "assets" / "MoTec" / "spa"
+    shutil.copytree(PROJECT_ROOT / "src" / "assets" / "MoTec" / "spa", track_dir)
+    write_motec_csv(bundled_laps[0], track_dir / "record.csv")
+    write_motec_csv(bundled_laps[1], track_dir / "user.csv")
+    return base_dir
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from best_lap import COVERAGE_TOLERANCE_M, theoretical_best_lap
+from resampling import resample_by_distance
+from synthetic_motec import SyntheticLapGenerator
+
+
+@pytest.fixture(scope="module")
+def laps(bundled_laps):
+    generator = SyntheticLapGenerator(bundled_laps, seed=5)
+    laps = [resample_by_distance(lap_df) for lap_df in generator.laps(6)]
+    # a lap cut by the stint reader covers only the first half of the track
+    laps[2] = laps[2][laps[2]["Distance"] < 3500].reset_index(drop=True)
+    return laps
+
+
+def _best_segments_per_lap(laps, track_model):
+    """Reference loop: every lap, every segment, np.interp at both boundaries."""
+    best, source = [], []
+    for segment in track_model.segments.values():
+        times = []
+        for lap_df in laps:
+            distance, time = lap_df["Distance"], lap_df["Time"]
+            if (segment.start_m < distance.iloc[0] - COVERAGE_TOLERANCE_M
+                    or segment.end_m > distance.iloc[-1] + COVERAGE_TOLERANCE_M):
+                times.append(np.inf)
+                continue
+            times.append(np.interp(segment.end_m, distance, time) - np.interp(segment.start_m, distance, time))
+        best.append(min(times))
+        source.append(int(np.argmin(times)))
+    return np.array(best), np.array(source)
+
+
+def test_best_segments_match_the_per_lap_loop(spa, laps):
+    best, source = _best_segments_per_lap(laps, spa)
+    result = theoretical_best_lap(laps, spa)
+
+    np.testing.assert_allclose(result.segments["best_time_s"], best, rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(result.segments["source_lap"], source)
+    assert result.lap_time_s == pytest.approx(best.sum())
+    assert len(set(source)) > 1
+
+
+def test_spliced_reference_drives_every_segment_in_its_best_time(spa, laps):
+    result = theoretical_best_lap(laps, spa)
+    reference = result.reference
+
+    boundaries = [s.start_m for s in spa.segments.values()] + [list(spa.segments.values())[-1].end_m]
+    clock = np.interp(boundaries, reference["Distance"], reference["Time"])
+    np.testing.assert_allclose(np.diff(clock), result.segments["best_time_s"], rtol=0, atol=1e-9)
+    assert (np.diff(reference["Time"]) > 0).all()
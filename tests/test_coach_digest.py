@@ -0,0 +1,41 @@
+import pytest
+
+from corner_engine import CornerEngine
+from coach_digest import LapDigest, build_digest, corner_deltas, estimate_tokens
+from lap_compare import compare_laps
+
+
+def test_corners_are_ranked_by_time_lost(spa, bundled_laps):
+    user_df, ref_df = bundled_laps[1], bundled_laps[0]
+    table = corner_deltas(user_df, ref_df, spa)
+    corners = compare_laps(user_df, ref_df, spa).corners
+    ref_metrics = CornerEngine(spa).compute(ref_df).set_index("corner_id")
+
+    assert list(table["delta_s"]) == sorted(corners["delta_s"], reverse=True)
+    row = table.iloc[0]
+    assert row["min_speed_kmh_delta"] == pytest.approx(
+        row["min_speed_kmh"] - ref_metrics.loc[row["corner_id"], "min_speed_kmh"])
+
+
+@pytest.mark.parametrize("token_budget", [40, 80, 150, 300, 1000])
+def test_digest_fits_the_token_budget(spa, bundled_laps, token_budget):
+    user_df, ref_df = bundled_laps[1], bundled_laps[0]
+    digest = build_digest(user_df, ref_df, spa, top_n=5, token_budget=token_budget)
+    lines = digest.splitlines()
+
+    assert lines[0].startswith("Lap delta ")
+    corner_lines = [line for line in lines[1:] if not line.startswith("(")]
+    if lines[-1].startswith("("):
+        assert lines[-1].startswith(f"({5 - len(corner_lines)} more corner(s) left out")
+    else:
+        assert len(corner_lines) == 5
+    # the header alone may exceed a tiny budget, everything after it has to fit
+    if len(lines) > 1:
+        assert sum(estimate_tokens(line) + 1 for line in lines[1:]) + estimate_tokens(lines[0]) <= token_budget
+
+
+def test_lap_digest_tool_caches_per_top_n(spa, bundled_laps):
+    digest = LapDigest(bundled_laps[1], bundled_laps[0], spa, token_budget=1000)
+
+    assert digest.get_lap_digest(3) is digest.get_lap_digest("3")
+    assert len(digest.get_lap_digest(3).splitlines()) == 4
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from corner_engine import CornerEngine
+from lap_dataclasses import CORNER_METRIC_FIELDS
+from lap_compare import compare_laps
+from coach_digest import build_digest
+from telemetry_analyzer import Analyze
+
+LAST_CORNER = 1013      # T18-19 Bus Stop Chicane, starts at 6712 m
+
+
+def _cut(lap_df, end_m):
+    return lap_df[lap_df["Distance"] < end_m].reset_index(drop=True)
+
+
+def test_lap_that_ends_before_a_corner_reports_it_as_nan(spa, bundled_laps):
+    engine = CornerEngine(spa)
+    full = engine.compute(bundled_laps[0]).set_index("corner_id")[CORNER_METRIC_FIELDS]
+    partial = engine.compute(_cut(bundled_laps[0], 6700)).set_index("corner_id")[CORNER_METRIC_FIELDS]
+
+    assert partial.loc[LAST_CORNER].isna().all()
+    reached = partial.index != LAST_CORNER
+    np.testing.assert_allclose(partial[reached].to_numpy(), full[reached].to_numpy(), equal_nan=True)
+
+
+def test_lap_that_starts_after_a_corner_reports_it_as_nan(spa, bundled_laps):
+    late = bundled_laps[0][bundled_laps[0]["Distance"] > 1500].reset_index(drop=True)
+    table = CornerEngine(spa).compute(late).set_index("corner_id")[CORNER_METRIC_FIELDS]
+
+    assert table.loc[[1001, 1002]].isna().all().all()
+    assert table.drop([1001, 1002])["entry_speed_kmh"].notna().all()
+
+
+def test_comparison_and_digest_of_a_partial_lap(spa, bundled_laps):
+    partial = _cut(bundled_laps[1], 6700)
+    comparison = compare_laps(partial, bundled_laps[0], spa)
+    corners = comparison.corners.set_index("corner_id")
+
+    assert np.isnan(corners.loc[LAST_CORNER, "delta_s"])
+    assert corners.drop(LAST_CORNER)["delta_s"].notna().all()
+    assert "Bus Stop" not in build_digest(partial, bundled_laps[0], spa)
+
+
+# fields Analyze.corner computes with the same rules, trail braking looks at samples outside of the corner there
+LOOP_FIELDS = ["time_delta_s", "entry_speed_kmh", "apex_speed_kmh", "exit_speed_kmh", "avg_speed_kmh",
+               "max_speed_kmh", "min_speed_kmh", "min_speed_m", "g_lat_avg", "g_lat_max", "g_lat_min", "g_long_avg",
+               "g_long_max", "g_long_min", "avg_steerangle", "max_steerangle", "max_steerangle_m", "avg_brake",
+               "max_brake", "avg_throttle"]
+
+
+def test_one_pass_matches_the_per_corner_loop(spa, bundled_laps):
+    for lap_df in bundled_laps:
+        table = CornerEngine(spa).compute(lap_df).set_index("corner_id")
+        analyze = Analyze(lap_df)
+        for corner in spa.corners.values():
+            metrics = analyze.corner(analyze._get_df_from_corner(corner), corner).corner_metrics
+            for field in LOOP_FIELDS:
+                assert table.loc[corner.id, field] == pytest.approx(getattr(metrics, field), abs=1e-9), \
+                    f"{corner.name}: {field}"
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from corner_engine import CornerEngine
+from corner_table import CornerMetricsTable
+from lap_dataclasses import CORNER_METRIC_FIELDS, CornerMetrics
+
+
+@pytest.fixture(scope="module")
+def corner_frames(spa, bundled_laps):
+    engine = CornerEngine(spa)
+    return [engine.compute(lap_df) for lap_df in bundled_laps]
+
+
+@pytest.fixture(scope="module")
+def table(corner_frames):
+    table = CornerMetricsTable(capacity=4)
+    for lap_id, corners in enumerate(corner_frames):
+        table.append_lap(lap_id, corners)
+    return table
+
+
+def _long_frame(corner_frames):
+    """Reference: all corners of all laps in one pandas frame, the metrics rounded to float32 like the table."""
+    frames = [corners.assign(lap_id=lap_id) for lap_id, corners in enumerate(corner_frames)]
+    frame = pd.concat(frames, ignore_index=True)
+    frame[CORNER_METRIC_FIELDS] = frame[CORNER_METRIC_FIELDS].astype(np.float32).astype(np.float64)
+    return frame
+
+
+def _assert_rows_equal(actual, desired):
+    # structured rows with NaN never compare equal as a whole, so field by field
+    for name in actual.dtype.names:
+        np.testing.assert_array_equal(actual[name], desired[name])
+
+
+def test_rows_keep_the_metrics_of_every_corner(table, corner_frames):
+    frame = _long_frame(corner_frames)
+
+    assert len(table) == len(frame)
+    for name in CORNER_METRIC_FIELDS:
+        np.testing.assert_array_equal(table.column(name).astype(np.float64), frame[name].to_numpy())
+    assert table[-1].corner_id == frame["corner_id"].iloc[-1]
+
+
+def test_append_of_dataclasses_equals_append_lap(table, corner_frames):
+    one_by_one = CornerMetricsTable(capacity=1)
+    for lap_id, corners in enumerate(corner_frames):
+        for row in corners.itertuples():
+            one_by_one.append(lap_id, row.corner_id,
+                              CornerMetrics(**{name: getattr(row, name) for name in CORNER_METRIC_FIELDS}))
+
+    _assert_rows_equal(one_by_one.rows, table.rows)
+    assert isinstance(table[0].to_corner_metrics(), CornerMetrics)
+
+
+@pytest.mark.parametrize("by", ["corner_id", "lap_id"])
+@pytest.mark.parametrize("how", ["min", "max", "sum", "mean"])
+def test_aggregate_matches_a_groupby(table, corner_frames, by, how):
+    expected = _long_frame(corner_frames).groupby(by)["apex_speed_kmh"].agg(how, skipna=False)
+    result = table.aggregate("apex_speed_kmh", by=by, how=how)
+
+    np.testing.assert_array_equal(result.index, expected.index)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+
+def test_filter_and_save_roundtrip(table, tmp_path):
+    corner_ids = table.rows["corner_id"][:3]
+    filtered = table.filter(lap_ids=1, corner_ids=corner_ids)
+
+    assert len(filtered) == 3
+    assert set(filtered.rows["lap_id"]) == {1}
+
+    table.save(tmp_path / "corners.npy")
+    _assert_rows_equal(CornerMetricsTable.load(tmp_path / "corners.npy").rows, table.rows)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from distance_index import DistanceIndex
+from telemetry_analyzer import Analyze
+
+
+def _time_delta_by_filter(lap_df, start_m, end_m):
+    """The row filter Analyze.get_time_delta used before the index."""
+    time_start = lap_df[lap_df["Distance"] == start_m]["Time"].iloc[0]
+    time_end = lap_df[lap_df["Distance"] == end_m]["Time"].iloc[0]
+    return time_end - time_start
+
+
+def test_whole_meters_match_the_row_filter(spa, bundled_laps):
+    lap_df = bundled_laps[0]
+    analyze = Analyze(lap_df)
+
+    for segment in spa.segments.values():
+        end_m = min(segment.end_m, lap_df["Distance"].iloc[-1])
+        assert analyze.get_time_delta(segment.start_m, end_m) == pytest.approx(
+            _time_delta_by_filter(lap_df, segment.start_m, end_m), abs=1e-9)
+
+
+@pytest.mark.parametrize("step", [1.0, None])
+def test_matches_np_interp_on_regular_and_irregular_grids(step):
+    rng = np.random.default_rng(0)
+    distance = np.arange(100.0, 600.0, step) if step else np.sort(rng.uniform(100, 600, 400))
+    time = np.cumsum(rng.uniform(0.01, 0.05, len(distance)))
+    index = DistanceIndex(distance, time)
+    meters = np.linspace(90, 610, 333)
+
+    assert index.is_regular == bool(step)
+    np.testing.assert_allclose(index.time_at(meters), np.interp(meters, distance, time), rtol=0, atol=1e-12)
+    for meter in meters[::37]:
+        assert index.time_at(float(meter)) == pytest.approx(np.interp(meter, distance, time), abs=1e-12)
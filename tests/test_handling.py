@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from handling import ABS_YAW_THR, LAT_G_MIN, REL_THR, HandlingDetector, balance_stats, rolling_mean
+
+
+def _yaw_error_with_pandas(df):
+    """The pandas yaw-error code of the old motect_csv.py script."""
+    df = df.copy()
+    df["v_ms"] = df["SPEED"] * (1000 / 3600)
+    df["roty_rad_s"] = np.deg2rad(df["ROTY"])
+    dt = df["Time"].diff().astype(float)
+    win = max(3, int(round(0.10 / float(dt.median()))))
+    for col in ["v_ms", "G_LAT", "roty_rad_s"]:
+        df[col + "_sm"] = df[col].rolling(win, center=True, min_periods=1).mean()
+
+    eps = 1e-6
+    df["yaw_expected"] = df["G_LAT_sm"] / (df["v_ms_sm"].abs() + eps)
+    df["yaw_error"] = df["roty_rad_s_sm"] - df["yaw_expected"]
+    df["rel_yaw_err"] = df["yaw_error"] / (df["yaw_expected"].abs() + 1e-3)
+
+    in_corner = df["G_LAT_sm"].abs() > LAT_G_MIN
+    rotating = df["roty_rad_s_sm"].abs() > ABS_YAW_THR
+    df["oversteer_flag"] = in_corner & (df["rel_yaw_err"] > REL_THR) & rotating
+    df["understeer_flag"] = in_corner & (df["rel_yaw_err"] < -REL_THR) & rotating
+    return df
+
+
+@pytest.mark.parametrize("window", [3, 4, 7])
+def test_rolling_mean_matches_the_pandas_window(window):
+    values = np.random.default_rng(2).normal(size=200)
+    values[[0, 17, 18, 150]] = np.nan
+
+    expected = pd.Series(values).rolling(window, center=True, min_periods=1).mean().to_numpy()
+    np.testing.assert_allclose(rolling_mean(values, window), expected, rtol=0, atol=1e-12)
+
+
+def test_yaw_error_matches_the_pandas_script(bundled_laps):
+    lap_df = bundled_laps[0]
+    expected = _yaw_error_with_pandas(lap_df)
+    yaw = HandlingDetector().yaw_error(lap_df)
+
+    for column in ("yaw_expected", "yaw_error", "rel_yaw_err"):
+        np.testing.assert_allclose(yaw[column], expected[column], rtol=1e-9, atol=1e-9)
+    # the cumulative-sum mean differs from pandas in the last bits, a flag may only flip right at a threshold
+    at_threshold = (np.isclose(expected["rel_yaw_err"].abs(), REL_THR, rtol=0, atol=1e-9)
+                    | np.isclose(expected["G_LAT_sm"].abs(), LAT_G_MIN, rtol=0, atol=1e-9)
+                    | np.isclose(expected["roty_rad_s_sm"].abs(), ABS_YAW_THR, rtol=0, atol=1e-9))
+    for column in ("oversteer_flag", "understeer_flag"):
+        flipped = yaw[column].to_numpy() != expected[column].to_numpy()
+        assert at_threshold[flipped].all()
+    assert yaw["oversteer_flag"].any() and yaw["understeer_flag"].any()
+
+
+def test_events_cover_every_flagged_row_once(spa, bundled_laps):
+    lap_df = spa.apply(bundled_laps[0])
+    detector = HandlingDetector()
+    yaw = detector.yaw_error(lap_df)
+    events = detector.detect(lap_df)
+
+    for kind in ("oversteer", "understeer"):
+        flagged = yaw.loc[yaw[f"{kind}_flag"], "Distance"].to_numpy()
+        covered = np.zeros(len(flagged), dtype=int)
+        for event in events:
+            if event.kind == kind:
+                covered += (flagged >= event.start_m) & (flagged <= event.end_m)
+        np.testing.assert_array_equal(covered, 1)
+    assert [e.start_m for e in events] == sorted(e.start_m for e in events)
+    assert {e.corner_id for e in events} <= set(lap_df["corner_id"])
+
+
+def test_balance_stats_count_events_and_laps(spa, bundled_laps):
+    laps = [spa.apply(lap_df) for lap_df in bundled_laps]
+    events = HandlingDetector().detect_many(laps)
+    stats = balance_stats(events, n_laps=len(laps))
+
+    expected = events.groupby(["corner_id", "kind"]).size().unstack(fill_value=0)
+    np.testing.assert_array_equal(stats["understeer_events"], expected["understeer"].reindex(stats.index, fill_value=0))
+    assert (stats[["oversteer_lap_share", "understeer_lap_share"]] <= 1).all().all()
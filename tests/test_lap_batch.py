@@ -0,0 +1,26 @@
+import json
+
+from lap_batch import analyze_laps
+from lap_telemetry import LapTelemetry
+from motec_csv_practice import TelemetryLoader
+from track_model import TrackModel
+
+RECORD = "assets/MoTec/spa/record.csv"
+USER = "assets/MoTec/spa/user.csv"
+
+
+def test_process_pool_matches_the_analysis_in_process(motec_base_dir):
+    lap_paths = [USER, RECORD, USER]
+    results = analyze_laps(lap_paths, RECORD, "spa", motec_base_dir, max_workers=2)
+
+    loader = TelemetryLoader(motec_base_dir)
+    track_model = TrackModel.for_track(motec_base_dir, "spa")
+    user = LapTelemetry(loader.telemetry_from_csv(USER, "spa"), track_model).get_all_segments()
+    record = LapTelemetry(loader.telemetry_from_csv(RECORD, "spa"), track_model).get_all_segments()
+    expected_deltas = [round(u["metrics"]["timeDelta"] - r["metrics"]["timeDelta"], 3) for u, r in zip(user, record)]
+
+    assert [result.lap_path for result in results] == lap_paths
+    # json: NaN metrics (e.g. no trail braking) compare equal
+    assert json.dumps(results[0].segments, default=float) == json.dumps(user, default=float)
+    assert results[0].segment_delta_s == results[2].segment_delta_s == expected_deltas
+    assert results[1].segment_delta_s == [0.0] * len(record)
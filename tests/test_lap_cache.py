@@ -0,0 +1,32 @@
+import numpy as np
+
+from motec_csv_practice import TelemetryLoader
+
+LAP = "assets/MoTec/spa/user.csv"
+
+
+def test_warm_hit_matches_the_cold_load(motec_base_dir, tmp_path):
+    loader = TelemetryLoader(motec_base_dir, cache_dir=tmp_path)
+    cold = loader.telemetry_from_csv(LAP, "spa")
+    warm = loader.telemetry_from_csv(LAP, "spa")
+
+    assert len(list(tmp_path.iterdir())) == 1
+    assert list(warm.columns) == list(cold.columns)
+    for column in cold.columns:
+        np.testing.assert_array_equal(np.asarray(warm[column]), np.asarray(cold[column]), err_msg=column)
+
+
+def test_cold_and_warm_frames_can_be_changed_alike(motec_base_dir, tmp_path):
+    loader = TelemetryLoader(motec_base_dir, cache_dir=tmp_path)
+    cold = loader.telemetry_from_csv(LAP, "spa")
+    warm = loader.telemetry_from_csv(LAP, "spa")
+    speed = float(cold.loc[0, "SPEED"])
+
+    for lap_df in (cold, warm):
+        lap_df.loc[0, "SPEED"] = 999.0
+        lap_df["THROTTLE"] *= 0.5
+        assert lap_df.loc[0, "SPEED"] == 999.0
+
+    np.testing.assert_allclose(warm["THROTTLE"], cold["THROTTLE"])
+    # the changes stay in memory, the next hit reads the cached values again
+    assert loader.telemetry_from_csv(LAP, "spa").loc[0, "SPEED"] == speed
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from lap_compare import compare_laps, delta_trace
+
+
+def _delta_per_meter(user_df, ref_df):
+    """Reference loop: time of both laps at every shared meter, clocks started on the first one."""
+    start_m = max(user_df["Distance"].iloc[0], ref_df["Distance"].iloc[0])
+    end_m = min(user_df["Distance"].iloc[-1], ref_df["Distance"].iloc[-1])
+    deltas = []
+    for meter in range(int(start_m), int(end_m) + 1):
+        user_time = np.interp(meter, user_df["Distance"], user_df["Time"]) - np.interp(start_m, user_df["Distance"],
+                                                                                        user_df["Time"])
+        ref_time = np.interp(meter, ref_df["Distance"], ref_df["Time"]) - np.interp(start_m, ref_df["Distance"],
+                                                                                     ref_df["Time"])
+        deltas.append(user_time - ref_time)
+    return np.array(deltas)
+
+
+def test_trace_matches_the_per_meter_loop(bundled_laps):
+    user_df, ref_df = bundled_laps[1], bundled_laps[0]
+    trace = delta_trace(user_df, ref_df)
+
+    np.testing.assert_allclose(trace["delta_s"], _delta_per_meter(user_df, ref_df), rtol=0, atol=1e-9)
+
+
+def test_lap_against_itself_has_no_delta(spa, bundled_laps):
+    comparison = compare_laps(bundled_laps[0], bundled_laps[0], spa)
+
+    assert comparison.total_delta_s == 0
+    assert (comparison.segments["delta_s"] == 0).all()
+    assert (comparison.corners["brake_point_delta_m"].dropna() == 0).all()
+
+
+def test_segment_deltas_add_up_to_the_lap_delta(spa, bundled_laps):
+    comparison = compare_laps(bundled_laps[1], bundled_laps[0], spa)
+    trace = comparison.trace
+
+    assert comparison.segments["delta_s"].sum() == pytest.approx(comparison.total_delta_s, abs=1e-9)
+    for corner, row in zip(spa.corners.values(), comparison.corners.itertuples()):
+        expected = (np.interp(corner.end_m, trace["Distance"], trace["delta_s"])
+                    - np.interp(corner.start_m, trace["Distance"], trace["delta_s"]))
+        assert row.delta_s == pytest.approx(expected, abs=1e-9)
@@ -0,0 +1,36 @@
+import math
+
+import numpy as np
+
+from corner_engine import CornerEngine
+from lap_dataclasses import CORNER_METRIC_FIELDS
+from live_telemetry import LIVE_CHANNELS, NOT_LIVE, LiveCornerTracker
+
+
+def _replay(lap_df, track_model) -> dict:
+    tracker = LiveCornerTracker(track_model)
+    finished = {}
+    for sample in lap_df[LIVE_CHANNELS].to_dict("records"):
+        for corner, metrics in tracker.push(sample):
+            finished[corner.id] = metrics
+    return finished
+
+
+def test_live_metrics_match_the_batch_metrics(spa, bundled_laps):
+    lap_df = bundled_laps[0]
+    batch = CornerEngine(spa).compute(lap_df).set_index("corner_id")
+    live = _replay(lap_df, spa)
+
+    assert sorted(live) == sorted(batch.index)
+    for field in CORNER_METRIC_FIELDS:
+        if field in NOT_LIVE:
+            continue
+        values = [getattr(live[corner_id], field) for corner_id in batch.index]
+        np.testing.assert_allclose(values, batch[field], rtol=1e-9, atol=1e-9, err_msg=field)
+
+
+def test_fields_that_are_not_computed_live_are_nan(spa, bundled_laps):
+    metrics = next(iter(_replay(bundled_laps[0], spa).values()))
+
+    assert "cpi_factor" not in NOT_LIVE
+    assert all(math.isnan(getattr(metrics, field)) for field in NOT_LIVE)
@@ -0,0 +1,50 @@
+import json
+import os
+
+import pytest
+
+from logger import get_logger, lazy, stop_queue_listeners
+
+
+def _lines(path):
+    return path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+
+
+def test_lazy_payload_is_formatted_by_the_listener(tmp_path):
+    calls = []
+
+    def dump(data):
+        calls.append(data)
+        return json.dumps(data)
+
+    log_file = tmp_path / "lazy.log"
+    log = get_logger("test_lazy", to_console=False, log_file=str(log_file), queued=True)
+    log.debug("never formatted: %s", lazy(dump, {"a": 1}))
+    log.info("data: %s", lazy(dump, {"a": 2}))
+    stop_queue_listeners()
+
+    assert calls == [{"a": 2}]
+    assert _lines(log_file)[-1].endswith('data: {"a": 2}')
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_neither_loses_nor_duplicates_records(tmp_path):
+    log_file = tmp_path / "fork.log"
+    log = get_logger("test_fork", to_console=False, log_file=str(log_file), queued=True)
+    for idx in range(200):
+        log.info(f"before fork {idx}")
+
+    pid = os.fork()
+    if pid == 0:
+        log.info("in child")
+        os._exit(0)     # like a multiprocessing worker: no atexit
+    os.waitpid(pid, 0)
+    log.info("after fork")
+    stop_queue_listeners()
+
+    parent = _lines(log_file)
+    child = _lines(tmp_path / f"fork.{pid}.log")
+    assert sum("before fork" in line for line in parent) == 200
+    assert parent[-1].endswith("after fork")
+    assert not any("in child" in line for line in parent)
+    assert len(child) == 1 and child[0].endswith("in child")
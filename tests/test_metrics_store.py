@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from lap_dataclasses import CORNER_METRIC_FIELDS
+from metrics_store import MetricsStore
+
+CORNERS = {1001: "La Source", 1002: "Eau Rouge", 1003: "Les Combes"}
+CARS = ("ferrari_296_gt3", "bmw_m4_gt3")
+
+
+def _segments(rng):
+    """segment_data of one lap in the shape of LapTelemetry.get_all_segments(), random metrics."""
+    segments = []
+    for segment_id, corner_ids in ((1, [1001, 1002]), (2, [1003])):
+        corners = [{"id": corner_id, "name": CORNERS[corner_id],
+                    "metrics": {field: float(rng.uniform(0, 300)) for field in CORNER_METRIC_FIELDS}}
+                   for corner_id in corner_ids]
+        segments.append({"id": segment_id, "corners": corners,
+                         "metrics": {"timeDelta": float(rng.uniform(30, 40)), "avgSpeed": 150.0}})
+    return segments
+
+
+@pytest.fixture
+def stored_laps():
+    """(lap_id, car, session, segments) of 40 laps, and the store they were added to."""
+    rng = np.random.default_rng(11)
+    store = MetricsStore(":memory:")
+    laps = []
+    for lap_no in range(40):
+        car, session = CARS[lap_no % 2], f"stint_{lap_no // 10}"
+        segments = _segments(rng)
+        # one lap without an exit speed at La Source, NULL values are skipped
+        if lap_no == 7:
+            segments[0]["corners"][0]["metrics"]["exit_speed_kmh"] = None
+        laps.append((store.add_lap("spa", car, session, segments), car, session, segments))
+    yield store, laps
+    store.close()
+
+
+def _corner_values(laps, corner_id, field, car=None, session=None, last_n_laps=None):
+    """Reference: newest first, filtered in Python."""
+    values = []
+    for lap_id, lap_car, lap_session, segments in reversed(laps):
+        if (car is not None and lap_car != car) or (session is not None and lap_session != session):
+            continue
+        for segment in segments:
+            for corner in segment["corners"]:
+                if corner["id"] == corner_id:
+                    values.append((corner["metrics"][field], lap_id))
+    return values[:last_n_laps]
+
+
+@pytest.mark.parametrize("car, session, last_n_laps, how", [
+    (None, None, None, "max"),
+    ("ferrari_296_gt3", None, 5, "max"),
+    ("bmw_m4_gt3", "stint_2", None, "min"),
+    (None, None, 3, "min"),
+])
+def test_best_corner_metric_matches_a_scan_of_the_laps(stored_laps, car, session, last_n_laps, how):
+    store, laps = stored_laps
+    values = [v for v in _corner_values(laps, 1001, "exit_speed_kmh", car, session, last_n_laps) if v[0] is not None]
+    expected = (max if how == "max" else min)(values)
+
+    assert store.best_corner_metric("spa", "Source", "exit_speed_kmh", car=car, session=session,
+                                    last_n_laps=last_n_laps, how=how) == expected
+
+
+def test_segment_times_hold_every_lap_and_segment(stored_laps):
+    store, laps = stored_laps
+    times = store.segment_times("spa", car="bmw_m4_gt3", last_n_laps=4)
+
+    expected = {lap_id: [segment["metrics"]["timeDelta"] for segment in segments]
+                for lap_id, car, _, segments in laps[-8:] if car == "bmw_m4_gt3"}
+    assert list(times.index) == sorted(expected)
+    np.testing.assert_array_equal(times.to_numpy(), [expected[lap_id] for lap_id in sorted(expected)])
+
+
+def test_histories_and_lookups(stored_laps):
+    store, laps = stored_laps
+
+    assert store.corner_id("spa", "Combes") == 1003
+    with pytest.raises(KeyError):
+        store.corner_id("spa", "Pouhon")
+    with pytest.raises(ValueError):
+        store.best_corner_metric("spa", 1001, "no_such_field")
+
+    history = store.corner_history("spa", 1002, session="stint_1")
+    assert list(history["lap_id"]) == [lap_id for lap_id, _, session, _ in reversed(laps) if session == "stint_1"]
+    assert len(store.segment_history("spa", 2, last_n_laps=6)) == 6
+    assert store.laps("spa")["lap_time_s"].iloc[0] == pytest.approx(
+        sum(segment["metrics"]["timeDelta"] for segment in laps[-1][3]))
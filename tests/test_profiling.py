@@ -0,0 +1,67 @@
+import logging
+import math
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def profiled(monkeypatch, caplog):
+    """Profiling switched on, its records captured instead of written to logs/profiling.log."""
+    monkeypatch.setattr(profiling, "log", logging.getLogger("test_profiling"))
+    profiling.enable()
+    profiling.reset()
+    caplog.set_level(logging.INFO, logger="test_profiling")
+    yield caplog
+    profiling.enable(False)
+    profiling.reset()
+
+
+def test_summary_uses_nearest_rank_percentiles(profiled):
+    durations = [0.005, 0.001, 0.004, 0.002, 0.003, 0.010, 0.007]
+    for seconds in durations:
+        profiling.record("stage", seconds)
+
+    ordered = sorted(durations)
+    stats = profiling.summary()["stage"]
+    assert stats["count"] == len(durations)
+    assert stats["total_ms"] == pytest.approx(sum(durations) * 1000)
+    assert stats["p50_ms"] == pytest.approx(ordered[math.ceil(0.50 * len(ordered)) - 1] * 1000)
+    assert stats["p95_ms"] == pytest.approx(ordered[-1] * 1000)
+    assert [record.fields["stage"] for record in profiled.records] == ["stage"] * len(durations)
+
+
+def test_span_records_fields_and_errors(profiled):
+    with profiling.span("loader.read_csv", file="lap.csv"):
+        pass
+    with pytest.raises(KeyError):
+        with profiling.span("analyze"):
+            raise KeyError("Distance")
+
+    assert profiled.records[0].fields["file"] == "lap.csv"
+    assert profiled.records[1].fields["error"] == "KeyError"
+    assert profiling.summary().keys() == {"loader.read_csv", "analyze"}
+
+
+def test_run_logs_a_summary_per_stage(profiled):
+    with profiling.run("coach"):
+        with profiling.span("llm.manager"):
+            pass
+
+    summaries = [record.fields for record in profiled.records if record.getMessage() == "summary"]
+    assert {fields["stage"] for fields in summaries} == {"llm.manager", "run.coach"}
+    assert all(fields["run"] == "coach" for fields in summaries)
+
+
+def test_disabled_spans_record_nothing(profiled):
+    profiling.enable(False)
+
+    @profiling.timed()
+    def work():
+        return 42
+
+    with profiling.span("stage"):
+        assert work() == 42
+    assert profiling.summary() == {}
+    assert profiled.records == []
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from motec_csv_practice import TelemetryLoader
+from resampling import DistanceResampler, resample_by_distance
+
+
+def _resample_per_column(lap_data: pd.DataFrame, step=1.0) -> pd.DataFrame:
+    """The np.interp loop that resample_by_distance replaced."""
+    telemetry = lap_data.copy()
+    telemetry["Distance"] = pd.to_numeric(telemetry["Distance"], errors="coerce")
+    telemetry = telemetry.dropna(subset=["Distance"]).sort_values("Distance", kind="stable")
+    track_distance = telemetry["Distance"].astype(float).values
+    meter_grid = np.arange(int(np.floor(track_distance.min())), int(np.ceil(track_distance.max())), step)
+
+    resampled_data = {"Distance": meter_grid}
+    for col in telemetry:
+        if col != "Distance":
+            resampled_data[col] = np.interp(meter_grid.astype(float), track_distance,
+                                            pd.to_numeric(telemetry[col], errors="coerce"))
+    df_out = pd.DataFrame(resampled_data)
+    df_out["Distance"] = df_out["Distance"].astype(int)
+    return df_out
+
+
+def test_matches_per_column_interp_on_a_motec_export(motec_base_dir):
+    raw = TelemetryLoader._read_motec_csv(motec_base_dir / "assets" / "MoTec" / "spa" / "user.csv")
+
+    pd.testing.assert_frame_equal(resample_by_distance(raw), _resample_per_column(raw))
+
+
+def test_matches_per_column_interp_on_unsorted_gappy_samples():
+    raw = pd.DataFrame({
+        "Distance": [3.5, 0.2, 1.7, 1.7, "n/a", 6.1, 4.9],
+        "SPEED": [30.0, 10.0, 20.0, 21.0, 99.0, np.nan, 40.0],
+        "GEAR": ["3", "1", "2", "2", "2", "4", "x"],
+    })
+
+    pd.testing.assert_frame_equal(resample_by_distance(raw), _resample_per_column(raw))
+
+
+def test_one_resampler_for_all_channels_equals_np_interp():
+    rng = np.random.default_rng(0)
+    distance = np.sort(rng.uniform(0, 100, 500))
+    grid = np.arange(-2.0, 103.0, 0.5)
+    channels = rng.normal(size=(500, 4))
+
+    resampled = DistanceResampler(distance, grid).apply(channels)
+    expected = np.column_stack([np.interp(grid, distance, channels[:, i]) for i in range(4)])
+    np.testing.assert_allclose(resampled, expected, rtol=0, atol=1e-12)
@@ -0,0 +1,69 @@
+import time
+
+from conftest import PROJECT_ROOT
+from response_cache import ResponseCache, setup_hash
+from specialists import SpecialistRegistry, StubBackend, using_setup
+
+PROMPT_DIR = PROJECT_ROOT / "src" / "assets" / "prompts"
+SETUP = {"carName": "ferrari_296_gt3", "aero": {"rearWing": 6}}
+
+
+def _registry(cache: ResponseCache) -> SpecialistRegistry:
+    return SpecialistRegistry(PROMPT_DIR, backend=StubBackend(), cache=cache)
+
+
+def test_same_question_about_same_setup_is_answered_from_the_cache():
+    registry = _registry(ResponseCache(":memory:"))
+    with using_setup(setup_hash(SETUP)):
+        first = registry.ask("tyre", "Front  pushes in slow corners")
+        second = registry.ask("tyre", "front pushes in slow corners ")
+
+    assert first == second
+    assert len(registry.backend.calls) == 1
+    assert (registry.cache.hits, registry.cache.misses) == (1, 1)
+
+
+def test_other_setup_specialist_or_aero_setup_is_a_miss():
+    registry = _registry(ResponseCache(":memory:"))
+    with using_setup(setup_hash(SETUP)):
+        registry.ask("tyre", "understeer")
+        registry.ask("damper", "understeer")
+        registry.ask("aero", "understeer", setup={"rearWing": 6})
+        registry.ask("aero", "understeer", setup={"rearWing": 7})
+    with using_setup(setup_hash({**SETUP, "carName": "bmw_m4_gt3"})):
+        registry.ask("tyre", "understeer")
+
+    assert len(registry.backend.calls) == 5
+
+
+def test_answers_survive_a_restart(tmp_path):
+    db_path = tmp_path / "responses.sqlite"
+    with ResponseCache(db_path) as cache:
+        _registry(cache).ask("electronics", "wheelspin on exit")
+
+    with ResponseCache(db_path) as cache:
+        registry = _registry(cache)
+        registry.ask("electronics", "wheelspin on exit")
+        assert registry.backend.calls == []
+
+
+def test_least_recently_used_answers_are_evicted():
+    cache = ResponseCache(":memory:", max_entries=2)
+    cache.put("a", "tyre", "A")
+    cache.put("b", "tyre", "B")
+    time.sleep(0.01)
+    cache.get("a")
+    cache.put("c", "tyre", "C")
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+
+
+def test_expired_answers_are_a_miss():
+    cache = ResponseCache(":memory:", ttl_s=0.01)
+    cache.put("a", "tyre", "A")
+    time.sleep(0.05)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
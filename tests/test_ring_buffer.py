@@ -0,0 +1,55 @@
+from collections import deque
+
+import numpy as np
+
+from ring_buffer import ChannelRingBuffer
+
+CHANNELS = ["Time", "Distance", "SPEED"]
+
+
+def _samples(n):
+    rng = np.random.default_rng(3)
+    time = np.arange(n) / 60
+    return [{"Time": t, "Distance": 40 * t, "SPEED": speed} for t, speed in zip(time, rng.uniform(60, 280, n))]
+
+
+def test_last_samples_match_a_deque_after_wrapping():
+    buffer = ChannelRingBuffer(CHANNELS, capacity=50)
+    history = deque(maxlen=50)
+    for idx, sample in enumerate(_samples(173)):
+        if idx % 2:
+            buffer.append(sample)
+        else:
+            buffer.append_row(np.array([sample[name] for name in CHANNELS]))
+        history.append([sample[name] for name in CHANNELS])
+
+        for n in (1, 7, None):
+            expected = np.array(history)[-n:] if n else np.array(history)
+            np.testing.assert_array_equal(buffer.last(n), expected)
+
+    assert len(buffer) == 50
+    assert np.shares_memory(buffer.channel("SPEED"), buffer._data)
+
+
+def test_windows_match_a_filter_over_the_history():
+    samples = _samples(400)
+    buffer = ChannelRingBuffer(CHANNELS, capacity=256)
+    for sample in samples:
+        buffer.append(sample)
+    kept = np.array([[sample[name] for name in CHANNELS] for sample in samples[-256:]])
+
+    for seconds in (0.0, 0.5, 2.0, 100.0):
+        expected = kept[kept[:, 0] >= kept[-1, 0] - seconds]
+        np.testing.assert_array_equal(buffer.window_by_time(seconds), expected)
+    expected = kept[kept[:, 1] >= kept[-1, 1] - 30]
+    np.testing.assert_array_equal(buffer.window_by_distance(30), expected)
+
+
+def test_missing_channels_are_nan_and_clear_empties_the_buffer():
+    buffer = ChannelRingBuffer(CHANNELS, capacity=4)
+    buffer.append({"Time": 0.0, "Distance": 0.0})
+
+    assert np.isnan(buffer.channel("SPEED")[0])
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.last().shape == (0, len(CHANNELS))
@@ -0,0 +1,102 @@
+import copy
+import json
+import os
+
+import pytest
+
+from conftest import PROJECT_ROOT
+from setup_catalog import SetupCatalog, flatten
+
+BASE_SETUP = json.loads((PROJECT_ROOT / "src" / "assets" / "setups" / "SPA RACE BERNA 24 32.json").read_text())
+
+
+def _write_setup(path, car="ferrari_296_gt3", rear_wing=6, brake_bias=48, pressure=52):
+    setup = copy.deepcopy(BASE_SETUP)
+    setup["carName"] = car
+    setup["advancedSetup"]["aeroBalance"]["rearWing"] = rear_wing
+    setup["advancedSetup"]["mechanicalBalance"]["brakeBias"] = brake_bias
+    setup["basicSetup"]["tyres"]["tyrePressure"][0] = pressure
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(setup))
+    return setup
+
+
+@pytest.fixture
+def setup_dir(tmp_path):
+    for idx in range(12):
+        car = "ferrari_296_gt3" if idx % 3 else "bmw_m4_gt3"
+        _write_setup(tmp_path / car / f"setup_{idx:02d}.json", car=car, rear_wing=idx % 7, brake_bias=44 + idx,
+                     pressure=50 + idx % 4)
+    (tmp_path / "notes.json").write_text(json.dumps({"comment": "no setup"}))
+    return tmp_path
+
+
+def _brute_force(root, car, predicate):
+    """Reference scan: open every setup and test it in Python."""
+    paths = []
+    for path in sorted(root.rglob("*.json")):
+        setup = json.loads(path.read_text())
+        if "carName" not in setup or (car is not None and setup["carName"] != car):
+            continue
+        if predicate(dict(flatten(setup))):
+            paths.append(str(path.resolve()))
+    return paths
+
+
+@pytest.mark.parametrize("car, conditions, predicate", [
+    (None, ["rearWing >= 3"], lambda p: p["advancedSetup.aeroBalance.rearWing"] >= 3),
+    ("ferrari_296_gt3", ["rearWing >= 3", "brakeBias < 52"],
+     lambda p: p["advancedSetup.aeroBalance.rearWing"] >= 3 and p["advancedSetup.mechanicalBalance.brakeBias"] < 52),
+    ("bmw_m4_gt3", ["advancedSetup.mechanicalBalance.brakeBias != 47"],
+     lambda p: p["advancedSetup.mechanicalBalance.brakeBias"] != 47),
+    (None, ["tyrePressure[0] = 51"], lambda p: p["basicSetup.tyres.tyrePressure[0]"] == 51),
+    (None, ["basicSetup.strategy.pitStrategy[0].tyres.tyrePressure[0] = 59"],
+     lambda p: p["basicSetup.strategy.pitStrategy[0].tyres.tyrePressure[0]"] == 59),
+])
+def test_query_matches_a_scan_of_every_file(setup_dir, car, conditions, predicate):
+    with SetupCatalog(":memory:") as catalog:
+        catalog.scan(setup_dir)
+        expected = _brute_force(setup_dir, car, predicate)
+        assert expected
+        assert catalog.query(car, *conditions) == expected
+
+
+def test_leaf_and_full_path_select_the_same_setups(setup_dir):
+    with SetupCatalog(":memory:") as catalog:
+        catalog.scan(setup_dir)
+        by_leaf = catalog.query(None, "tyrePressure[0] >= 52")
+        by_path = catalog.query(None, "basicSetup.tyres.tyrePressure[0] >= 52")
+
+    assert by_leaf == by_path
+    assert 0 < len(by_leaf) < 12
+
+
+def test_leaf_that_ends_two_equally_short_paths_is_rejected(setup_dir):
+    setup = json.loads((setup_dir / "bmw_m4_gt3" / "setup_00.json").read_text())
+    setup["advancedSetup"]["extras"] = {"rearWing": 1}
+    (setup_dir / "ambiguous.json").write_text(json.dumps(setup))
+
+    with SetupCatalog(":memory:") as catalog:
+        catalog.scan(setup_dir)
+        with pytest.raises(ValueError, match="ambiguous"):
+            catalog.query(None, "rearWing >= 3")
+        assert catalog.query(None, "advancedSetup.extras.rearWing = 1") == [str((setup_dir / "ambiguous.json").resolve())]
+
+
+def test_rescan_only_touches_changed_files(setup_dir, tmp_path_factory):
+    db_path = tmp_path_factory.mktemp("catalog") / "catalog.sqlite"
+    with SetupCatalog(db_path) as catalog:
+        assert catalog.scan(setup_dir) == {"added": 12, "updated": 0, "unchanged": 0, "removed": 0, "skipped": 1}
+
+    changed = setup_dir / "ferrari_296_gt3" / "setup_01.json"
+    stat = changed.stat()
+    _write_setup(changed, rear_wing=11)
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    (setup_dir / "bmw_m4_gt3" / "setup_03.json").unlink()
+    _write_setup(setup_dir / "new" / "setup_99.json", car="audi_r8_lms_evo_ii")
+
+    with SetupCatalog(db_path) as catalog:
+        assert catalog.scan(setup_dir) == {"added": 1, "updated": 1, "unchanged": 10, "removed": 1, "skipped": 1}
+        assert catalog.query(None, "rearWing = 11") == [str(changed.resolve())]
+        assert catalog.cars() == {"audi_r8_lms_evo_ii": 1, "bmw_m4_gt3": 3, "ferrari_296_gt3": 8}
+        assert len(catalog) == 12
@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+import specialists
+from conftest import PROJECT_ROOT
+from main import TOOL_LABELS, SetupManager
+from response_cache import ResponseCache
+from specialists import SpecialistRegistry, StubBackend, StubFunctionCall, StubPart
+
+PROMPT_DIR = PROJECT_ROOT / "src" / "assets" / "prompts"
+SETUP_PATH = PROJECT_ROOT / "src" / "assets" / "setups" / "SPA RACE BERNA 24 32.json"
+PROBLEM = "Untersteuern in langsamen Kurven"
+PARALLEL_SPECIALISTS = ("tyre", "aero", "damper")
+
+
+def _ask_tyre_specialist_first(content, history):
+    """Manager that hands every question to the tyre specialist and answers with its result."""
+    if isinstance(content, str):
+        return [StubPart(function_call=StubFunctionCall("ask_tyre_specialist", {"problem": content}))]
+    return "Fazit: " + content[0].function_response["response"]["result"]
+
+
+def _ask_three_specialists(content, history):
+    """Manager that asks three specialists in one turn and joins their results in the order it got them."""
+    if isinstance(content, str):
+        return [StubPart(function_call=StubFunctionCall(f"ask_{name}_specialist", {"problem": content}))
+                for name in PARALLEL_SPECIALISTS]
+    return " | ".join(f"{part.function_response['name']}: {part.function_response['response']['result']}"
+                      for part in content)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = SpecialistRegistry(PROMPT_DIR, backend=StubBackend(manager=_ask_tyre_specialist_first),
+                                  cache=ResponseCache(":memory:"))
+    monkeypatch.setattr(specialists, "_registry", registry)
+    return registry
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_ask_runs_a_tool_call_turn_offline(registry, stream):
+    manager = SetupManager(setup_path=SETUP_PATH)
+    answer = manager.ask(PROBLEM, stream=stream)
+
+    assert answer == f"Fazit: [tyre] {PROBLEM}"
+    assert registry.backend.calls == [("tyre", PROBLEM)]
+    assert [role for role, _ in manager.chat.history] == ["user", "model", "user", "model"]
+
+
+def test_repeated_question_about_the_same_setup_skips_the_specialist(registry):
+    manager = SetupManager(setup_path=SETUP_PATH)
+    manager.ask(PROBLEM)
+    manager.ask(PROBLEM)
+
+    assert len(registry.backend.calls) == 1
+    assert registry.cache.hits == 1
+
+
+def test_new_setup_keeps_the_chat_and_swaps_the_setup_tools(registry):
+    manager = SetupManager(setup_path=SETUP_PATH)
+    manager.ask(PROBLEM)
+    old_getter = manager.tool_table["get_setup"]
+
+    assert manager.set_setup(str(SETUP_PATH))
+    assert len(manager.chat.history) == 4
+    assert manager.tool_table["get_setup"] is not old_getter
+    assert manager.model.tools == manager.tools
+
+
+def test_function_calls_of_one_turn_run_at_the_same_time_and_keep_their_order(monkeypatch):
+    # every specialist waits until all three are running, run one after the other the barrier breaks
+    barrier = threading.Barrier(len(PARALLEL_SPECIALISTS), timeout=5)
+
+    def answer(name, system_instruction, problem):
+        barrier.wait()
+        return f"[{name}] {threading.current_thread().name}"
+
+    backend = StubBackend(answer=answer, manager=_ask_three_specialists)
+    monkeypatch.setattr(specialists, "_registry",
+                        SpecialistRegistry(PROMPT_DIR, backend=backend, cache=ResponseCache(":memory:")))
+    manager = SetupManager(setup_path=SETUP_PATH, max_parallel_tools=3)
+    answer_text = manager.ask(PROBLEM)
+
+    results = [result.split(": ", 1) for result in answer_text.split(" | ")]
+    assert [name for name, _ in results] == [f"ask_{name}_specialist" for name in PARALLEL_SPECIALISTS]
+    assert [result.split()[0] for _, result in results] == [f"[{name}]" for name in PARALLEL_SPECIALISTS]
+    assert all(result.split()[1].startswith("tool") for _, result in results)
+
+
+def test_stream_prints_tool_progress_and_the_answer(monkeypatch, capsys):
+    backend = StubBackend(manager=_ask_three_specialists)
+    monkeypatch.setattr(specialists, "_registry",
+                        SpecialistRegistry(PROMPT_DIR, backend=backend, cache=ResponseCache(":memory:")))
+    manager = SetupManager(setup_path=SETUP_PATH)
+    answer = manager.ask(PROBLEM, stream=True)
+    lines = capsys.readouterr().out.splitlines()
+
+    for name in PARALLEL_SPECIALISTS:
+        tool_name = f"ask_{name}_specialist"
+        started = lines.index(f"   ... {TOOL_LABELS[tool_name]}")
+        finished = next(idx for idx, line in enumerate(lines) if line.startswith(f"   ✓ {tool_name} fertig"))
+        assert started < finished
+    assert lines[-1] == answer
+    assert not any(line.startswith("-> Manager ruft auf") for line in lines)
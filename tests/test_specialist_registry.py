@@ -0,0 +1,56 @@
+import os
+import shutil
+
+import pytest
+
+from conftest import PROJECT_ROOT
+from specialists import SPECIALISTS, SpecialistRegistry, StubBackend
+
+
+@pytest.fixture
+def prompt_dir(tmp_path):
+    shutil.copytree(PROJECT_ROOT / "src" / "assets" / "prompts", tmp_path / "prompts")
+    return tmp_path / "prompts"
+
+
+def _touch(path, text):
+    stat = path.stat()
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_prompts_are_read_once_at_start(prompt_dir):
+    registry = SpecialistRegistry(prompt_dir, backend=StubBackend())
+    aero_prompt = prompt_dir / SPECIALISTS["aero"].prompt_file
+    original = aero_prompt.read_text(encoding="utf-8")
+    _touch(aero_prompt, "changed")
+
+    assert registry.prompt("aero") == original
+    assert set(registry._prompts) == set(SPECIALISTS)
+
+
+def test_watch_reloads_a_changed_prompt(prompt_dir):
+    registry = SpecialistRegistry(prompt_dir, backend=StubBackend(), watch=True)
+    _touch(prompt_dir / SPECIALISTS["tyre"].prompt_file, "new tyre prompt")
+
+    assert registry.prompt("tyre") == "new tyre prompt"
+
+
+def test_ask_routes_to_the_backend_with_the_setup(prompt_dir):
+    seen = []
+
+    def answer(name, system_instruction, problem):
+        seen.append(system_instruction)
+        return f"{name}: ok"
+
+    backend = StubBackend(answer=answer)
+    registry = SpecialistRegistry(prompt_dir, backend=backend)
+    with_setup = next(name for name, spec in SPECIALISTS.items() if spec.with_setup)
+    without_setup = next((name for name, spec in SPECIALISTS.items() if not spec.with_setup), None)
+
+    assert registry.ask(with_setup, "Untersteuern", setup={"rearWing": 6}) == f"{with_setup}: ok"
+    assert seen[-1].endswith("Setup:\n {'rearWing': 6}")
+    if without_setup is not None:
+        registry.ask(without_setup, "Untersteuern", setup={"rearWing": 6})
+        assert seen[-1] == registry.prompt(without_setup)
+    assert backend.calls[0] == (with_setup, "Untersteuern")
@@ -0,0 +1,9 @@
+import pytest
+
+from startup_time import STARTUP_TARGETS_S, measure
+
+
+@pytest.mark.parametrize("module", sorted(STARTUP_TARGETS_S))
+def test_entry_points_load_no_heavy_module_at_import(module):
+    # only the modules are checked here, the time targets depend on the machine (see startup_time.py)
+    assert measure(module, runs=1)["heavy_modules"] == []
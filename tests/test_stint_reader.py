@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from motec_csv_practice import StintReader, TelemetryLoader
+from synthetic_motec import SyntheticLapGenerator, write_stint
+from track_model import TrackModel
+
+
+CHANNELS = ["Distance", "Time", "SPEED", "THROTTLE", "BRAKE", "G_LAT", "G_LON", "STEERANGLE", "LAP_BEACON"]
+
+
+@pytest.fixture(scope="module")
+def raw_laps(bundled_laps):
+    base_laps = [lap_df[CHANNELS] for lap_df in bundled_laps]
+    return list(SyntheticLapGenerator(base_laps, seed=1, sample_rates_hz=(20.0, 60.0)).laps(3))
+
+
+def _read(base_dir, name, laps, chunksize=997):
+    write_stint(laps, base_dir / "assets" / "MoTec" / "spa" / name)
+    reader = StintReader(TelemetryLoader(base_dir), chunksize=chunksize)
+    return list(reader.iter_laps(f"assets/MoTec/spa/{name}", "spa"))
+
+
+def _expected(base_dir, raw_lap):
+    lap_df = TelemetryLoader._resample_df(raw_lap)
+    return TrackModel.for_track(base_dir, "spa").apply(lap_df)
+
+
+@pytest.mark.parametrize("chunksize", [997, 50_000])
+def test_splits_a_stint_into_the_laps_it_was_written_from(motec_base_dir, raw_laps, chunksize):
+    laps = _read(motec_base_dir, "stint.csv", raw_laps, chunksize)
+
+    assert len(laps) == len(raw_laps)
+    for lap_df, raw_lap in zip(laps, raw_laps):
+        assert lap_df["Time"].iloc[0] == pytest.approx(0.0, abs=1e-3)
+        # write_stint sets LAP_BEACON, the export rounds to 10 significant digits
+        pd.testing.assert_frame_equal(lap_df.drop(columns="LAP_BEACON"),
+                                      _expected(motec_base_dir, raw_lap).drop(columns="LAP_BEACON"),
+                                      check_dtype=False, rtol=1e-4, atol=1e-4)
+
+
+def test_splits_on_the_distance_wrap_without_lap_beacon(motec_base_dir, raw_laps):
+    laps = _read(motec_base_dir, "no_beacon.csv", [lap.drop(columns="LAP_BEACON") for lap in raw_laps])
+
+    assert [len(lap_df) for lap_df in laps] == [len(_expected(motec_base_dir, lap)) for lap in raw_laps]
+
+
+def test_session_cumulative_distance_is_rebased_but_a_pit_exit_lap_is_not(motec_base_dir, raw_laps):
+    pit_exit = raw_laps[0][raw_laps[0]["Distance"] >= 1500].reset_index(drop=True)
+    pit_exit["Time"] -= pit_exit["Time"].iloc[0]
+    flying = raw_laps[1].copy()
+    flying["Distance"] += pit_exit["Distance"].iloc[-1]     # MoTeC counts the distance of the whole session
+    flying["LAP_BEACON"] = 0.0
+
+    first, second = _read(motec_base_dir, "cumulative.csv", [pit_exit, flying])
+
+    assert first["Distance"].iloc[0] == 1500
+    assert second["Distance"].iloc[0] == 0
+    np.testing.assert_allclose(second["SPEED"], _expected(motec_base_dir, raw_laps[1])["SPEED"], rtol=1e-4)
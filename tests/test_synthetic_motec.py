@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from synthetic_motec import SAMPLE_RATES_HZ, SPEED_NOISE, SyntheticLapGenerator, write_stint
+
+
+def test_same_seed_gives_the_same_session(bundled_laps):
+    first = list(SyntheticLapGenerator(bundled_laps, seed=4).laps(2))
+    second = list(SyntheticLapGenerator(bundled_laps, seed=4).laps(2))
+    other = SyntheticLapGenerator(bundled_laps, seed=5).lap(base=0)
+
+    for a, b in zip(first, second):
+        pd.testing.assert_frame_equal(a, b)
+    assert not np.array_equal(SyntheticLapGenerator(bundled_laps, seed=4).lap(base=0)["SPEED"][:100],
+                              other["SPEED"][:100])
+
+
+def test_lap_stays_close_to_its_base_lap(bundled_laps):
+    generator = SyntheticLapGenerator(bundled_laps, seed=8)
+    base_df = bundled_laps[1]
+    lap_df = generator.lap(base=1)
+
+    base_time = base_df["Time"].iloc[-1] - base_df["Time"].iloc[0]
+    lap_time = lap_df["Time"].iloc[-1]
+    assert abs(lap_time / base_time - 1) < SPEED_NOISE
+    rate = 1 / np.median(np.diff(lap_df["Time"]))
+    assert SAMPLE_RATES_HZ[0] - 1e-6 <= rate <= SAMPLE_RATES_HZ[1] + 1e-6
+    assert (np.diff(lap_df["Time"]) > 0).all() and (np.diff(lap_df["Distance"]) >= 0).all()
+    assert lap_df["BRAKE"].between(0, 100).all() and lap_df["THROTTLE"].between(0, 100).all()
+
+
+def test_stint_time_is_strictly_increasing(bundled_laps, tmp_path):
+    laps = list(SyntheticLapGenerator(bundled_laps, seed=2).laps(3))
+    assert write_stint(laps, tmp_path / "stint.csv") == 3
+
+    # 14 rows of session info, the channel names, then one row of units
+    stint = pd.read_csv(tmp_path / "stint.csv", skiprows=[*range(14), 15])
+    assert len(stint) == sum(len(lap_df) for lap_df in laps)
+    assert (np.diff(stint["Time"]) > 0).all()
+    assert stint["LAP_BEACON"].sum() == 2
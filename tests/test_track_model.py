@@ -0,0 +1,54 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from conftest import PROJECT_ROOT
+from track_model import _TRACK_CACHE, NO_ID, TrackModel
+
+
+def test_segment_index_matches_merge_asof(spa):
+    """The per-lap join the index replaced: every meter gets the last segment that started before it."""
+    meters = pd.DataFrame({"Distance": np.arange(spa.track_length_m, dtype=np.int64)})
+    segments = pd.DataFrame({"segment_id": [s.id for s in spa.segments.values()],
+                             "segmentStart_m": [int(s.start_m) for s in spa.segments.values()]})
+    joined = pd.merge_asof(meters, segments.sort_values("segmentStart_m"), left_on="Distance",
+                           right_on="segmentStart_m", direction="backward")
+
+    np.testing.assert_array_equal(spa.segment_ids(meters["Distance"]), joined["segment_id"].fillna(NO_ID))
+
+
+def test_corner_index_matches_a_scan_over_the_corners(spa):
+    meters = np.arange(-5, spa.track_length_m + 5)
+    expected = []
+    for meter in meters:
+        inside = [c.id for c in spa.corners.values() if c.start_m <= meter <= c.end_m]
+        expected.append(inside[-1] if inside else NO_ID)     # touching corners: the later one owns the meter
+
+    np.testing.assert_array_equal(spa.corner_ids(meters + 0.5), expected)
+
+
+def test_apply_adds_the_ids_to_every_row(spa, bundled_laps):
+    lap_df = spa.apply(bundled_laps[0])
+
+    np.testing.assert_array_equal(lap_df["segment_id"], spa.segment_ids(bundled_laps[0]["Distance"]))
+    np.testing.assert_array_equal(lap_df["corner_id"], spa.corner_ids(bundled_laps[0]["Distance"]))
+
+
+def test_cache_keeps_one_model_per_map_and_replaces_it_when_a_map_changes(tmp_path):
+    track_dir = tmp_path / "assets" / "MoTec" / "spa"
+    shutil.copytree(PROJECT_ROOT / "src" / "assets" / "MoTec" / "spa", track_dir)
+    entries = len(_TRACK_CACHE)
+
+    first = TrackModel.for_track(tmp_path, "spa")
+    assert TrackModel.for_track(tmp_path, "spa") is first
+
+    corners_path = track_dir / "spa_corners.json"
+    stat = corners_path.stat()
+    os.utime(corners_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    second = TrackModel.for_track(tmp_path, "spa")
+
+    assert second is not first
+    assert TrackModel.for_track(tmp_path, "spa") is second
+    assert len(_TRACK_CACHE) == entries + 1